@@ -0,0 +1,26 @@
+# access.py — admin-only gate for operational pages
+#
+# Admin pages are disabled unless STROKE_ADMIN_TOKEN is set.  The token is
+# accepted from ?token=... or typed into the page, and remembered for the
+# session once it matches.
+import hmac
+import os
+
+import streamlit as st
+
+
+def require_admin():
+    """Stop the script run unless this session has presented the admin token."""
+    expected = os.environ.get("STROKE_ADMIN_TOKEN")
+    if not expected:
+        st.error("Admin pages are disabled. Set STROKE_ADMIN_TOKEN on the server to enable them.")
+        st.stop()
+    if st.session_state.get("_admin_ok"):
+        return
+    supplied = st.query_params.get("token") or st.text_input("Admin token", type="password")
+    if supplied and hmac.compare_digest(supplied.encode(), expected.encode()):
+        st.session_state._admin_ok = True
+        return
+    if supplied:
+        st.error("Invalid admin token.")
+    st.stop()
@@ -1,10 +1,14 @@
 import streamlit as st
-from gtts import gTTS
-import base64
-import os
 import numpy as np
 import sys, __main__  
 
+import assets
+import profiling
+
+# Opt-in profiling (STROKE_PROFILE=1 or ?profile=<secret>); see profiling.py
+if profiling.profile_page(__file__, globals()):
+    st.stop()
+
 # ── Define polynomial helper for unpickling ─────────────────────────────────
 def add_poly(X_array):
     age         = X_array[:, 0]
@@ -31,15 +35,10 @@ setattr(__main__, "engineer_feats", engineer_feats)
 # Set page configuration
 st.set_page_config(page_title="Stroke Risk Prediction", layout="wide")
 
-# Encode image as Base64
-def get_base64_image(image_path):
-    with open(image_path, "rb") as img_file:
-        b64_encoded = base64.b64encode(img_file.read()).decode()
-        return f"data:image/png;base64,{b64_encoded}"
-
-encoded_image0 = get_base64_image("strokeprediction.png")  # original hero
-encoded_image1 = get_base64_image("image2.png")           # first new slide
-encoded_image2 = get_base64_image("image3.png")           # second new slide
+# Encode images as Base64 (cached once per process; see assets.py)
+encoded_image0 = assets.image_data_uri("strokeprediction.png")  # original hero
+encoded_image1 = assets.image_data_uri("image2.png")           # first new slide
+encoded_image2 = assets.image_data_uri("image3.png")           # second new slide
 
 # Hide default Streamlit elements
 st.markdown("""
@@ -166,59 +165,11 @@ preventing brain tissue from getting oxygen and nutrients. Early detection can s
 """, unsafe_allow_html=True)
 
 # Narration text
-full_page_text = """
-Assess Your Stroke Risk
-
-Click below to use our intelligent tool and evaluate your risk level
-
-Learn About Stroke
-
-A stroke happens when the blood supply to part of your brain is interrupted or reduced,
-preventing brain tissue from getting oxygen and nutrients. Early detection can save lives.
+full_page_text = assets.HOME_NARRATION
 
-Types of Stroke:
-- Ischemic: Blockage in brain arteries.
-- Hemorrhagic: Burst blood vessels in the brain.
-- TIA: Temporary blockage (mini-stroke).
-
-Common Causes:
-- High blood pressure
-- Heart disease
-- Diabetes
-- Smoking
-- Obesity and cholesterol
-
-Prevention:
-- Control blood pressure and sugar
-- Exercise regularly
-- Eat a healthy diet
-- Stop smoking
-
-Symptoms:
-- Sudden numbness or weakness (face, arm, leg)
-- Confusion, speech trouble
-- Vision problems
-- Dizziness or balance issues
-
-Recognize a Stroke (FAST):
-- F: Face drooping
-- A: Arm weakness
-- S: Speech difficulty
-- T: Time to call emergency
-
-Stroke Statistics:
-- 2nd leading cause of death globally
-- 12.2 million cases in 2020
-- 5.5 million deaths annually
-"""
-
-# Audio narration
-def generate_audio(text, filename="full_page.mp3"):
-    tts = gTTS(text, lang='en')
-    tts.save(filename)
-    with open(filename, "rb") as f:
-        audio_data = f.read()
-        b64_audio = base64.b64encode(audio_data).decode()
+# Audio narration (rendered once per text and cached; see assets.py)
+def generate_audio(text):
+    b64_audio = assets.narration_audio(text)
     st.markdown("### 🔊 Listen to this page")
     st.markdown(
         f"<audio controls style='width:100%; margin-top:20px;'><source src='data:audio/mp3;base64,{b64_audio}' type='audio/mp3'></audio>",
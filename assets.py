@@ -0,0 +1,73 @@
+# assets.py — cached static assets for the home page (hero images, narration)
+import base64
+import io
+import os
+
+import streamlit as st
+from gtts import gTTS
+
+import stroke_model
+
+HERO_IMAGES = ["strokeprediction.png", "image2.png", "image3.png"]
+
+HOME_NARRATION = """
+Assess Your Stroke Risk
+
+Click below to use our intelligent tool and evaluate your risk level
+
+Learn About Stroke
+
+A stroke happens when the blood supply to part of your brain is interrupted or reduced,
+preventing brain tissue from getting oxygen and nutrients. Early detection can save lives.
+
+Types of Stroke:
+- Ischemic: Blockage in brain arteries.
+- Hemorrhagic: Burst blood vessels in the brain.
+- TIA: Temporary blockage (mini-stroke).
+
+Common Causes:
+- High blood pressure
+- Heart disease
+- Diabetes
+- Smoking
+- Obesity and cholesterol
+
+Prevention:
+- Control blood pressure and sugar
+- Exercise regularly
+- Eat a healthy diet
+- Stop smoking
+
+Symptoms:
+- Sudden numbness or weakness (face, arm, leg)
+- Confusion, speech trouble
+- Vision problems
+- Dizziness or balance issues
+
+Recognize a Stroke (FAST):
+- F: Face drooping
+- A: Arm weakness
+- S: Speech difficulty
+- T: Time to call emergency
+
+Stroke Statistics:
+- 2nd leading cause of death globally
+- 12.2 million cases in 2020
+- 5.5 million deaths annually
+"""
+
+
+@st.cache_data(show_spinner=False)
+def image_data_uri(name):
+    """PNG at `name` (relative to the app root) as a base64 data URI."""
+    with open(os.path.join(stroke_model.BASE_DIR, name), "rb") as img_file:
+        b64_encoded = base64.b64encode(img_file.read()).decode()
+        return f"data:image/png;base64,{b64_encoded}"
+
+
+@st.cache_data(show_spinner=False)
+def narration_audio(text, lang="en"):
+    """gTTS narration of `text` as base64-encoded MP3 (rendered once per text)."""
+    buf = io.BytesIO()
+    gTTS(text, lang=lang).write_to_fp(buf)
+    return base64.b64encode(buf.getvalue()).decode()
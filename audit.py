@@ -0,0 +1,382 @@
+# audit.py — append-only, hash-chained audit log of predictions
+#
+# Every prediction is appended as one line of a segment file under AUDIT_DIR:
+#
+#   <sha256 hex of the previous line> <JSON record>\n
+#
+# where a line's hash covers its bytes up to the newline.  Editing, removing
+# or reordering any line breaks the chain at the line after it.  Verification
+# hashes raw bytes without parsing JSON, and since a line's hash depends only
+# on that line, segments are checked in parallel and stitched together.
+# The chain starts from GENESIS and runs on across segments, which rotate to
+# audit-<n+1>.log once a segment reaches SEGMENT_BYTES.  `verify` prints the
+# record count and the final hash; keeping that head hash elsewhere also makes
+# truncation of the tail detectable.
+#
+# record() only queues the record (up to QUEUE_MAX; beyond that it is dropped
+# and counted).  A dedicated writer thread serialises, chains and appends
+# queued records in groups: one write() and one fsync() per GROUP_RECORDS
+# records or GROUP_MS milliseconds, whichever comes first.  Records that never
+# reach the file are counted as failed, records written but not confirmed by
+# fsync as unsynced; either is reported by /ready until a later group succeeds.
+#
+#   python -m audit verify [--dir data/audit]
+#   python -m audit bench 1000000          # write to a scratch log, then verify it
+import argparse
+import atexit
+import contextlib
+import glob
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+
+import metrics
+import status_server
+
+_LOGGER = logging.getLogger(__name__)
+
+AUDIT_DIR     = os.environ.get("STROKE_AUDIT_DIR", os.path.join(os.path.dirname(__file__), "data", "audit"))
+GROUP_RECORDS = 256
+GROUP_MS      = 50
+SEGMENT_BYTES = 64 << 20
+READ_BUFFER   = 1 << 20
+QUEUE_MAX     = 100_000
+FLUSH_TIMEOUT = 30.0
+GENESIS       = "0" * 64
+
+
+def segment_paths(directory):
+    return sorted(glob.glob(os.path.join(directory, "audit-*.log")))
+
+
+def _segment_name(directory, n):
+    return os.path.join(directory, f"audit-{n:06d}.log")
+
+
+def _line(prev, record):
+    return f"{prev} {json.dumps(record, separators=(',', ':'), sort_keys=True)}".encode()
+
+
+# ── Writer ───────────────────────────────────────────────────────────────────
+class Writer:
+    """The log's single appender, running on its own thread.
+
+    A group that cannot be written (disk full, permissions, a damaged tail) is
+    logged and counted, the segment is reopened from what is on disk, and the
+    writer goes on with the next group; while the latest group failed, the
+    status server's /ready reports the problem.  If the queue is full a record
+    is dropped and counted rather than stalling the request.
+    """
+
+    def __init__(self, directory=None):
+        self.dir     = directory or AUDIT_DIR
+        self.queue   = queue.Queue(QUEUE_MAX)
+        self.written = 0
+        self.groups  = 0
+        self.dropped = 0
+        self.failed  = 0            # records that never reached the file
+        self.unsynced = 0           # records written whose fsync failed
+        self.error   = None         # the latest group's error, cleared by the next good group
+        self.fsync_seconds = 0.0
+        self._pending = 0
+        self._idle   = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def put(self, record):
+        with self._idle:
+            try:
+                self.queue.put_nowait(record)
+            except queue.Full:
+                self.dropped += 1
+                _LOGGER.warning("audit queue full; prediction not logged")
+                return
+            self._pending += 1
+
+    def flush(self, timeout=FLUSH_TIMEOUT):
+        """Wait until every queued record has been handled; False if that took longer than timeout."""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def close(self):
+        try:
+            self.queue.put(None, timeout=FLUSH_TIMEOUT)
+        except queue.Full:
+            _LOGGER.error("audit writer did not drain its queue; %d record(s) not logged", self._pending)
+        self._thread.join(timeout=10)
+
+    def problem(self):
+        if not self._thread.is_alive():
+            return "audit writer stopped"
+        return f"audit log not writable: {self.error}" if self.error else None
+
+    def _open(self):
+        """Open the newest segment for appending; returns (file, previous hash, next seq)."""
+        os.makedirs(self.dir, exist_ok=True)
+        segments = segment_paths(self.dir)
+        if not segments:
+            return open(_segment_name(self.dir, 1), "ab"), GENESIS, 0
+        path = segments[-1]
+        with open(path, "rb+") as f:
+            size = f.seek(0, os.SEEK_END)
+            f.seek(max(0, size - READ_BUFFER))
+            tail = f.read()
+            if tail and not tail.endswith(b"\n"):
+                # a group torn by a crash was never acknowledged: drop the partial line
+                keep = size - len(tail) + tail.rfind(b"\n") + 1
+                _LOGGER.warning("audit: truncating a partial record at the end of %s", path)
+                f.truncate(keep)
+                tail = tail[:tail.rfind(b"\n") + 1]
+        last = tail.rsplit(b"\n", 2)[-2] if tail.count(b"\n") else None
+        if last is None:            # empty segment: continue from the previous one
+            prev, seq = verify(self.dir, segments[:-1])[1:3] if len(segments) > 1 else (GENESIS, 0)
+            return open(path, "ab"), prev, seq
+        seq = json.loads(last[65:])["seq"] + 1
+        return open(path, "ab"), hashlib.sha256(last).hexdigest(), seq
+
+    def _append(self, f, prev, seq, records):
+        """Chain and append one group; returns the new (prev, seq) once it is on disk.
+
+        Does its own counting: a record that cannot be serialised is failed and
+        skipped, a failed write counts the lines that did not reach the file as
+        failed, and a failed fsync counts the written lines as unsynced.
+        """
+        lines = []
+        for record in records:
+            record["seq"] = seq
+            try:
+                line = _line(prev, record)
+            except (TypeError, ValueError) as exc:
+                self.failed += 1
+                _LOGGER.error("audit: dropping a record that cannot be serialised: %s", exc)
+                continue
+            prev, seq = hashlib.sha256(line).hexdigest(), seq + 1
+            lines.append(line)
+        if not lines:
+            return prev, seq
+        try:
+            f.write(b"\n".join(lines) + b"\n")
+            f.flush()
+        except Exception:
+            reached = self._reached(f, seq - len(lines), len(lines))
+            self.written += reached
+            self.failed  += len(lines) - reached
+            raise
+        self.written += len(lines)
+        start = time.perf_counter()
+        try:
+            os.fsync(f.fileno())
+        except Exception:
+            self.unsynced += len(lines)
+            raise
+        self.fsync_seconds += time.perf_counter() - start
+        return prev, seq
+
+    def _reached(self, f, first, n):
+        """How many of the n lines from seq `first` are in the log after a failed write."""
+        with contextlib.suppress(OSError):
+            f.close()               # may still flush what the failed write left buffered
+        try:
+            reopened, _, next_seq = self._open()
+            reopened.close()
+        except Exception:
+            return 0
+        return min(max(next_seq - first, 0), n)
+
+    def _run(self):
+        f = None
+        while True:
+            group = [self.queue.get()]
+            deadline = time.monotonic() + GROUP_MS / 1000
+            while group[-1] is not None and len(group) < GROUP_RECORDS:
+                try:
+                    group.append(self.queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            records = [r for r in group if r is not None]
+            if records:
+                unwritten = len(records)        # until _append() takes over the counting
+                try:
+                    if f is None:
+                        f, prev, seq = self._open()
+                        segment = int(os.path.basename(f.name)[6:12])
+                    unwritten = 0
+                    prev, seq = self._append(f, prev, seq, records)
+                    self.groups += 1
+                    self.error = None
+                    if f.tell() >= SEGMENT_BYTES:
+                        f.close()
+                        segment += 1
+                        f = open(_segment_name(self.dir, segment), "ab")
+                except Exception as exc:
+                    # whatever reached the file is picked up again by _open()
+                    self.failed += unwritten
+                    self.error = f"{type(exc).__name__}: {exc}"
+                    _LOGGER.exception("audit: failed to append %d record(s)", len(records))
+                    if f is not None:
+                        with contextlib.suppress(OSError):
+                            f.close()
+                    f = None
+            with self._idle:
+                self._pending -= len(records)
+                self._idle.notify_all()
+            if group[-1] is None:
+                if f is not None:
+                    f.close()
+                return
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = Writer()
+            atexit.register(_writer.close)
+        return _writer
+
+
+def record(inputs, encoded, model_sha, probability, ts=None):
+    """Queue one prediction for the audit log; returns immediately."""
+    writer().put({"ts": ts or time.time(), "inputs": inputs, "encoded": [float(v) for v in encoded],
+                  "model_sha": model_sha, "probability": float(probability)})
+
+
+# ── Verification ─────────────────────────────────────────────────────────────
+def _verify_segment(path):
+    """(first line's prev hash, last line's hash, records, bytes, problem) for one segment.
+
+    A line's hash depends only on its own bytes, so segments are checked
+    independently and verify() stitches them together.
+    """
+    first, last, records, size, rest = None, None, 0, 0, b""
+    with open(path, "rb", buffering=0) as f:
+        while block := f.read(READ_BUFFER):
+            lines = (rest + block).split(b"\n")
+            rest = lines.pop()
+            if not lines:
+                continue
+            hashes = [hashlib.sha256(line).hexdigest().encode() for line in lines]
+            prefixes = [line[:64] for line in lines]
+            expected = ([last] if last is not None else []) + hashes[:-1]
+            got = prefixes if last is not None else prefixes[1:]
+            if got != expected:
+                bad = next(i for i, (a, b) in enumerate(zip(got, expected)) if a != b)
+                lineno = records + bad + (1 if last is not None else 2)
+                return first, last, records, size, f"{os.path.basename(path)}:{lineno} does not chain"
+            if first is None:
+                first = prefixes[0]
+            last = hashes[-1]
+            records += len(lines)
+            size += sum(map(len, lines)) + len(lines)
+    if rest:
+        return first, last, records, size, f"{os.path.basename(path)}:{records + 1} is incomplete"
+    return first, last, records, size, None
+
+
+def verify(directory=None, segments=None, workers=None):
+    """(ok, last hash, records, bytes, problem) after checking the chain over every segment."""
+    segments = segments if segments is not None else segment_paths(directory or AUDIT_DIR)
+    workers = min(workers or os.cpu_count() or 1, len(segments))
+    if workers > 1:
+        with multiprocessing.Pool(workers) as pool:
+            results = pool.map(_verify_segment, segments, chunksize=1)
+    else:
+        results = map(_verify_segment, segments)
+    prev, records, size = GENESIS.encode(), 0, 0
+    for path, (first, last, n, nbytes, problem) in zip(segments, results):
+        if problem:
+            return False, prev.decode(), records, size, problem
+        if first is None:
+            continue                       # empty segment
+        if first != prev:
+            return False, prev.decode(), records, size, f"{os.path.basename(path)}:1 does not chain"
+        prev, records, size = last, records + n, size + nbytes
+    return True, prev.decode(), records, size, None
+
+
+# ── Metrics ──────────────────────────────────────────────────────────────────
+metrics.describe("stroke_audit_records_total", "counter", "Predictions appended to the audit log.")
+metrics.describe("stroke_audit_groups_total", "counter", "Group commits (one write and fsync each) to the audit log.")
+metrics.describe("stroke_audit_queue_depth", "gauge", "Predictions waiting for the audit writer.")
+metrics.describe("stroke_audit_fsync_seconds_total", "counter", "Time spent in fsync by the audit writer.")
+metrics.describe("stroke_audit_dropped_total", "counter", "Predictions dropped because the audit queue was full.")
+metrics.describe("stroke_audit_failed_total", "counter", "Predictions that never reached the audit log.")
+metrics.describe("stroke_audit_unsynced_total", "counter", "Predictions written to the audit log whose fsync failed.")
+
+
+@metrics.provider
+def audit_metrics():
+    if _writer is None:
+        return
+    yield metrics.Sample("stroke_audit_records_total", _writer.written)
+    yield metrics.Sample("stroke_audit_groups_total", _writer.groups)
+    yield metrics.Sample("stroke_audit_queue_depth", _writer._pending)
+    yield metrics.Sample("stroke_audit_fsync_seconds_total", _writer.fsync_seconds)
+    yield metrics.Sample("stroke_audit_dropped_total", _writer.dropped)
+    yield metrics.Sample("stroke_audit_failed_total", _writer.failed)
+    yield metrics.Sample("stroke_audit_unsynced_total", _writer.unsynced)
+
+
+@status_server.check
+def audit_check():
+    return None if _writer is None else _writer.problem()
+
+
+# ── CLI ──────────────────────────────────────────────────────────────────────
+def _verify_cli(directory):
+    start = time.perf_counter()
+    ok, head, records, size, problem = verify(directory)
+    seconds = time.perf_counter() - start
+    print(f"{records:,} records, {size / 2**20:,.1f} MB in {len(segment_paths(directory))} segment(s), "
+          f"checked in {seconds:.2f} s ({size / 2**20 / max(seconds, 1e-9):,.0f} MB/s)")
+    if not ok:
+        print(f"BROKEN: {problem}")
+        return 1
+    print(f"chain intact; head {head}")
+    return 0
+
+
+def _bench(n):
+    global SEGMENT_BYTES
+    SEGMENT_BYTES = 16 << 20
+    form = {"age": 67, "avg_glucose_level": 228.69, "heart_disease": "Yes", "hypertension": "No",
+            "ever_married": "Yes", "smoking_status": "formerly smoked", "work_type": "Private", "gender": "Male"}
+    encoded = [67.0, 228.69, 1.0, 0.0, 1.0, 1.0, 0.0, 0.0]
+    with tempfile.TemporaryDirectory(prefix="stroke-audit-") as tmp:
+        w = Writer(tmp)
+        start = time.perf_counter()
+        for i in range(n):
+            while w.queue.qsize() >= QUEUE_MAX - 1:
+                time.sleep(0.001)     # the benchmark waits; pages never do
+            w.put({"ts": 1e9 + i, "inputs": form, "encoded": encoded, "model_sha": "0" * 64, "probability": 1e-6})
+        queued = time.perf_counter() - start
+        w.flush(timeout=None)
+        total = time.perf_counter() - start
+        print(f"{n:,} records: queued in {queued / n * 1e6:.2f} µs each, on disk after {total:.2f} s "
+              f"({n / total:,.0f} records/s, {w.groups:,} group commits, fsync {w.fsync_seconds:.2f} s)")
+        w.close()
+        return _verify_cli(tmp)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verify or benchmark the prediction audit log.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("verify", help="check the hash chain").add_argument("--dir", default=AUDIT_DIR)
+    sub.add_parser("bench", help="write and verify a scratch log").add_argument("records", type=int)
+    args = parser.parse_args(argv)
+    return _verify_cli(args.dir) if args.command == "verify" else _bench(args.records)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,277 @@
+# batch_score.py — constant-memory scoring of patient CSV files of any size
+#
+# The input is read CHUNK_ROWS lines at a time; each block is parsed, checked
+# against the assessment form's domain, encoded with the stroke_model maps,
+# transformed (add_poly + scaling) and scored in one batched call, then
+# appended to the output before the next block is read.  Rows that cannot be
+# scored (unknown category, age or glucose outside the form's range, missing
+# or malformed fields) go to a reject file with a reason, and the stream goes on.
+#
+# Output rows keep the input columns and add stroke_risk, risk_band and the
+# stability band from uncertainty.py (risk_low, risk_high).  With --cascade
+# the linear screener of cascade.py scores rows far from the band thresholds
+# and only the rest reach the boosting model; a scored_by column says which
+# tier scored each row and the summary counts the escalations.  Input files must
+# hold one record per line (no quoted newlines), which is what lets
+# parallel_score.py split them into byte ranges.
+#
+#   python -m batch_score patients.csv [-o scored.csv] [--rejects rejects.csv] [--cascade]
+import argparse
+import csv
+import io
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import cascade
+import stroke_model
+import uncertainty
+
+CHUNK_ROWS = 50_000
+REQUIRED   = ["gender", "age", "hypertension", "heart_disease", "ever_married",
+              "work_type", "avg_glucose_level", "smoking_status"]
+FLAG_VALUES = {"1": 1, "0": 0, "1.0": 1, "0.0": 0, "Yes": 1, "No": 0}
+OUTPUT_COLUMNS = ["stroke_risk", "risk_band", "risk_low", "risk_high"]
+CASCADE_COLUMN = "scored_by"
+
+
+# ── Reading ──────────────────────────────────────────────────────────────────
+def read_header(path):
+    with open(path, "rb") as f:
+        return f.readline().decode("utf-8-sig").rstrip("\r\n")
+
+
+def read_blocks(path, chunk_rows=CHUNK_ROWS, start=0, end=None):
+    """Blocks of at most chunk_rows raw data lines (bytes) from the byte range [start, end).
+
+    A range owns the lines that begin inside it, so consecutive ranges cover
+    every line exactly once wherever their boundaries fall.
+    """
+    with open(path, "rb") as f:
+        if start == 0:
+            f.readline()                  # header
+        else:
+            f.seek(start - 1)
+            f.readline()                  # finish the line that started before the range
+        block = []
+        while end is None or f.tell() < end:
+            line = f.readline()
+            if not line:
+                break
+            if line.strip():
+                block.append(line)
+            if len(block) >= chunk_rows:
+                yield block
+                block = []
+        if block:
+            yield block
+
+
+def _decode_lines(lines):
+    """(decoded lines, undecodable lines shown with replacement characters)."""
+    try:
+        return [line.decode("utf-8") for line in lines], []
+    except UnicodeDecodeError:
+        text, bad = [], []
+        for line in lines:
+            try:
+                text.append(line.decode("utf-8"))
+            except UnicodeDecodeError:
+                bad.append("not UTF-8: " + line.decode("utf-8", "replace").rstrip("\r\n"))
+        return text, bad
+
+
+def parse_block(header, lines):
+    """(frame of strings, malformed lines) for one block of raw lines.
+
+    Every input line ends up either as a frame row or as a malformed line, so
+    a bad byte, a stray quote or a wrong field count only costs that line.
+    """
+    columns = next(csv.reader([header]))
+    text, bad = _decode_lines(lines)
+    try:
+        frame = pd.read_csv(io.StringIO("".join(text)), header=None, names=columns, dtype=str,
+                            keep_default_na=False, na_filter=False)
+        if len(frame) == len(text):
+            return frame, bad
+    except pd.errors.ParserError:
+        pass
+    # a line with too many fields, or a quote that ran into the following lines:
+    # split this block line by line instead
+    rows = []
+    for line in text:
+        fields = next(csv.reader([line]), [])
+        if len(fields) == len(columns):
+            rows.append(fields)
+        else:
+            bad.append(line.rstrip("\r\n"))
+    return pd.DataFrame(rows, columns=columns, dtype=str), bad
+
+
+# ── Validation and encoding ──────────────────────────────────────────────────
+def prepare(frame):
+    """(X_raw for the valid rows, valid mask, reject reason per row)."""
+    n = len(frame)
+    missing = [col for col in REQUIRED if col not in frame.columns]
+    if missing:
+        return np.empty((0, len(stroke_model.FEATURES))), np.zeros(n, bool), \
+            np.full(n, f"missing column(s): {', '.join(missing)}", dtype=object)
+
+    age = pd.to_numeric(frame["age"], errors="coerce").to_numpy(dtype=float)
+    glu = pd.to_numeric(frame["avg_glucose_level"], errors="coerce").to_numpy(dtype=float)
+    encoded = {
+        "heart_disease": frame["heart_disease"].map(FLAG_VALUES),
+        "hypertension": frame["hypertension"].map(FLAG_VALUES),
+        "ever_married": frame["ever_married"].map(stroke_model.MARRIED_MAP),
+        "smoking_status": frame["smoking_status"].map(stroke_model.SMOKE_MAP),
+        "work_type": frame["work_type"].map(stroke_model.WORK_MAP),
+        "gender": frame["gender"].map(stroke_model.GENDER_MAP),
+    }
+    encoded = {col: values.to_numpy(dtype=float) for col, values in encoded.items()}
+
+    checks = [(frame[col].fillna("").str.strip().to_numpy() == "", f"{col}: missing") for col in REQUIRED] + [
+        (np.isnan(age), "age: not a number"),
+        ((age < stroke_model.AGE_RANGE[0]) | (age > stroke_model.AGE_RANGE[1]),
+         f"age: outside {stroke_model.AGE_RANGE[0]}-{stroke_model.AGE_RANGE[1]}"),
+        (np.isnan(glu), "avg_glucose_level: not a number"),
+        ((glu < stroke_model.GLUCOSE_RANGE[0]) | (glu > stroke_model.GLUCOSE_RANGE[1]),
+         f"avg_glucose_level: outside {stroke_model.GLUCOSE_RANGE[0]:g}-{stroke_model.GLUCOSE_RANGE[1]:g}"),
+    ] + [(np.isnan(values), f"{col}: unknown value") for col, values in encoded.items()]
+    conditions = [mask for mask, _ in checks]
+    reasons = np.select(conditions, [reason for _, reason in checks], default="")
+    valid = ~np.logical_or.reduce(conditions)
+
+    X_raw = np.column_stack([age, glu] + [encoded[col] for col in stroke_model.FEATURES[2:]])
+    return X_raw[valid], valid, reasons.astype(object)
+
+
+# ── Scoring ──────────────────────────────────────────────────────────────────
+def _added_columns(band, cascade):
+    return (OUTPUT_COLUMNS if band else OUTPUT_COLUMNS[:2]) + ([CASCADE_COLUMN] if cascade else [])
+
+
+def output_columns(header, band=True, cascade=False):
+    return next(csv.reader([header])) + _added_columns(band, cascade)
+
+
+def reject_columns(header):
+    return next(csv.reader([header])) + ["reject_reason"]
+
+
+def score_frame(model, frame, leaf_table=None, screener=None):
+    """(scored rows, rejected rows) for one parsed block.
+
+    With a cascade.Screener, rows far from the band thresholds are scored by
+    the screener and the rest by the model (see scored_by).
+    """
+    X_raw, valid, reasons = prepare(frame)
+    scored = frame[valid].copy()
+    if len(X_raw):
+        if screener is None:
+            probs = stroke_model.predict_proba(model, X_raw)
+        else:
+            probs, escalated = cascade.probabilities(model, screener, X_raw)
+            scored[CASCADE_COLUMN] = np.where(escalated, "model", "screener")
+        scored["stroke_risk"] = probs
+        scored["risk_band"] = stroke_model.risk_bands(probs)
+        if leaf_table is not None:
+            for col, values in uncertainty.export_columns(leaf_table, X_raw).items():
+                scored[col] = values
+    else:
+        # nothing scorable in this block: still hand back the output columns
+        added = _added_columns(leaf_table is not None, screener is not None)
+        scored = scored.reindex(columns=[*frame.columns, *added])
+    rejected = frame[~valid].copy()
+    rejected["reject_reason"] = reasons[~valid]
+    return scored, rejected
+
+
+def score_blocks(model, header, blocks, out, rejects, leaf_table=None, write_header=True, on_block=None,
+                 score=None, columns=None, screener=None):
+    """Score an iterator of raw line blocks into open text files; returns counts.
+
+    on_block(scored, rejected, stats), if given, runs after each block is written.
+    score(frame) -> (scored, rejected) and its output columns replace
+    score_frame() for callers that add other columns (jobqueue's SHAP jobs).
+    With a screener the counts include the rows escalated to the model.
+    """
+    stats = {"rows": 0, "scored": 0, "rejected": 0, **({"escalated": 0} if screener is not None else {})}
+    out_columns = columns or output_columns(header, leaf_table is not None, screener is not None)
+    score = score or (lambda frame: score_frame(model, frame, leaf_table, screener))
+    n_inputs = len(reject_columns(header)) - 1
+    reject_writer = csv.writer(rejects, lineterminator="\n")
+    if write_header:
+        csv.writer(out, lineterminator="\n").writerow(out_columns)
+        reject_writer.writerow(reject_columns(header))
+    for lines in blocks:
+        frame, malformed = parse_block(header, lines)
+        scored, rejected = score(frame)
+        scored.reindex(columns=out_columns).to_csv(out, header=False, index=False, float_format="%.6g")
+        rejected.to_csv(rejects, header=False, index=False)
+        for line in malformed:
+            reject_writer.writerow([""] * n_inputs + [f"malformed row: {line}"])
+        stats["rows"] += len(frame) + len(malformed)
+        stats["scored"] += len(scored)
+        stats["rejected"] += len(rejected) + len(malformed)
+        if screener is not None:
+            stats["escalated"] += int((scored[CASCADE_COLUMN] == "model").sum())
+        if on_block is not None:
+            on_block(scored, rejected, stats)
+    return stats
+
+
+def score_file(in_path, out_path, reject_path, chunk_rows=CHUNK_ROWS, band=True, model=None, cascade=False):
+    """Stream in_path through the model into out_path and reject_path; returns stats."""
+    model = model if model is not None else stroke_model.load_model()
+    leaf_table = uncertainty.LeafTable(model) if band else None
+    screener = load_screener() if cascade else None
+    header = read_header(in_path)
+    start = time.perf_counter()
+    with open(out_path, "w", newline="") as out, open(reject_path, "w", newline="") as rejects:
+        stats = score_blocks(model, header, read_blocks(in_path, chunk_rows), out, rejects, leaf_table,
+                             screener=screener)
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+def load_screener():
+    """The cascade screener fitted to the current model file (fitted on first use)."""
+    return cascade.load_screener(stroke_model.model_hash())
+
+
+def summary(stats):
+    """' (n escalated to the model, x%)' for cascade runs, else ''."""
+    if "escalated" not in stats:
+        return ""
+    return f", {stats['escalated']:,} escalated to the model ({stats['escalated'] / max(stats['scored'], 1):.1%})"
+
+
+def default_paths(in_path):
+    stem, _ = os.path.splitext(in_path)
+    return f"{stem}.scored.csv", f"{stem}.rejects.csv"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a patient CSV in constant memory.")
+    parser.add_argument("input")
+    parser.add_argument("-o", "--output", help="scored rows (default: <input>.scored.csv)")
+    parser.add_argument("--rejects", help="rows that could not be scored (default: <input>.rejects.csv)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--no-band", action="store_true", help="skip the risk_low/risk_high columns")
+    parser.add_argument("--cascade", action="store_true",
+                        help="score with the cascade screener, escalating only rows near a band threshold")
+    args = parser.parse_args(argv)
+
+    out_path, reject_path = default_paths(args.input)
+    stats = score_file(args.input, args.output or out_path, args.rejects or reject_path,
+                       args.chunk_rows, band=not args.no_band, cascade=args.cascade)
+    print(f"{stats['rows']:,} rows: {stats['scored']:,} scored -> {args.output or out_path}"
+          f"{summary(stats)}, {stats['rejected']:,} rejected -> {args.rejects or reject_path} "
+          f"({stats['rows'] / stats['seconds']:,.0f} rows/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
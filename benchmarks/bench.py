@@ -0,0 +1,269 @@
+# benchmarks/bench.py — model, explainer and page-script benchmarks
+#
+#   python -m benchmarks.bench                      # run, write benchmarks/results/latest.json
+#   python -m benchmarks.bench --save-baseline      # also store as benchmarks/baseline.json
+#   python -m benchmarks.bench --only predict shap  # substring filter on benchmark names
+#
+# When a baseline exists the run is compared against it and the command exits
+# non-zero if any benchmark's median is more than --tolerance slower.
+# A benchmark that raises (a page run ending in an exception included) is
+# reported as failed, not timed, and also makes the command exit non-zero.
+import argparse
+import functools
+import os
+import sys
+import tempfile
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+import shap
+
+import audit
+import cascade
+import counterfactuals
+import dataset
+import drift
+import heatmap
+import history
+import neighbours
+import pdp
+import population
+import stroke_model
+import trajectory
+import uncertainty
+import whatif
+from benchmarks.harness import compare, failures, load_results, run_suite, save_results
+
+HERE             = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUT      = os.path.join(HERE, "results", "latest.json")
+DEFAULT_BASELINE = os.path.join(HERE, "baseline.json")
+APP_PATH         = os.path.join(stroke_model.BASE_DIR, "app.py")
+
+SAMPLE_USER = {
+    "age": 67,
+    "avg_glucose_level": 228.69,
+    "heart_disease": "Yes",
+    "hypertension": "No",
+    "ever_married": "Yes",
+    "smoking_status": "formerly smoked",
+    "work_type": "Private",
+    "gender": "Male",
+}
+
+
+# ── Model and explainer ──────────────────────────────────────────────────────
+class _Fixtures:
+    """Benchmark inputs, each built on first access, so `--only` pays for what it runs."""
+
+    model      = functools.cached_property(lambda self: stroke_model.load_model())
+    explainer  = functools.cached_property(lambda self: shap.TreeExplainer(self.model))
+    one        = functools.cached_property(lambda self: np.array([stroke_model.encode(SAMPLE_USER)], dtype=float))
+    one_scaled = functools.cached_property(lambda self: stroke_model.transform(self.one))
+    rows_1k    = functools.cached_property(lambda self: stroke_model.random_raw(1_000, seed=1))
+    rows_10k   = functools.cached_property(lambda self: stroke_model.random_raw(10_000, seed=2))
+    shap_rows  = functools.cached_property(lambda self: stroke_model.transform(stroke_model.random_raw(200, seed=3)))
+    pop_index  = functools.cached_property(lambda self: population.load_index())
+    nn_index   = functools.cached_property(lambda self: neighbours.load_index())
+    grids      = functools.cached_property(lambda self: heatmap.load_grids())
+    leaves     = functools.cached_property(lambda self: uncertainty.LeafTable(self.model))
+    reference  = functools.cached_property(lambda self: pdp.reference_rows())
+    screener   = functools.cached_property(lambda self: cascade.load_screener())
+
+
+def model_benchmarks():
+    fx = _Fixtures()
+
+    def uses(*names, **overrides):
+        """Overrides that build the named fixtures before the benchmark is timed."""
+        return {"setup": lambda: [getattr(fx, name) for name in names], **overrides}
+
+    return [
+        ("dataset_read_csv",      lambda: pd.read_csv(stroke_model.DATASET_PATH), {}),
+        ("dataset_load_cached",   lambda: dataset.load(), {}),
+        ("joblib_load_model",     lambda: joblib.load(stroke_model.MODEL_PATH), {}),
+        ("tree_explainer_init",   lambda: shap.TreeExplainer(fx.model), uses("model")),
+        ("predict_proba_1_row",   lambda: stroke_model.predict_proba(fx.model, fx.one), uses("model", "one", repeat=50)),
+        ("predict_proba_1k_rows", lambda: stroke_model.predict_proba(fx.model, fx.rows_1k), uses("model", "rows_1k")),
+        ("predict_proba_10k_rows", lambda: stroke_model.predict_proba(fx.model, fx.rows_10k),
+         uses("model", "rows_10k")),
+        ("cascade_score_10k_rows", lambda: cascade.score(fx.model, fx.screener, fx.rows_10k),
+         uses("model", "screener", "rows_10k")),
+        ("shap_values_1_row",     lambda: fx.explainer.shap_values(fx.one_scaled),
+         uses("explainer", "one_scaled", repeat=20)),
+        ("shap_values_200_rows",  lambda: fx.explainer.shap_values(fx.shap_rows), uses("explainer", "shap_rows")),
+        ("population_percentile", lambda: population.placement(fx.pop_index, 0.05, 67, "Male"),
+         uses("pop_index", repeat=50)),
+        ("whatif_sweep_200",      lambda: whatif.sweep(fx.model, fx.one[0], "avg_glucose_level"),
+         uses("model", "one", repeat=20)),
+        ("heatmap_grid_1_profile", lambda: heatmap.grid(fx.model, heatmap.profile_key(fx.one[0])),
+         uses("model", "one")),
+        ("heatmap_prebuilt_lookup", lambda: np.asarray(heatmap.profile_grid(fx.grids, fx.one[0])),
+         uses("grids", "one", repeat=50)),
+        ("counterfactuals_1_profile", lambda: counterfactuals.recommend(fx.model, fx.one[0]),
+         uses("model", "one", repeat=20)),
+        ("trajectory_20_years",   lambda: trajectory.project(fx.model, fx.one[0]), uses("model", "one", repeat=20)),
+        ("uncertainty_band_1_row", lambda: uncertainty.band(fx.leaves, fx.one), uses("leaves", "one", repeat=20)),
+        ("uncertainty_band_1k_rows", lambda: uncertainty.band(fx.leaves, fx.rows_1k), uses("leaves", "rows_1k")),
+        ("staged_predict_proba_1k_rows",
+         lambda: list(fx.model.staged_predict_proba(stroke_model.transform(fx.rows_1k))), uses("model", "rows_1k")),
+        ("pdp_recursion_smoking", lambda: pdp.recursion(fx.model, fx.reference, "smoking_status"),
+         uses("model", "reference")),
+        ("pdp_brute_smoking",     lambda: pdp.brute_force(fx.model, fx.reference, "smoking_status"),
+         uses("model", "reference")),
+        ("pdp_brute_age",         lambda: pdp.brute_force(fx.model, fx.reference, "age"),
+         uses("model", "reference", repeat=3)),
+        ("neighbour_rate_1_row",  lambda: neighbours.neighbour_rate(fx.nn_index, fx.one),
+         uses("nn_index", "one", repeat=50)),
+    ]
+
+
+# ── Headless page runs via AppTest ───────────────────────────────────────────
+def _app(page=None, session=None):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_PATH, default_timeout=120)
+    for key, value in (session or {}).items():
+        at.session_state[key] = value
+    if page:
+        at.switch_page(page)
+    return at
+
+
+def _checked(at):
+    """at, after failing the benchmark if its last run raised (a failed page is not timed)."""
+    if at.exception:
+        raise RuntimeError(f"page raised: {at.exception[0].message}")
+    return at
+
+
+def fill_assessment(at, user):
+    """Fill every field of the Risk Assessment form and submit it."""
+    at.number_input(key="age").set_value(int(user["age"]))
+    at.selectbox(key="gender").select(user["gender"])
+    at.selectbox(key="ever_married").select(user["ever_married"])
+    at.selectbox(key="work_type").select(user["work_type"])
+    at.radio(key="hypertension").set_value(user["hypertension"])
+    at.radio(key="heart_disease").set_value(user["heart_disease"])
+    at.number_input(key="avg_glucose_level").set_value(float(user["avg_glucose_level"]))
+    at.selectbox(key="smoking_status").select(user["smoking_status"])
+    at.checkbox(key="consent").check()
+    return at.button[0].click().run()
+
+
+class ScratchStores:
+    """A scratch history database, audit log and drift summary for the page runs.
+
+    open() swaps them in for the real ones on first use; close() closes their
+    writers, puts the real ones back and deletes the scratch directory.
+    """
+
+    def __init__(self):
+        self._dir   = None
+        self._saved = None
+
+    def open(self):
+        if self._dir is not None:
+            return
+        self._dir   = tempfile.TemporaryDirectory(prefix="stroke-bench-")
+        self._saved = (history.DB_PATH, audit.AUDIT_DIR, drift.MONITOR)
+        self._close_writers()
+        history.DB_PATH = os.path.join(self._dir.name, "history.sqlite3")
+        audit.AUDIT_DIR = os.path.join(self._dir.name, "audit")
+        drift.MONITOR   = drift.Monitor(os.path.join(self._dir.name, "drift.json"))
+        # scheduled evaluations would land in the timed runs (and outlive the directory)
+        drift.MONITOR.start(interval=365 * 86400)
+
+    def close(self):
+        if self._dir is None:
+            return
+        self._close_writers()
+        history.DB_PATH, audit.AUDIT_DIR, drift.MONITOR = self._saved
+        self._dir.cleanup()
+        self._dir = None
+
+    @staticmethod
+    def _close_writers():
+        """Close the history and audit writers so the next record opens one on the current paths."""
+        for module in (history, audit):
+            with module._writer_lock:
+                if module._writer is not None:
+                    module._writer.close()
+                    module._writer = None
+
+
+def page_benchmarks(stores):
+    @functools.cache
+    def session():
+        model = stroke_model.load_model()
+        prob  = float(stroke_model.predict_proba(model, [stroke_model.encode(SAMPLE_USER)])[0])
+        return {"user_data": SAMPLE_USER, "prediction_prob": prob}
+
+    def page(path=None, with_session=False):
+        return lambda: _checked(_app(path, session() if with_session else None).run())
+
+    def submit_assessment():
+        _checked(fill_assessment(_checked(_app("pages/Risk_Assessment.py").run()), SAMPLE_USER))
+
+    # every page run reads and writes the scratch stores, never the real ones
+    opts = {"setup": lambda: (stores.open(), session()), "repeat": 5}
+    return [
+        # app.py narrates via gTTS, so this includes a network round trip when online
+        ("page_home",            page(), opts),
+        ("page_risk_assessment", page("pages/Risk_Assessment.py"), opts),
+        ("page_assessment_submit", submit_assessment, opts),
+        ("page_results",         page("pages/Results.py", True), opts),
+        ("page_risk_factor_analysis", page("pages/Risk_Factor_Analysis.py", True), {**opts, "repeat": 3}),
+        ("page_recommendations", page("pages/Recommendations.py", True), opts),
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the stroke app benchmark suite.")
+    parser.add_argument("--out", default=DEFAULT_OUT, help="where to write this run's JSON")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed median slowdown (0.25 = 25%%)")
+    parser.add_argument("--only", nargs="*", help="run only benchmarks whose name contains one of these")
+    parser.add_argument("--warmup", type=int, help="untimed runs per benchmark (default: its own, else 2)")
+    parser.add_argument("--repeat", type=int, help="timed runs per benchmark (default: its own, else 10)")
+    parser.add_argument("--skip-pages", action="store_true", help="skip the AppTest page runs")
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+    os.chdir(stroke_model.BASE_DIR)  # pages read assets relative to the app root
+
+    stores = ScratchStores()
+    benchmarks = model_benchmarks()
+    if not args.skip_pages:
+        benchmarks += page_benchmarks(stores)
+    try:
+        results = run_suite(benchmarks, only=args.only, warmup=args.warmup, repeat=args.repeat)
+    finally:
+        stores.close()
+
+    save_results(results, args.out)
+    print(f"\nresults written to {args.out}")
+    failed = failures(results)
+    for name, error in failed:
+        print(f"FAILED {name}: {error}")
+    if failed:
+        return 1
+    if args.save_baseline:
+        save_results(results, args.baseline)
+        print(f"baseline written to {args.baseline}")
+        return 0
+
+    if os.path.exists(args.baseline):
+        regressions = compare(results, load_results(args.baseline), args.tolerance)
+        for name, base, now, ratio in regressions:
+            print(f"REGRESSION {name}: {base * 1000:.3f} ms -> {now * 1000:.3f} ms ({ratio:.2f}x)")
+        if regressions:
+            return 1
+        print(f"no regressions beyond {args.tolerance:.0%} of {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
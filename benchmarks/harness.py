@@ -0,0 +1,95 @@
+# benchmarks/harness.py — timing, JSON results and baseline comparison
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+
+def measure(fn, warmup=2, repeat=10):
+    """Run fn `warmup` times untimed, then `repeat` times; return timing stats (seconds)."""
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return {
+        "warmup": warmup,
+        "repeat": repeat,
+        "min": times[0],
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times),
+        "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "p95": times[min(len(times) - 1, int(round(0.95 * (len(times) - 1))))],
+        "max": times[-1],
+    }
+
+
+def run_suite(benchmarks, only=None, warmup=None, repeat=None):
+    """benchmarks: list of (name, fn, overrides) tuples; overrides may set warmup/repeat,
+    and setup, a callable run once, untimed, before the benchmark's warm-up.
+
+    warmup and repeat, when given, win over every benchmark's own.  A benchmark
+    that raises is recorded as {"error": message} and the suite goes on.
+    """
+    results = {}
+    for name, fn, overrides in benchmarks:
+        if only and not any(key in name for key in only):
+            continue
+        opts = {"warmup": 2, "repeat": 10, **overrides}
+        opts.update({key: value for key, value in (("warmup", warmup), ("repeat", repeat)) if value is not None})
+        setup = opts.pop("setup", None)
+        try:
+            if setup is not None:
+                setup()
+            stats = measure(fn, **opts)
+        except Exception as exc:
+            results[name] = {"error": f"{type(exc).__name__}: {exc}"}
+            print(f"{name:<40} FAILED {results[name]['error']}", flush=True)
+            continue
+        results[name] = stats
+        print(f"{name:<40} median {stats['median'] * 1000:10.3f} ms   "
+              f"p95 {stats['p95'] * 1000:10.3f} ms   (n={stats['repeat']})", flush=True)
+    return results
+
+
+def failures(results):
+    """(name, error) for the benchmarks of a run that raised."""
+    return [(name, stats["error"]) for name, stats in results.items() if "error" in stats]
+
+
+def save_results(results, path):
+    payload = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=2, sort_keys=True)
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def compare(results, baseline, tolerance=0.25):
+    """Benchmarks whose median is more than `tolerance` slower than the baseline median."""
+    regressions = []
+    for name, stats in results.items():
+        base = baseline.get(name)
+        if "error" in stats or not base or "error" in base or base["median"] <= 0:
+            continue
+        ratio = stats["median"] / base["median"]
+        if ratio > 1 + tolerance:
+            regressions.append((name, base["median"], stats["median"], ratio))
+    return regressions
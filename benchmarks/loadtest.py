@@ -0,0 +1,362 @@
+# benchmarks/loadtest.py — concurrent-session load generator
+#
+#   python -m benchmarks.loadtest --users 1 2 4 8 16 --duration 30
+#   python -m benchmarks.loadtest --url http://localhost:8501 --server-pid 1234
+#   python -m benchmarks.loadtest --mode apptest --users 4 --out load.json
+#
+# Every simulated user walks Home → Risk Assessment (every field filled from a
+# sampled stroke_dataset.csv row) → Results → Recommendations, in a loop, until
+# the step's duration is over.
+#
+#   ws       (default) starts one `streamlit run app.py` server (or uses --url) and
+#            drives it with one websocket session per user, speaking the same
+#            BackMsg/ForwardMsg protocol as the browser.  This measures the real
+#            single-process server; its CPU and RSS are read from /proc.  Needs the
+#            websockets package (pip install websockets), which Streamlit does not
+#            install.
+#   apptest  runs each user in its own process with Streamlit's AppTest.  AppTest
+#            swaps a process-global Runtime per run, so it cannot share a process
+#            between concurrent users; RSS is reported per worker process.
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from multiprocessing import get_context
+
+import numpy as np
+
+import stroke_model
+
+PAGES = ["home", "risk_assessment", "results", "recommendations"]
+
+
+def sample_users(n, seed=0):
+    """n form answer dicts drawn from the rows of stroke_dataset.csv."""
+    answers = stroke_model.form_answers(stroke_model.load_dataset())
+    answers = answers.sample(n=n, replace=len(answers) < n, random_state=seed)
+    users = []
+    for row in answers.to_dict("records"):
+        user = {key: row[key] for key in stroke_model.FEATURES}
+        user["age"] = int(round(user["age"]))
+        user["avg_glucose_level"] = round(float(user["avg_glucose_level"]), 1)
+        users.append(user)
+    return users
+
+
+# ── Process accounting (Linux /proc) ─────────────────────────────────────────
+def rss_bytes(pid="self"):
+    """Current resident set size of a process."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return float("nan")
+
+
+def cpu_seconds(pid="self"):
+    """User + system CPU time consumed by a process so far."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except OSError:
+        return float("nan")
+
+
+# ── ws mode: websocket sessions against a live server ────────────────────────
+class WsSession:
+    """One browser-like session on a running Streamlit server."""
+
+    def __init__(self, url):
+        self.url = url.rstrip("/").replace("http", "ws", 1) + "/_stcore/stream"
+        self.ws  = None
+
+    async def __aenter__(self):
+        import websockets
+
+        self.ws = await websockets.connect(self.url, subprotocols=["streamlit"], max_size=None)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.ws.close()
+
+    async def run(self, page_name, widget_states=()):
+        """Rerun a page; returns ({widget key: (kind, id)}, [error messages])."""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.page_name = page_name
+        msg.rerun_script.widget_states.widgets.extend(widget_states)
+        await self.ws.send(msg.SerializeToString())
+
+        widgets, errors = {}, []
+        while True:
+            fwd = ForwardMsg()
+            fwd.ParseFromString(await self.ws.recv())
+            kind = fwd.WhichOneof("type")
+            if kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                element = fwd.delta.new_element
+                etype   = element.WhichOneof("type")
+                if etype == "exception":
+                    errors.append(element.exception.message)
+                elif etype == "alert" and element.alert.format == element.alert.ERROR:
+                    errors.append(element.alert.body)  # e.g. form validation failed
+                wid = getattr(getattr(element, etype), "id", "")
+                if isinstance(wid, str) and wid.startswith("$$ID-"):
+                    widgets[wid.split("-", 2)[2]] = (etype, wid)
+            elif kind == "script_finished" and fwd.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                return widgets, errors
+
+
+def form_states(widgets, user):
+    """WidgetState protos for the assessment form, as the browser would send them."""
+    from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+    states = []
+    for key, (etype, wid) in widgets.items():
+        ws = WidgetState(id=wid)
+        if etype == "number_input":
+            ws.double_value = float(user[key])
+        elif etype in ("selectbox", "radio"):
+            ws.string_value = user[key]
+        elif etype == "checkbox":
+            ws.bool_value = True
+        elif etype == "button":
+            ws.trigger_value = True
+        states.append(ws)
+    return states
+
+
+async def ws_walk(session, user):
+    timings, errors = {}, []
+
+    async def step(page, page_name, states=()):
+        start = time.perf_counter()
+        widgets, page_errors = await session.run(page_name, states)
+        timings[page] = time.perf_counter() - start
+        # the home page narrates with gTTS, which fails without network; count and keep going
+        errors.extend(f"{page}: {e}" for e in page_errors)
+        return widgets
+
+    await step("home", "")
+    widgets = await step("risk_assessment", "Risk_Assessment")
+    # submitting the form runs the assessment and switches to Results in one round trip
+    await step("results", "Risk_Assessment", form_states(widgets, user))
+    await step("recommendations", "Recommendations")
+    return timings, errors
+
+
+async def ws_user(url, users, deadline, samples, errors, seed):
+    rng = random.Random(seed)
+    async with WsSession(url) as session:
+        while time.perf_counter() < deadline:
+            timings, walk_errors = await ws_walk(session, rng.choice(users))
+            samples.append(timings)
+            errors.extend(walk_errors)
+
+
+async def warm_up(url, user):
+    async with WsSession(url) as session:
+        await ws_walk(session, user)
+
+
+def run_ws(n_users, users, duration, url):
+    samples, errors = [], []
+    deadline = time.perf_counter() + duration
+
+    async def main():
+        await asyncio.gather(*(ws_user(url, users, deadline, samples, errors, seed)
+                               for seed in range(n_users)))
+
+    asyncio.run(main())
+    return samples, errors
+
+
+def scratch_env(directory):
+    """Environment that points the history database, audit log and drift state at directory."""
+    return {"STROKE_HISTORY_DB": os.path.join(directory, "history.sqlite3"),
+            "STROKE_AUDIT_DIR": os.path.join(directory, "audit"),
+            "STROKE_DRIFT_STATE": os.path.join(directory, "drift.json")}
+
+
+def start_server(port, env=None):
+    """Start `streamlit run app.py` headless on port; returns the Popen once it accepts connections."""
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", "app.py", "--server.headless", "true",
+         "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+        cwd=stroke_model.BASE_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        env={**os.environ, **(env or {})},
+    )
+    for _ in range(300):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError(f"streamlit server did not start on port {port}")
+
+
+# ── apptest mode: one AppTest user per process ───────────────────────────────
+def apptest_walk(user):
+    from benchmarks.bench import _app, fill_assessment
+
+    at = _app()
+    timings, errors = {}, []
+
+    def step(page, run):
+        start = time.perf_counter()
+        run()
+        timings[page] = time.perf_counter() - start
+        if at.exception:
+            errors.append(f"{page}: {at.exception[0].message}")
+
+    step("home", at.run)
+    step("risk_assessment", lambda: at.switch_page("pages/Risk_Assessment.py").run())
+    step("results", lambda: fill_assessment(at, user))
+    step("recommendations", lambda: at.switch_page("pages/Recommendations.py").run())
+    return timings, errors
+
+
+def _apptest_user(args):
+    users, duration, seed = args
+    if args.mode == "ws":
+        try:
+            import websockets  # noqa: F401
+        except ImportError:
+            parser.error("ws mode needs the websockets package: pip install websockets, or use --mode apptest")
+
+    warnings.filterwarnings("ignore")
+    os.chdir(stroke_model.BASE_DIR)
+    rng = random.Random(seed)
+    apptest_walk(users[0])  # untimed: imports and model load
+    samples, errors = [], []
+    cpu0, deadline = cpu_seconds(), time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        timings, walk_errors = apptest_walk(rng.choice(users))
+        samples.append(timings)
+        errors.extend(walk_errors)
+    return samples, errors, rss_bytes(), cpu_seconds() - cpu0
+
+
+def run_apptest(n_users, users, duration):
+    with get_context("spawn").Pool(n_users) as pool:
+        parts = pool.map(_apptest_user, [(users, duration, seed) for seed in range(n_users)])
+    samples = [s for part in parts for s in part[0]]
+    errors  = [e for part in parts for e in part[1]]
+    return samples, errors, [part[2] for part in parts], sum(part[3] for part in parts)
+
+
+# ── Reporting ────────────────────────────────────────────────────────────────
+def summarize(n_users, mode, samples, errors, rss, wall, cpu):
+    def pct(values, q):
+        return float(np.percentile(values, q)) * 1000 if values else float("nan")
+
+    pages = {}
+    for page in PAGES:
+        values = [s[page] for s in samples if page in s]
+        pages[page] = {"n": len(values), "p50_ms": pct(values, 50), "p90_ms": pct(values, 90),
+                       "p99_ms": pct(values, 99), "max_ms": pct(values, 100)}
+    return {
+        "users": n_users,
+        "mode": mode,
+        "walks": len(samples),
+        "errors": len(errors),
+        "error_kinds": sorted({e[:120] for e in errors})[:5],
+        "wall_s": wall,
+        "walks_per_s": len(samples) / wall,
+        "page_runs_per_s": sum(len(s) for s in samples) / wall,
+        "cpu_cores_used": cpu / wall,
+        "rss_mb": [r / 2**20 for r in rss],
+        "pages": pages,
+    }
+
+
+def print_step(step):
+    print(f"\nusers={step['users']:<3} mode={step['mode']:<8} walks={step['walks']:<5} "
+          f"walks/s={step['walks_per_s']:.2f}  page runs/s={step['page_runs_per_s']:.2f}  "
+          f"cpu cores={step['cpu_cores_used']:.2f}  rss MB={', '.join(f'{r:.0f}' for r in step['rss_mb'])}  "
+          f"errors={step['errors']}", flush=True)
+    for page, stats in step["pages"].items():
+        print(f"    {page:<16} n={stats['n']:<5} p50 {stats['p50_ms']:8.1f} ms   "
+              f"p90 {stats['p90_ms']:8.1f} ms   p99 {stats['p99_ms']:8.1f} ms", flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate concurrent users walking through the app.")
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 2, 4, 8], help="concurrency levels to step through")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per concurrency level")
+    parser.add_argument("--mode", choices=["ws", "apptest"], default="ws")
+    parser.add_argument("--url", help="ws mode: use this running server instead of starting one")
+    parser.add_argument("--server-pid", type=int, help="ws mode with --url: pid to read CPU/RSS from")
+    parser.add_argument("--port", type=int, default=8599, help="ws mode: port for the server we start")
+    parser.add_argument("--profiles", type=int, default=500, help="dataset rows to sample user answers from")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write all steps as JSON to this path")
+    args = parser.parse_args(argv)
+
+    if args.mode == "ws":
+        try:
+            import websockets  # noqa: F401
+        except ImportError:
+            parser.error("ws mode needs the websockets package: pip install websockets, or use --mode apptest")
+
+    warnings.filterwarnings("ignore")
+    os.chdir(stroke_model.BASE_DIR)
+    users = sample_users(args.profiles, args.seed)
+    # synthetic submissions go to a scratch history database, audit log and drift
+    # state, not the real ones (a server given with --url keeps its own)
+    scratch = tempfile.mkdtemp(prefix="stroke-loadtest-")
+    os.environ.update(scratch_env(scratch))     # inherited by apptest worker processes
+
+    server = None
+    if args.mode == "ws":
+        url, pid = args.url, args.server_pid
+        if not url:
+            server = start_server(args.port, scratch_env(scratch))
+            url, pid = f"http://127.0.0.1:{args.port}", server.pid
+        # one untimed walk so model loading and imports are not charged to the first step
+        asyncio.run(warm_up(url, users[0]))
+
+    steps = []
+    try:
+        for n_users in args.users:
+            start = time.perf_counter()
+            if args.mode == "ws":
+                cpu0 = cpu_seconds(pid) if pid else float("nan")
+                samples, errors = run_ws(n_users, users, args.duration, url)
+                cpu = cpu_seconds(pid) - cpu0 if pid else float("nan")
+                rss = [rss_bytes(pid) if pid else float("nan")]
+            else:
+                samples, errors, rss, cpu = run_apptest(n_users, users, args.duration)
+            step = summarize(n_users, args.mode, samples, errors, rss, time.perf_counter() - start, cpu)
+            print_step(step)
+            steps.append(step)
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(steps, f, indent=2)
+        print(f"\nwritten to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
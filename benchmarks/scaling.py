@@ -0,0 +1,63 @@
+# benchmarks/scaling.py — throughput of parallel_score.py against worker count
+#
+#   python -m benchmarks.scaling --workers 1 2 4 8 16 32 --rows 2000000
+#   python -m benchmarks.scaling --input registry.csv --workers 1 8 32
+#
+# Without --input, a file of --rows records is built by repeating
+# stroke_dataset.csv.  Each step scores the whole file and reports rows/s,
+# speed-up over one worker and parallel efficiency (speed-up / workers).
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+import parallel_score
+import stroke_model
+
+
+def make_input(path, rows):
+    with open(stroke_model.DATASET_PATH) as f:
+        header, *lines = f.read().splitlines()
+    with open(path, "w") as out:
+        out.write(header + "\n")
+        written = 0
+        while written < rows:
+            batch = lines[:rows - written]
+            out.write("\n".join(batch) + "\n")
+            written += len(batch)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure parallel batch scoring throughput per worker count.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--input", help="CSV to score (default: a synthetic file of --rows records)")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--no-band", action="store_true", help="skip the uncertainty band columns")
+    parser.add_argument("--out", help="write the results as JSON here")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="stroke-scaling-") as tmp:
+        in_path = args.input or make_input(os.path.join(tmp, "input.csv"), args.rows)
+        results = []
+        for workers in sorted(set(args.workers)):
+            stats = parallel_score.score_file(in_path, os.path.join(tmp, "scored.csv"),
+                                              os.path.join(tmp, "rejects.csv"), workers, band=not args.no_band)
+            results.append({"workers": workers, "rows": stats["rows"], "seconds": stats["seconds"],
+                            "rows_per_s": stats["rows"] / stats["seconds"]})
+            base = results[0]["rows_per_s"] / results[0]["workers"]
+            speedup = results[-1]["rows_per_s"] / base
+            results[-1].update(speedup=speedup, efficiency=speedup / workers)
+            print(f"{workers:3d} workers  {results[-1]['rows_per_s']:12,.0f} rows/s  "
+                  f"speed-up {speedup:5.2f}x  efficiency {speedup / workers:5.0%}", flush=True)
+
+    print(f"({os.cpu_count()} CPUs available)")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"cpus": os.cpu_count(), "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+# bulk_upload.py — background scoring of CSV files uploaded on pages/Bulk_Upload.py
+#
+# submit() copies an upload to a spool file on disk in SPOOL_PIECE pieces and
+# queues a Job on a small process-wide thread pool.  The worker streams the
+# spool file through batch_score.read_blocks / score_blocks, CHUNK_ROWS lines
+# at a time, so no thread ever holds more than one block; after each block it
+# publishes progress, running band counts and the first PREVIEW_ROWS scored
+# rows.  The page only keeps the job id in session state and polls snapshot().
+#
+# The model is scored in small blocks from a thread: sklearn's tree traversal
+# and pandas' CSV parser release the GIL for most of their work, and short
+# blocks keep the stretches that do hold it short for other sessions' scripts.
+# Finished jobs and their files are removed JOB_TTL seconds after they end.
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+import batch_score
+import metrics
+
+SPOOL_DIR    = os.environ.get("STROKE_UPLOAD_DIR", os.path.join(tempfile.gettempdir(), "stroke-uploads"))
+WORKERS      = int(os.environ.get("STROKE_UPLOAD_WORKERS", "1"))
+CHUNK_ROWS   = 5_000
+SPOOL_PIECE  = 1 << 20
+PREVIEW_ROWS = 200
+JOB_TTL      = 6 * 3600
+
+_POOL = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="bulk-upload")
+_JOBS = {}
+_LOCK = threading.Lock()
+
+
+class Job:
+    """One uploaded file; fields are written by the worker and read through snapshot()."""
+
+    def __init__(self, name, in_path, size, model, leaf_table):
+        self.id        = uuid.uuid4().hex
+        self.name      = name
+        self.dir       = os.path.dirname(in_path)
+        self.in_path   = in_path
+        self.out_path  = os.path.join(self.dir, "scored.csv")
+        self.reject_path = os.path.join(self.dir, "rejects.csv")
+        self.size      = size
+        self.model     = model
+        self.leaf_table = leaf_table
+        self.state     = "queued"
+        self.error     = None
+        self.consumed  = 0
+        self._pending  = 0
+        self.stats     = {"rows": 0, "scored": 0, "rejected": 0}
+        self.bands     = {}
+        self.preview   = None
+        self.started   = self.finished = None
+        self.cancelled = threading.Event()
+        self._lock     = threading.Lock()
+
+    def snapshot(self):
+        with self._lock:
+            done = 1.0 if self.state == "done" else (self.consumed / self.size if self.size else 0.0)
+            elapsed = ((self.finished or time.time()) - self.started) if self.started else 0.0
+            return {
+                "id": self.id, "name": self.name, "state": self.state, "error": self.error,
+                "progress": min(done, 1.0), "elapsed": elapsed, "bands": dict(self.bands),
+                "preview": None if self.preview is None else self.preview.copy(), **self.stats,
+            }
+
+    def cancel(self):
+        self.cancelled.set()
+
+    # ── Worker side ──
+    def _blocks(self, header_bytes):
+        with self._lock:
+            self.consumed = header_bytes
+        for lines in batch_score.read_blocks(self.in_path, CHUNK_ROWS):
+            if self.cancelled.is_set():
+                return
+            self._pending = sum(map(len, lines))
+            yield lines
+
+    def _on_block(self, scored, rejected, stats):
+        with self._lock:
+            self.consumed += self._pending
+            self.stats = dict(stats)
+            for band, count in scored["risk_band"].value_counts().items():
+                self.bands[band] = self.bands.get(band, 0) + int(count)
+            if self.preview is None:
+                self.preview = scored.head(PREVIEW_ROWS).reset_index(drop=True)
+            elif len(self.preview) < PREVIEW_ROWS:
+                head = scored.head(PREVIEW_ROWS - len(self.preview))
+                self.preview = pd.concat([self.preview, head], ignore_index=True)
+
+    def _run(self):
+        with self._lock:
+            self.state, self.started = "running", time.time()
+        try:
+            header = batch_score.read_header(self.in_path)
+            with open(self.in_path, "rb") as f:
+                header_bytes = len(f.readline())
+            with open(self.out_path, "w", newline="") as out, open(self.reject_path, "w", newline="") as rejects:
+                batch_score.score_blocks(self.model, header, self._blocks(header_bytes), out, rejects,
+                                         self.leaf_table, on_block=self._on_block)
+            state = "cancelled" if self.cancelled.is_set() else "done"
+            with self._lock:
+                self.state = state
+        except Exception as exc:
+            with self._lock:
+                self.state, self.error = "failed", f"{type(exc).__name__}: {exc}"
+        finally:
+            with self._lock:
+                self.finished = time.time()
+            os.remove(self.in_path)
+
+
+# ── Registry ─────────────────────────────────────────────────────────────────
+def submit(upload, name, model, leaf_table=None):
+    """Spool the file-like upload to disk and queue it for scoring; returns the Job.
+
+    leaf_table (uncertainty.LeafTable) adds the risk_low / risk_high columns.
+    """
+    _expire()
+    job_dir = tempfile.mkdtemp(prefix="job-", dir=_spool_dir())
+    in_path = os.path.join(job_dir, "input.csv")
+    with open(in_path, "wb") as f:
+        shutil.copyfileobj(upload, f, SPOOL_PIECE)
+    job = Job(name, in_path, os.path.getsize(in_path), model, leaf_table)
+    with _LOCK:
+        _JOBS[job.id] = job
+    _POOL.submit(job._run)
+    return job
+
+
+def get(job_id):
+    with _LOCK:
+        return _JOBS.get(job_id)
+
+
+def jobs():
+    with _LOCK:
+        return list(_JOBS.values())
+
+
+def _spool_dir():
+    os.makedirs(SPOOL_DIR, exist_ok=True)
+    return SPOOL_DIR
+
+
+def _expire(now=None):
+    now = now or time.time()
+    with _LOCK:
+        stale = [job for job in _JOBS.values() if job.finished and now - job.finished > JOB_TTL]
+        for job in stale:
+            del _JOBS[job.id]
+    for job in stale:
+        shutil.rmtree(job.dir, ignore_errors=True)
+
+
+# ── Metrics ──────────────────────────────────────────────────────────────────
+metrics.describe("stroke_bulk_jobs", "gauge", "Bulk upload scoring jobs by state.")
+metrics.describe("stroke_bulk_rows_scored", "gauge", "Rows scored so far by the bulk upload jobs on record.")
+
+
+@metrics.provider
+def bulk_metrics():
+    snapshots = [job.snapshot() for job in jobs()]
+    for state in ("queued", "running", "done", "failed", "cancelled"):
+        yield metrics.Sample("stroke_bulk_jobs", sum(s["state"] == state for s in snapshots), {"state": state})
+    yield metrics.Sample("stroke_bulk_rows_scored", sum(s["scored"] for s in snapshots))
@@ -0,0 +1,184 @@
+# cascade.py — tiered batch scoring: a linear screener first, boosting only near a band threshold
+#
+# The screener is a least-squares fit of the boosting model's log-odds on the
+# 11 transformed features, trained on the model's own predictions for the
+# reference dataset plus a dense uniform sample of the form's input space.
+# Rows whose screener log-odds is within the band half-width of either risk
+# band threshold (BAND_THRESHOLDS) are escalated to the full model; the rest
+# take the screener's estimate.  The half-width is calibrated on a held-out
+# sample for the union of the thresholds: it is the smallest width at which at
+# most `tolerance` of rows would get a different risk band than the full model
+# gives them, so the bound holds for the bands batch scoring writes, not per
+# threshold.  report() checks it on a further held-out sample.  Batch scoring
+# (batch_score.py --cascade, and parallel_score.py and jobqueue.py through it)
+# uses probabilities().
+#
+#   python -m cascade [--tolerance 0.001]     # fit, save, report
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+import stroke_model
+
+DEFAULT_TOLERANCE = 0.001
+BAND_THRESHOLDS   = (stroke_model.LOW_RISK_MAX, stroke_model.MODERATE_RISK_MAX)
+SYNTHETIC_ROWS    = 100_000
+
+
+def _logit(p):
+    return np.log(p) - np.log1p(-p)
+
+
+def _sigmoid(z):
+    return 1.0 / (1.0 + np.exp(-z))
+
+
+def band_half_width(z, f, thresholds=BAND_THRESHOLDS, tolerance=DEFAULT_TOLERANCE):
+    """Smallest half-width leaving at most `tolerance` of rows in another band than log-odds f puts them.
+
+    A row keeps its band unless z and f fall on different sides of some
+    threshold while z is farther than the half-width from every threshold.
+    """
+    cuts = _logit(np.asarray(thresholds, dtype=float))
+    z, f = np.asarray(z)[:, None], np.asarray(f)[:, None]
+    crosses = ((z >= cuts) != (f >= cuts)).any(axis=1)
+    needed = np.where(crosses, np.abs(z - cuts).min(axis=1), 0.0)
+    return float(np.quantile(needed, 1.0 - tolerance, method="higher"))
+
+
+class Screener:
+    """Linear model of the boosting log-odds with a band calibrated around the thresholds."""
+
+    def __init__(self, coef, intercept, half_width, tolerance, thresholds=BAND_THRESHOLDS):
+        self.coef       = np.asarray(coef, dtype=float)
+        self.intercept  = float(intercept)
+        self.half_width = float(half_width)
+        self.tolerance  = float(tolerance)
+        self.thresholds = tuple(float(t) for t in thresholds)
+
+    @classmethod
+    def fit(cls, model, X_fit, X_calibrate, tolerance=DEFAULT_TOLERANCE, thresholds=BAND_THRESHOLDS):
+        Z_fit = stroke_model.transform(X_fit)
+        A = np.c_[Z_fit, np.ones(len(Z_fit))]
+        solution, *_ = np.linalg.lstsq(A, model.decision_function(Z_fit), rcond=None)
+        screener = cls(solution[:-1], solution[-1], 0.0, tolerance, thresholds)
+        f_cal = model.decision_function(stroke_model.transform(X_calibrate))
+        screener.half_width = band_half_width(screener.log_odds(X_calibrate), f_cal, thresholds, tolerance)
+        return screener
+
+    def log_odds(self, X_raw):
+        return stroke_model.transform(X_raw) @ self.coef + self.intercept
+
+    def to_dict(self):
+        return {"coef": self.coef.tolist(), "intercept": self.intercept, "half_width": self.half_width,
+                "tolerance": self.tolerance, "thresholds": list(self.thresholds)}
+
+
+def probabilities(model, screener, X_raw):
+    """(probs, escalated) for a batch, escalating rows within the band of any of the screener's thresholds.
+
+    Probabilities of rows the screener decided are its own estimate; escalated
+    rows get the full model's probability.
+    """
+    z = screener.log_odds(X_raw)
+    escalated = np.zeros(len(z), dtype=bool)
+    for threshold in screener.thresholds:
+        escalated |= np.abs(z - _logit(threshold)) <= screener.half_width
+    probs = _sigmoid(z)
+    if escalated.any():
+        probs[escalated] = stroke_model.predict_proba(model, np.asarray(X_raw, dtype=float)[escalated])
+    return probs, escalated
+
+
+def score(model, screener, X_raw):
+    """Cascade scoring of a batch: (probs, risk bands, escalated)."""
+    probs, escalated = probabilities(model, screener, X_raw)
+    return probs, stroke_model.risk_bands(probs), escalated
+
+
+def report(model, screener, X_raw):
+    """Risk band agreement with the full model, escalation rate and speed-up on X_raw."""
+    start = time.perf_counter()
+    full  = stroke_model.risk_bands(stroke_model.predict_proba(model, X_raw))
+    full_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    _, bands, escalated = score(model, screener, X_raw)
+    cascade_seconds = time.perf_counter() - start
+    disagreement = float((bands != full).mean())
+    return {
+        "rows": len(X_raw),
+        "thresholds": list(screener.thresholds),
+        "tolerance": screener.tolerance,
+        "full_model_bands": {band: int((full == band).sum()) for band in ("low", "moderate", "high")},
+        "agreement_rate": 1.0 - disagreement,
+        "within_tolerance": disagreement <= screener.tolerance,
+        "escalation_rate": float(escalated.mean()),
+        "full_rows_per_s": len(X_raw) / full_seconds,
+        "cascade_rows_per_s": len(X_raw) / cascade_seconds,
+        "speedup": full_seconds / cascade_seconds,
+    }
+
+
+def training_rows(seed=0):
+    """(fit, calibrate, validate) raw samples: reference records plus uniform draws."""
+    reference = stroke_model.encode_frame(stroke_model.form_answers(stroke_model.load_dataset()))
+    synthetic = stroke_model.random_raw(3 * SYNTHETIC_ROWS, seed=seed)
+    parts = np.array_split(np.random.default_rng(seed).permutation(len(reference)), 3)
+    return [np.r_[reference[idx], synthetic[i::3]] for i, idx in enumerate(parts)]
+
+
+def screener_path(model_sha=None, tolerance=DEFAULT_TOLERANCE):
+    model_sha = model_sha or stroke_model.model_hash()
+    return os.path.join(stroke_model.ARTIFACTS_DIR, "cascade", model_sha[:16], f"screener-{tolerance:g}.json")
+
+
+def build_screener(model=None, model_sha=None, tolerance=DEFAULT_TOLERANCE):
+    model = model if model is not None else stroke_model.load_model()
+    X_fit, X_cal, _ = training_rows()
+    screener = Screener.fit(model, X_fit, X_cal, tolerance)
+    path = screener_path(model_sha, tolerance)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(screener.to_dict(), f, indent=2)
+    return screener
+
+
+def load_screener(model_sha=None, tolerance=DEFAULT_TOLERANCE):
+    """The saved screener for this model and tolerance, fitting it if it is missing or stale."""
+    path = screener_path(model_sha, tolerance)
+    if os.path.exists(path):
+        with open(path) as f:
+            saved = json.load(f)
+        # screeners saved before band calibration were calibrated for one threshold
+        if tuple(saved.get("thresholds", ())) == BAND_THRESHOLDS:
+            return Screener(**saved)
+    return build_screener(model_sha=model_sha, tolerance=tolerance)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fit the cascade screener and report on held-out rows.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed fraction of rows whose risk band differs from the full model's")
+    args = parser.parse_args(argv)
+
+    model = stroke_model.load_model()
+    screener = build_screener(model, tolerance=args.tolerance)
+    _, _, X_val = training_rows()
+    result = report(model, screener, X_val)
+    print(f"screener written to {screener_path(tolerance=args.tolerance)}")
+    print(f"  band half-width      {screener.half_width:.3f} log-odds around "
+          f"{', '.join(f'{t:g}' for t in screener.thresholds)}")
+    print("  full-model bands     " + ", ".join(f"{n:,} {band}" for band, n in result["full_model_bands"].items()))
+    print(f"  band agreement       {result['agreement_rate']:.4%} "
+          f"({'within' if result['within_tolerance'] else 'OUTSIDE'} tolerance {args.tolerance:g})")
+    print(f"  escalated            {result['escalation_rate']:.2%}")
+    print(f"  throughput           {result['full_rows_per_s']:,.0f} -> {result['cascade_rows_per_s']:,.0f} "
+          f"rows/s ({result['speedup']:.1f}x)")
+    return 0 if result["within_tolerance"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
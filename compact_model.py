@@ -0,0 +1,56 @@
+# compact_model.py — NumPy-only runtime for the distilled risk model
+#
+# The artifact written by distill.py is a handful of shallow regression trees
+# over the 8 raw form features, stored as padded arrays in one .npz file.  This
+# module needs nothing but NumPy, so it can be copied to a device without
+# sklearn, joblib or shap.  Rows are encoded exactly as stroke_model.encode()
+# does (same feature order and category codes).
+import numpy as np
+
+N_FEATURES = 8  # age, glucose, heart disease, hypertension, married, smoking, work, gender
+
+
+class CompactModel:
+    """Sum of shallow trees on the raw features, predicting the stroke log-odds."""
+
+    def __init__(self, feature, threshold, left, right, value, base, depth):
+        self.feature   = feature     # (trees, nodes) split feature, -1 at leaves
+        self.threshold = threshold   # (trees, nodes)
+        self.left      = left        # (trees, nodes) child index; leaves point to themselves
+        self.right     = right
+        self.value     = value       # (trees, nodes) leaf contribution to the log-odds
+        self.base      = float(base)
+        self.depth     = int(depth)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["feature"], data["threshold"], data["left"], data["right"],
+                       data["value"], data["base"], data["depth"])
+
+    def save(self, path):
+        np.savez_compressed(path, feature=self.feature, threshold=self.threshold, left=self.left,
+                            right=self.right, value=self.value, base=self.base, depth=self.depth)
+
+    def log_odds(self, X_raw):
+        # compare in float32 like the sklearn trees the thresholds came from
+        X = np.asarray(X_raw, dtype=np.float32).reshape(-1, N_FEATURES)
+        n_trees, width = self.feature.shape
+        if not hasattr(self, "_flat"):
+            # global node ids: tree * width + node, so each level is a few 1-D takes
+            offset = (np.arange(n_trees) * width)[:, None]
+            self._flat = (self.feature.ravel().clip(0).astype(np.intp), self.threshold.ravel(),
+                          (self.left + offset).ravel().astype(np.intp),
+                          (self.right + offset).ravel().astype(np.intp), self.value.ravel())
+        feature, threshold, left, right, value = self._flat
+        node = np.tile(np.arange(n_trees) * width, len(X))
+        cell = np.repeat(np.arange(len(X)) * N_FEATURES, n_trees)
+        X = X.ravel()
+        for _ in range(self.depth):
+            go_left = X.take(cell + feature.take(node)) <= threshold.take(node)
+            node = np.where(go_left, left.take(node), right.take(node))
+        return self.base + value.take(node).reshape(len(X) // N_FEATURES, n_trees).sum(axis=1)
+
+    def predict_proba(self, X_raw):
+        """Stroke probability for each raw row."""
+        return 1.0 / (1.0 + np.exp(-self.log_odds(X_raw)))
@@ -0,0 +1,79 @@
+# counterfactuals.py — which modifiable changes would lower a user's predicted risk
+#
+# Candidates are every combination of the changes a user can act on — quit
+# smoking, control hypertension, lower average glucose in GLUCOSE_STEP steps
+# — applied to their encoded profile.  All candidates are scored in one
+# batched predict_proba call; a candidate is dropped when another one needs no
+# more of any change and predicts no higher risk (the unchanged profile is
+# itself a candidate, so changes that do not help are dropped too).
+import itertools
+
+import numpy as np
+
+import stroke_model
+
+GLUCOSE_STEP   = 5.0    # mg/dL
+GLUCOSE_TARGET = 70.0   # do not suggest lowering below this
+TOP_N          = 5
+
+_GLU   = stroke_model.FEATURES.index("avg_glucose_level")
+_HTN   = stroke_model.FEATURES.index("hypertension")
+_SMOKE = stroke_model.FEATURES.index("smoking_status")
+
+
+def candidates(raw):
+    """(X, effort) for every combination of modifiable changes to one raw row.
+
+    effort columns are (quit smoking, control hypertension, glucose drop in mg/dL);
+    row 0 is the unchanged profile.
+    """
+    raw = np.asarray(raw, dtype=float)
+    quit_options = [0, 1] if raw[_SMOKE] == stroke_model.SMOKE_MAP["smokes"] else [0]
+    htn_options  = [0, 1] if raw[_HTN] == stroke_model.HTN_MAP["Yes"] else [0]
+    floor = max(GLUCOSE_TARGET, stroke_model.GLUCOSE_RANGE[0])
+    drops = np.arange(0.0, max(raw[_GLU] - floor, 0.0) + 1e-9, GLUCOSE_STEP)
+
+    effort = np.array(list(itertools.product(quit_options, htn_options, drops)), dtype=float)
+    X = np.tile(raw, (len(effort), 1))
+    X[:, _SMOKE] = np.where(effort[:, 0] == 1, stroke_model.SMOKE_MAP["formerly smoked"], X[:, _SMOKE])
+    X[:, _HTN]   = np.where(effort[:, 1] == 1, stroke_model.HTN_MAP["No"], X[:, _HTN])
+    X[:, _GLU]   = raw[_GLU] - effort[:, 2]
+    return X, effort
+
+
+def non_dominated(effort, probs):
+    """Mask of candidates no other candidate beats on both effort and risk."""
+    no_more   = (effort[:, None, :] <= effort[None, :, :]).all(axis=2)
+    no_worse  = probs[:, None] <= probs[None, :]
+    strictly  = (effort[:, None, :] < effort[None, :, :]).any(axis=2) | (probs[:, None] < probs[None, :])
+    dominated = (no_more & no_worse & strictly).any(axis=0)
+    return ~dominated
+
+
+def describe(effort_row, raw):
+    changes = []
+    if effort_row[0]:
+        changes.append("Quit smoking")
+    if effort_row[1]:
+        changes.append("Bring blood pressure under control")
+    if effort_row[2]:
+        changes.append(f"Lower average glucose to {raw[_GLU] - effort_row[2]:.0f} mg/dL "
+                       f"(−{effort_row[2]:.0f})")
+    return changes
+
+
+def recommend(model, raw, top_n=TOP_N):
+    """Up to top_n change sets with the largest predicted risk reduction."""
+    X, effort = candidates(raw)
+    probs = stroke_model.predict_proba(model, X)
+    base  = probs[0]
+    keep  = non_dominated(effort, probs)
+    keep[0] = False  # the unchanged profile is not a recommendation
+    order = sorted(np.flatnonzero(keep), key=lambda i: probs[i])[:top_n]
+    return {
+        "baseline": float(base),
+        "candidates": len(X),
+        "options": [{"changes": describe(effort[i], np.asarray(raw, dtype=float)),
+                     "prob": float(probs[i]),
+                     "reduction": float(base - probs[i])} for i in order],
+    }
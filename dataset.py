@@ -0,0 +1,77 @@
+# dataset.py — typed, columnar cache of pages/stroke_dataset.csv
+#
+# The CSV is parsed once into an uncompressed Arrow IPC (Feather v2) file under
+# artifacts/dataset/, named after the CSV's sha256, with categorical string
+# columns, int8 flags and a nullable BMI; later loads memory-map that file
+# instead of re-parsing the CSV.  Writing a cache removes the files left by
+# earlier versions of the same CSV.  stroke_model.load_dataset() goes through
+# here.
+#
+#   python -m dataset        # build the cache and compare it with pd.read_csv
+import glob
+import os
+import time
+
+import pandas as pd
+import pyarrow.feather as feather
+
+import stroke_model
+
+CATEGORICAL = ["gender", "ever_married", "work_type", "Residence_type", "smoking_status"]
+FLAGS       = ["hypertension", "heart_disease", "stroke"]
+
+
+def typed(df):
+    """The raw CSV frame with compact dtypes (N/A strings in bmi become <NA>)."""
+    out = df.copy()
+    out["id"] = out["id"].astype("int32")
+    for col in CATEGORICAL:
+        out[col] = out[col].astype("category")
+    for col in FLAGS:
+        out[col] = out[col].astype("int8")
+    # age and glucose stay float64 so the model sees exactly the CSV's values
+    out["bmi"] = pd.to_numeric(out["bmi"], errors="coerce").astype("Float32")
+    return out
+
+
+def cache_path(path=stroke_model.DATASET_PATH):
+    sha = stroke_model.file_hash(path)[:16]
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(stroke_model.ARTIFACTS_DIR, "dataset", f"{stem}-{sha}.arrow")
+
+
+def build(path=stroke_model.DATASET_PATH):
+    out = cache_path(path)
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    typed(pd.read_csv(path)).to_feather(out + ".tmp", compression="uncompressed")
+    os.replace(out + ".tmp", out)
+    stem = os.path.basename(out).rsplit("-", 1)[0]
+    for stale in glob.glob(os.path.join(glob.escape(os.path.dirname(out)), f"{glob.escape(stem)}-*.arrow")):
+        if stale != out:
+            os.remove(stale)
+    return out
+
+
+def load(path=stroke_model.DATASET_PATH):
+    """Typed frame of the dataset at path, from the Arrow cache (built if stale)."""
+    cached = cache_path(path)
+    if not os.path.exists(cached):
+        build(path)
+    return feather.read_table(cached, memory_map=True).to_pandas()
+
+
+def _measure(fn, repeat=20):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        df = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, int(df.memory_usage(deep=True).sum())
+
+
+if __name__ == "__main__":
+    print(f"cache written to {build()}")
+    for name, fn in (("pd.read_csv", lambda: pd.read_csv(stroke_model.DATASET_PATH)),
+                     ("cached arrow", load)):
+        seconds, frame = _measure(fn)
+        print(f"  {name:<15} {seconds * 1000:7.2f} ms   frame {frame / 1024:7.1f} KB")
@@ -0,0 +1,196 @@
+# diagnostics.py — process, cache and per-session memory accounting
+#
+# Reported on pages/Admin.py and as metrics on /metrics:
+#   * process RSS (current and peak) from /proc
+#   * tracemalloc top allocators, when tracing is on (STROKE_TRACEMALLOC=1 at
+#     start-up, or switched on from the admin page)
+#   * approximate bytes held by each st.cache_resource / st.cache_data entry
+#   * approximate bytes held by each live session's st.session_state
+#
+# Cache and session enumeration reads Streamlit's runtime internals; if those
+# move in a future Streamlit release the report degrades to empty lists.
+import gc
+import os
+import sys
+import tracemalloc
+import types
+
+import metrics
+
+TRACEMALLOC_FRAMES = int(os.environ.get("STROKE_TRACEMALLOC_FRAMES", "1"))
+
+
+# ── Process ──────────────────────────────────────────────────────────────────
+def process_memory():
+    """{"rss": bytes, "peak_rss": bytes} for this process (Linux /proc, else peak only)."""
+    out = {"rss": None, "peak_rss": None}
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    out["rss"] = int(line.split()[1]) * 1024
+                elif line.startswith("VmHWM:"):
+                    out["peak_rss"] = int(line.split()[1]) * 1024
+    except OSError:
+        import resource
+        out["peak_rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return out
+
+
+# ── tracemalloc ──────────────────────────────────────────────────────────────
+def start_tracing(frames=TRACEMALLOC_FRAMES):
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+
+def stop_tracing():
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def top_allocators(limit=15, key_type="lineno"):
+    """Largest allocation sites as dicts, or [] when tracemalloc is off."""
+    if not tracemalloc.is_tracing():
+        return []
+    snapshot = tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ])
+    rows = []
+    for stat in snapshot.statistics(key_type)[:limit]:
+        frame = stat.traceback[0]
+        rows.append({"site": f"{frame.filename}:{frame.lineno}", "bytes": stat.size, "blocks": stat.count})
+    return rows
+
+
+if os.environ.get("STROKE_TRACEMALLOC", "").lower() in ("1", "true", "yes"):
+    start_tracing()
+
+
+# ── Object sizing ────────────────────────────────────────────────────────────
+_SKIP_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType,
+               types.MethodType, types.CodeType, types.FrameType)
+
+
+def _native_bytes(obj):
+    """Heap bytes owned by extension objects that gc cannot see into."""
+    # sklearn's Cython Tree keeps its node and value arrays outside the Python heap
+    if type(obj).__name__ == "Tree" and type(obj).__module__.startswith("sklearn"):
+        from sklearn.tree._tree import NODE_DTYPE
+        return obj.capacity * NODE_DTYPE.itemsize + obj.value.nbytes
+    return 0
+
+
+def deep_sizeof(obj):
+    """Approximate bytes reachable from obj (shared objects are counted once)."""
+    seen, total, stack = set(), 0, [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen or isinstance(item, _SKIP_TYPES):
+            continue
+        seen.add(id(item))
+        try:
+            total += sys.getsizeof(item) + _native_bytes(item)
+        except Exception:
+            continue
+        # numpy views reference their base; owned buffers are already in getsizeof
+        stack.extend(gc.get_referents(item))
+        if getattr(item, "dtype", None) is not None and item.dtype.hasobject:
+            stack.extend(item.ravel().tolist())  # object arrays hide their elements from gc
+    return total
+
+
+# ── Streamlit caches ─────────────────────────────────────────────────────────
+def cache_entries():
+    """One dict per cached function: kind, function, entries and approximate bytes."""
+    rows = []
+    try:
+        from streamlit.runtime.caching.cache_data_api import _data_caches
+        from streamlit.runtime.caching.cache_resource_api import _resource_caches
+    except ImportError:
+        return rows
+
+    with _resource_caches._caches_lock:
+        resource_caches = [c for caches in _resource_caches._function_caches.values() for c in caches.values()]
+    for cache in resource_caches:
+        with cache._mem_cache_lock:
+            values = [result.value for result in cache._mem_cache.values()]
+        rows.append({"kind": "resource", "function": cache.display_name,
+                     "entries": len(values), "bytes": sum(deep_sizeof(v) for v in values)})
+
+    with _data_caches._caches_lock:
+        data_caches = [c for caches in _data_caches._function_caches.values() for c in caches.values()]
+    for cache in data_caches:
+        # st.cache_data keeps pickled bytes; their length is what the entry holds
+        stats = [s for family in cache.get_stats().values() for s in family]
+        rows.append({"kind": "data", "function": cache.storage.function_display_name,
+                     "entries": len(stats), "bytes": sum(s.byte_length for s in stats)})
+    return sorted(rows, key=lambda r: r["bytes"], reverse=True)
+
+
+# ── Sessions ─────────────────────────────────────────────────────────────────
+def session_states():
+    """Approximate st.session_state bytes for every live session on this server."""
+    try:
+        from streamlit import runtime
+        if not runtime.exists():
+            return []
+        sessions = runtime.get_instance()._session_mgr.list_active_sessions()
+    except Exception:
+        return []
+
+    rows = []
+    for info in sessions:
+        state = info.session.session_state
+        try:
+            values = dict(state.filtered_state)
+        except Exception:
+            continue
+        sizes = {key: deep_sizeof(value) for key, value in values.items()}
+        largest = max(sizes, key=sizes.get) if sizes else ""
+        rows.append({"session": info.session.id, "keys": len(sizes), "bytes": sum(sizes.values()),
+                     "largest_key": largest, "largest_bytes": sizes.get(largest, 0)})
+    return sorted(rows, key=lambda r: r["bytes"], reverse=True)
+
+
+def memory_report(top=15):
+    return {
+        "process": process_memory(),
+        "tracemalloc": {
+            "tracing": tracemalloc.is_tracing(),
+            "traced": tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else None,
+            "top": top_allocators(top),
+        },
+        "caches": cache_entries(),
+        "sessions": session_states(),
+    }
+
+
+# ── Metrics ──────────────────────────────────────────────────────────────────
+metrics.describe("stroke_process_rss_bytes", "gauge", "Resident set size of the server process.")
+metrics.describe("stroke_process_peak_rss_bytes", "gauge", "Peak resident set size of the server process.")
+metrics.describe("stroke_tracemalloc_traced_bytes", "gauge", "Bytes currently traced by tracemalloc.")
+metrics.describe("stroke_cache_entries", "gauge", "Entries held by a st.cache_* function.")
+metrics.describe("stroke_cache_bytes", "gauge", "Approximate bytes held by a st.cache_* function.")
+metrics.describe("stroke_sessions_active", "gauge", "Live Streamlit sessions.")
+metrics.describe("stroke_session_state_bytes_total", "gauge", "Approximate st.session_state bytes over all sessions.")
+metrics.describe("stroke_session_state_bytes_max", "gauge", "Largest single session's st.session_state bytes.")
+
+
+@metrics.provider
+def memory_metrics():
+    proc = process_memory()
+    if proc["rss"] is not None:
+        yield metrics.Sample("stroke_process_rss_bytes", proc["rss"])
+    if proc["peak_rss"] is not None:
+        yield metrics.Sample("stroke_process_peak_rss_bytes", proc["peak_rss"])
+    if tracemalloc.is_tracing():
+        yield metrics.Sample("stroke_tracemalloc_traced_bytes", tracemalloc.get_traced_memory()[0])
+    for row in cache_entries():
+        labels = {"kind": row["kind"], "function": row["function"]}
+        yield metrics.Sample("stroke_cache_entries", row["entries"], labels)
+        yield metrics.Sample("stroke_cache_bytes", row["bytes"], labels)
+    sessions = session_states()
+    yield metrics.Sample("stroke_sessions_active", len(sessions))
+    yield metrics.Sample("stroke_session_state_bytes_total", sum(r["bytes"] for r in sessions))
+    yield metrics.Sample("stroke_session_state_bytes_max", max((r["bytes"] for r in sessions), default=0))
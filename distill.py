@@ -0,0 +1,156 @@
+# distill.py — train the compact model (compact_model.py) from the boosting model
+#
+# A small GradientBoostingRegressor on the 8 raw features is fitted to the
+# boosting model's log-odds over a dense uniform sample of the form's input
+# space plus the reference dataset, then exported as padded NumPy arrays.  The
+# smallest ensemble that reaches the target fidelity is kept (or the largest
+# that fits the size budget), and its fidelity and latency are reported
+# against the original on held-out rows.
+#
+#   python -m distill [--budget-kb 64] [--depth 3] [--target-error 0.1]
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+from sklearn.ensemble import GradientBoostingRegressor
+
+import stroke_model
+from compact_model import CompactModel
+
+DEFAULT_BUDGET_KB = 64
+DEFAULT_DEPTH     = 3
+TREE_COUNTS       = (10, 25, 50, 100, 200)   # tried smallest first
+TARGET_ERROR      = 0.1   # mean absolute log-odds error that is good enough
+SAMPLE_ROWS       = 200_000
+
+
+def export(regressor, depth):
+    """CompactModel holding the trees of a fitted GradientBoostingRegressor."""
+    trees = [est.tree_ for est in regressor.estimators_[:, 0]]
+    width = max(t.node_count for t in trees)
+    shape = (len(trees), width)
+    feature   = np.full(shape, -1, dtype=np.int8)
+    threshold = np.zeros(shape, dtype=np.float64)
+    left      = np.tile(np.arange(width, dtype=np.int16), (len(trees), 1))
+    right     = left.copy()
+    value     = np.zeros(shape, dtype=np.float32)
+    for i, t in enumerate(trees):
+        n = t.node_count
+        is_split = t.children_left[:n] >= 0
+        feature[i, :n]   = np.where(is_split, t.feature[:n], -1)
+        threshold[i, :n] = t.threshold[:n]
+        left[i, :n]      = np.where(is_split, t.children_left[:n], np.arange(n))
+        right[i, :n]     = np.where(is_split, t.children_right[:n], np.arange(n))
+        value[i, :n]     = t.value[:n, 0, 0] * regressor.learning_rate
+    base = float(regressor.init_.constant_[0, 0])
+    return CompactModel(feature, threshold, left, right, value, base, depth)
+
+
+def samples(seed=0):
+    """(train, test) raw rows: uniform draws over the form plus reference records."""
+    reference = stroke_model.encode_frame(stroke_model.form_answers(stroke_model.load_dataset()))
+    train = np.r_[stroke_model.random_raw(SAMPLE_ROWS, seed=seed), reference[::2]]
+    test  = np.r_[stroke_model.random_raw(SAMPLE_ROWS // 4, seed=seed + 1), reference[1::2]]
+    return train, test
+
+
+def _per_row_seconds(fn, X, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(X)
+        best = min(best, time.perf_counter() - start)
+    return best / len(X)
+
+
+def fidelity(model, compact, X_test):
+    full = stroke_model.predict_proba(model, X_test)
+    mine = compact.predict_proba(X_test)
+    full_z = model.decision_function(stroke_model.transform(X_test))
+    err  = np.abs(full - mine)
+    return {
+        "rows": len(X_test),
+        "max_abs_prob_error": float(err.max()),
+        "mean_abs_prob_error": float(err.mean()),
+        "mean_abs_log_odds_error": float(np.abs(full_z - compact.log_odds(X_test)).mean()),
+        "low_risk_agreement": float(((full < stroke_model.LOW_RISK_MAX)
+                                     == (mine < stroke_model.LOW_RISK_MAX)).mean()),
+    }
+
+
+def distill(model, budget_kb=DEFAULT_BUDGET_KB, depth=DEFAULT_DEPTH, target_error=TARGET_ERROR,
+            out_dir=None, seed=0):
+    """Fit, export and evaluate the compact model; returns (path, report)."""
+    out_dir = out_dir or os.path.join(stroke_model.ARTIFACTS_DIR, "compact", stroke_model.model_hash()[:16])
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, "compact_model.npz")
+    train, test = samples(seed)
+    target = model.decision_function(stroke_model.transform(train))
+
+    kept = None
+    for n_trees in TREE_COUNTS:
+        regressor = GradientBoostingRegressor(n_estimators=n_trees, max_depth=depth, learning_rate=0.3,
+                                              subsample=0.5, random_state=seed)
+        candidate = export(regressor.fit(train, target), depth)
+        candidate.save(path + ".tmp.npz")
+        if os.path.getsize(path + ".tmp.npz") > budget_kb * 1024:
+            break
+        os.replace(path + ".tmp.npz", path)
+        kept = candidate
+        if fidelity(model, candidate, test)["mean_abs_log_odds_error"] <= target_error:
+            break
+    if os.path.exists(path + ".tmp.npz"):
+        os.remove(path + ".tmp.npz")
+    if kept is None:
+        raise ValueError(f"even {TREE_COUNTS[0]} trees do not fit in {budget_kb} KB")
+
+    compact = CompactModel.load(path)
+    one = test[:1]
+    report = {
+        "trees": int(compact.feature.shape[0]),
+        "depth": depth,
+        "artifact_bytes": os.path.getsize(path),
+        "model_bytes": os.path.getsize(stroke_model.MODEL_PATH),
+        "fidelity": fidelity(model, compact, test),
+        "latency_1_row_us": {
+            "original": _per_row_seconds(lambda X: stroke_model.predict_proba(model, X), one, 50) * 1e6,
+            "compact": _per_row_seconds(compact.predict_proba, one, 50) * 1e6,
+        },
+        "throughput_rows_per_s": {
+            "original": 1 / _per_row_seconds(lambda X: stroke_model.predict_proba(model, X), test[:10_000]),
+            "compact": 1 / _per_row_seconds(compact.predict_proba, test[:10_000]),
+        },
+    }
+    with open(os.path.join(out_dir, "report.json"), "w") as f:
+        json.dump(report, f, indent=2)
+    return path, report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Distil the boosting model into a NumPy-only compact model.")
+    parser.add_argument("--budget-kb", type=float, default=DEFAULT_BUDGET_KB, help="maximum artifact size")
+    parser.add_argument("--depth", type=int, default=DEFAULT_DEPTH, help="depth of each tree")
+    parser.add_argument("--target-error", type=float, default=TARGET_ERROR,
+                        help="stop adding trees once the mean |log-odds error| is at most this")
+    parser.add_argument("--out-dir", help="where to write compact_model.npz and report.json")
+    args = parser.parse_args(argv)
+
+    path, report = distill(stroke_model.load_model(), args.budget_kb, args.depth, args.target_error,
+                           args.out_dir)
+    fid = report["fidelity"]
+    print(f"compact model written to {path}")
+    print(f"  size        {report['artifact_bytes'] / 1024:.1f} KB ({report['trees']} trees, depth "
+          f"{report['depth']}) vs {report['model_bytes'] / 1024:.0f} KB")
+    print(f"  fidelity    max |Δp| {fid['max_abs_prob_error']:.3g}, mean |Δp| {fid['mean_abs_prob_error']:.3g}, "
+          f"mean |Δ log-odds| {fid['mean_abs_log_odds_error']:.3f}, "
+          f"low-risk agreement {fid['low_risk_agreement']:.2%} over {fid['rows']:,} rows")
+    lat, thr = report["latency_1_row_us"], report["throughput_rows_per_s"]
+    print(f"  1 row       {lat['original']:.0f} µs -> {lat['compact']:.0f} µs")
+    print(f"  batch       {thr['original']:,.0f} -> {thr['compact']:,.0f} rows/s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,273 @@
+# drift.py — streaming input-drift monitor for submitted assessments
+#
+# Each submitted assessment's raw feature row is added to a fixed-size summary
+# (rows are merged BUFFER_ROWS at a time, so memory stays O(1) however many
+# arrive):
+#   * Welford count / mean / M2 for all eight features
+#   * fixed-bin histograms for age (1-year bins) and glucose (2.5 mg/dL bins)
+#   * category counts for the six categorical features
+# Every INTERVAL seconds a scheduler thread scores the summary against
+#   * the training statistics in stroke_model.SCALER_MEAN / SCALER_SCALE
+#     (mean shift in training standard deviations, standard deviation ratio)
+#   * the same summary of stroke_dataset.csv (PSI over reference deciles or
+#     categories, KS distance between the binned CDFs)
+# saves the summary to STATE_PATH, so a restart keeps counting, and publishes
+# the scores on /metrics and pages/Admin.py.
+#
+#   python -m drift --from-history    # score the stored assessments (history.py) instead
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+import metrics
+import stroke_model
+
+_LOGGER = logging.getLogger(__name__)
+
+STATE_PATH = os.environ.get("STROKE_DRIFT_STATE", os.path.join(os.path.dirname(__file__), "data", "drift.json"))
+INTERVAL   = float(os.environ.get("STROKE_DRIFT_INTERVAL", "60"))
+MIN_ROWS   = 100            # fewer live rows than this: scores are not reported
+BUFFER_ROWS = 256           # rows collected before they are merged into the summary
+PSI_BINS   = 10
+PSI_WARN, PSI_ALERT = 0.10, 0.25
+NUMERIC = {                 # feature → fixed histogram edges
+    "age": np.arange(stroke_model.AGE_RANGE[0], stroke_model.AGE_RANGE[1] + 2, 1.0),
+    "avg_glucose_level": np.arange(stroke_model.GLUCOSE_RANGE[0], stroke_model.GLUCOSE_RANGE[1] + 2.5, 2.5),
+}
+CATEGORICAL = {
+    "heart_disease": stroke_model.HEART_MAP, "hypertension": stroke_model.HTN_MAP,
+    "ever_married": stroke_model.MARRIED_MAP, "smoking_status": stroke_model.SMOKE_MAP,
+    "work_type": stroke_model.WORK_MAP, "gender": stroke_model.GENDER_MAP,
+}
+_COL = {name: i for i, name in enumerate(stroke_model.FEATURES)}
+
+
+# ── Streaming summary ────────────────────────────────────────────────────────
+class Summary:
+    """Fixed-size running statistics of raw feature rows."""
+
+    def __init__(self):
+        n_features  = len(stroke_model.FEATURES)
+        self.n      = 0
+        self.mean   = np.zeros(n_features)
+        self.m2     = np.zeros(n_features)
+        self.hist   = {name: np.zeros(len(edges) - 1, dtype=np.int64) for name, edges in NUMERIC.items()}
+        self.counts = {name: np.zeros(len(codes), dtype=np.int64) for name, codes in CATEGORICAL.items()}
+
+    def update(self, X_raw):
+        """Add a (rows, 8) block of raw rows (Chan et al.'s merge of Welford summaries)."""
+        X = np.asarray(X_raw, dtype=float).reshape(-1, len(stroke_model.FEATURES))
+        if not len(X):
+            return
+        nb, mb = len(X), X.mean(axis=0)
+        m2b = ((X - mb) ** 2).sum(axis=0)
+        total = self.n + nb
+        delta = mb - self.mean
+        self.mean = self.mean + delta * nb / total
+        self.m2 = self.m2 + m2b + delta ** 2 * self.n * nb / total
+        self.n = total
+        for name, edges in NUMERIC.items():
+            idx = np.clip(np.searchsorted(edges, X[:, _COL[name]], side="right") - 1, 0, len(edges) - 2)
+            self.hist[name] += np.bincount(idx, minlength=len(edges) - 1)
+        for name, counts in self.counts.items():
+            codes = X[:, _COL[name]].astype(int)
+            counts += np.bincount(codes[(codes >= 0) & (codes < len(counts))], minlength=len(counts))
+
+    @property
+    def std(self):
+        return np.sqrt(self.m2 / max(self.n - 1, 1))
+
+    def to_dict(self):
+        return {"n": self.n, "mean": self.mean.tolist(), "m2": self.m2.tolist(),
+                "hist": {k: v.tolist() for k, v in self.hist.items()},
+                "counts": {k: v.tolist() for k, v in self.counts.items()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        out = cls()
+        out.n, out.mean, out.m2 = data["n"], np.array(data["mean"]), np.array(data["m2"])
+        for key, target in (("hist", out.hist), ("counts", out.counts)):
+            for name, values in data[key].items():
+                if name in target and len(values) == len(target[name]):
+                    target[name] = np.array(values, dtype=np.int64)
+        return out
+
+
+# ── Scores ───────────────────────────────────────────────────────────────────
+def psi(expected, actual, eps=1e-4):
+    """Population stability index between two count vectors over the same bins."""
+    p = np.clip(expected / max(expected.sum(), 1), eps, None)
+    q = np.clip(actual / max(actual.sum(), 1), eps, None)
+    return float(((q - p) * np.log(q / p)).sum())
+
+
+def ks(expected, actual):
+    """Largest gap between the two binned CDFs (KS statistic at bin resolution)."""
+    return float(np.abs(np.cumsum(expected) / max(expected.sum(), 1)
+                        - np.cumsum(actual) / max(actual.sum(), 1)).max())
+
+
+def decile_groups(reference_hist, bins=PSI_BINS):
+    """Fine-bin → group index so that each group holds about 1/bins of the reference."""
+    p = reference_hist / max(reference_hist.sum(), 1)
+    mid_cdf = np.cumsum(p) - p / 2
+    return np.minimum((mid_cdf * bins).astype(int), bins - 1)
+
+
+def scores(live, reference):
+    """Per-feature drift of the live summary against training stats and the reference summary."""
+    rows = {}
+    std = live.std
+    for name, i in _COL.items():
+        row = {"mean": float(live.mean[i]), "train_mean": float(stroke_model.SCALER_MEAN[i]),
+               "mean_shift": float((live.mean[i] - stroke_model.SCALER_MEAN[i]) / stroke_model.SCALER_SCALE[i]),
+               "std_ratio": float(std[i] / stroke_model.SCALER_SCALE[i])}
+        if name in NUMERIC:
+            groups = decile_groups(reference.hist[name])
+            row["psi"] = psi(np.bincount(groups, reference.hist[name]), np.bincount(groups, live.hist[name]))
+            row["ks"] = ks(reference.hist[name], live.hist[name])
+        else:
+            row["psi"] = psi(reference.counts[name], live.counts[name])
+            row["ks"] = ks(reference.counts[name], live.counts[name])
+        row["status"] = "alert" if row["psi"] >= PSI_ALERT else "warn" if row["psi"] >= PSI_WARN else "ok"
+        rows[name] = row
+    return rows
+
+
+def reference_summary(path=stroke_model.DATASET_PATH):
+    """Summary of the dataset rows the assessment form can express."""
+    ref = Summary()
+    ref.update(stroke_model.encode_frame(stroke_model.form_answers(stroke_model.load_dataset(path))))
+    return ref
+
+
+# ── Monitor ──────────────────────────────────────────────────────────────────
+class Monitor:
+    """The process's live summary, plus the latest scheduled drift report."""
+
+    def __init__(self, state_path=None):
+        self.state_path = state_path or STATE_PATH
+        self.live      = self._load()
+        self.buffer    = []
+        self.report    = None
+        self._ref      = None
+        self._lock     = threading.Lock()
+        self._thread   = None
+
+    def _load(self):
+        try:
+            with open(self.state_path) as f:
+                return Summary.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError):
+            return Summary()
+
+    def observe(self, X_raw):
+        """Add submitted raw rows; no I/O, and merged into the summary BUFFER_ROWS at a time."""
+        with self._lock:
+            self.buffer.extend(np.asarray(X_raw, dtype=float).reshape(-1, len(stroke_model.FEATURES)))
+            if len(self.buffer) >= BUFFER_ROWS:
+                self._merge()
+        if self._thread is None:
+            self.start()
+
+    def _merge(self):
+        if self.buffer:
+            self.live.update(np.vstack(self.buffer))
+            self.buffer = []
+
+    def evaluate(self):
+        """Score the live summary now, store it as the latest report and save the summary."""
+        if self._ref is None:
+            self._ref = reference_summary()
+        with self._lock:
+            self._merge()
+            live = Summary.from_dict(self.live.to_dict())
+        report = {"at": time.time(), "rows": live.n, "reference_rows": self._ref.n,
+                  "features": scores(live, self._ref) if live.n >= MIN_ROWS else {}}
+        self.report = report
+        os.makedirs(os.path.dirname(os.path.abspath(self.state_path)), exist_ok=True)
+        with open(self.state_path + ".tmp", "w") as f:
+            json.dump(live.to_dict(), f)
+        os.replace(self.state_path + ".tmp", self.state_path)
+        return report
+
+    def start(self, interval=None):
+        """Evaluate every `interval` seconds on a daemon thread (once per monitor)."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._schedule, args=(interval or INTERVAL,),
+                                            name="drift-monitor", daemon=True)
+        self._thread.start()
+
+    def _schedule(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.evaluate()
+            except Exception:
+                _LOGGER.exception("drift evaluation failed")
+
+
+MONITOR = Monitor()
+
+
+def observe(X_raw):
+    MONITOR.observe(X_raw)
+
+
+# ── Metrics ──────────────────────────────────────────────────────────────────
+metrics.describe("stroke_drift_rows", "gauge", "Assessments in the live drift summary.")
+metrics.describe("stroke_drift_psi", "gauge", "Population stability index of a feature against stroke_dataset.csv.")
+metrics.describe("stroke_drift_ks", "gauge", "KS distance of a feature's binned distribution from stroke_dataset.csv.")
+metrics.describe("stroke_drift_mean_shift", "gauge", "Live mean minus training mean, in training standard deviations.")
+metrics.describe("stroke_drift_std_ratio", "gauge", "Live standard deviation over the training standard deviation.")
+metrics.describe("stroke_drift_evaluated_timestamp", "gauge", "Unix time of the latest drift evaluation.")
+
+
+@metrics.provider
+def drift_metrics():
+    report = MONITOR.report
+    if report is None:
+        return
+    yield metrics.Sample("stroke_drift_rows", report["rows"])
+    yield metrics.Sample("stroke_drift_evaluated_timestamp", report["at"])
+    for name, row in report["features"].items():
+        for key in ("psi", "ks", "mean_shift", "std_ratio"):
+            yield metrics.Sample(f"stroke_drift_{key}", row[key], {"feature": name})
+
+
+# ── CLI ──────────────────────────────────────────────────────────────────────
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score input drift against the training data.")
+    parser.add_argument("--from-history", action="store_true",
+                        help="summarise the stored assessments instead of the saved live summary")
+    args = parser.parse_args(argv)
+
+    monitor = MONITOR
+    if args.from_history:
+        import history
+        import rescore
+
+        monitor = Monitor(state_path=os.path.join(os.path.dirname(STATE_PATH), "drift-history.json"))
+        monitor.live = Summary()
+        for frame in rescore.batches(history.connect(), 0):
+            monitor.live.update(stroke_model.encode_frame(frame))
+    report = monitor.evaluate()
+    print(f"{report['rows']:,} live rows against {report['reference_rows']:,} reference rows")
+    if not report["features"]:
+        print(f"(scores need at least {MIN_ROWS} rows)")
+    for name, row in report["features"].items():
+        print(f"  {name:<18} PSI {row['psi']:6.3f}  KS {row['ks']:5.3f}  mean shift {row['mean_shift']:+6.2f} sd  "
+              f"sd ratio {row['std_ratio']:5.2f}  {row['status']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+# heatmap.py — age × glucose risk grids for every categorical answer profile
+#
+# Holding the six categorical answers fixed, a grid scores the whole numeric
+# domain of the assessment form (ages 18–100 × glucose 55–300 mg/dL) in one
+# batched predict_proba call.  The form allows only 192 categorical profiles,
+# so build_grids() precomputes all of them into a single float32 array under
+# artifacts/heatmap/<model hash>/ and pages read one memory-mapped slice.
+#
+#   python -m heatmap            # (re)build every grid for the current model
+import json
+import os
+import time
+
+import numpy as np
+
+import stroke_model
+
+AGES    = np.arange(stroke_model.AGE_RANGE[0], stroke_model.AGE_RANGE[1] + 1, dtype=float)
+GLUCOSE = np.arange(stroke_model.GLUCOSE_RANGE[0], stroke_model.GLUCOSE_RANGE[1] + 1.0, 1.0)
+
+# categorical columns of the raw row, in FEATURES order, and how many codes each has
+CATEGORICAL = stroke_model.FEATURES[2:]
+LEVELS = (
+    len(stroke_model.HEART_MAP), len(stroke_model.HTN_MAP), len(stroke_model.MARRIED_MAP),
+    len(stroke_model.SMOKE_MAP), len(stroke_model.WORK_MAP), len(stroke_model.GENDER_MAP),
+)
+N_PROFILES = int(np.prod(LEVELS))
+
+
+def profile_key(raw):
+    """Categorical codes of a raw row, as a hashable tuple."""
+    return tuple(int(v) for v in raw[2:])
+
+
+def profile_number(key):
+    return int(np.ravel_multi_index(key, LEVELS))
+
+
+def grid(model, key):
+    """(len(AGES), len(GLUCOSE)) risk grid for one categorical profile, in one batch."""
+    age, glu = np.meshgrid(AGES, GLUCOSE, indexing="ij")
+    X = np.empty((age.size, len(stroke_model.FEATURES)))
+    X[:, 0] = age.ravel()
+    X[:, 1] = glu.ravel()
+    X[:, 2:] = key
+    return stroke_model.predict_proba(model, X).reshape(age.shape)
+
+
+def grids_dir(model_sha=None):
+    model_sha = model_sha or stroke_model.model_hash()
+    return os.path.join(stroke_model.ARTIFACTS_DIR, "heatmap", model_sha[:16])
+
+
+def build_grids(model=None, model_sha=None):
+    """Score every categorical profile and write them as one array; returns its dir."""
+    model = model if model is not None else stroke_model.load_model()
+    out = grids_dir(model_sha)
+    os.makedirs(out, exist_ok=True)
+    tmp = os.path.join(out, "grids.npy.tmp")
+    grids = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.float32,
+                                      shape=(N_PROFILES, len(AGES), len(GLUCOSE)))
+    for number in range(N_PROFILES):
+        grids[number] = grid(model, np.unravel_index(number, LEVELS))
+    grids.flush()
+    del grids
+    os.replace(tmp, os.path.join(out, "grids.npy"))
+    with open(os.path.join(out, "manifest.json"), "w") as f:
+        json.dump({"model_sha256": model_sha or stroke_model.model_hash(),
+                   "profiles": N_PROFILES, "levels": LEVELS, "categorical": CATEGORICAL,
+                   "ages": [AGES[0], AGES[-1]], "glucose": [GLUCOSE[0], GLUCOSE[-1]]}, f, indent=2)
+    return out
+
+
+def load_grids(model_sha=None):
+    """Memory-mapped (profiles, ages, glucose) array, building it if it is missing."""
+    path = os.path.join(grids_dir(model_sha), "grids.npy")
+    if not os.path.exists(path):
+        build_grids(model_sha=model_sha)
+    return np.load(path, mmap_mode="r")
+
+
+def profile_grid(grids, raw):
+    """The precomputed grid matching the categorical answers of a raw row."""
+    return grids[profile_number(profile_key(raw))]
+
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    out = build_grids()
+    print(f"{N_PROFILES} grids of {len(AGES)}×{len(GLUCOSE)} written to {out} "
+          f"in {time.perf_counter() - start:.1f} s")
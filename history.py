@@ -0,0 +1,246 @@
+# history.py — persistent assessment history in SQLite (WAL mode)
+#
+# Every completed assessment is stored with its form answers, the model
+# version (model file hash), the predicted probability and the SHAP vector.
+# record() only puts the row on an in-memory queue; one writer thread drains
+# it, inserting up to BATCH_MAX rows per transaction, so a page run never
+# waits on the database.  WAL with synchronous=NORMAL means a commit appends
+# to the log without an fsync (durable at the next checkpoint), and readers
+# never block the writer.  If the queue is full the row is dropped and counted
+# rather than stalling the request.  Each batch also updates the cohort rollups
+# (rollups.py) in the same transaction.
+#
+# History reads go through the (user_token, created_at) index:
+#   python -m history --bench 1000000   # fill a scratch database and time reads
+import argparse
+import atexit
+import logging
+import os
+import queue
+import secrets
+import sqlite3
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+import metrics
+import rollups
+
+_LOGGER = logging.getLogger(__name__)
+
+DB_PATH        = os.environ.get("STROKE_HISTORY_DB", os.path.join(os.path.dirname(__file__), "data", "history.sqlite3"))
+BATCH_MAX      = 500
+FLUSH_INTERVAL = 0.05       # seconds a batch waits for more rows
+QUEUE_MAX      = 10_000
+FLUSH_TIMEOUT  = 30.0
+INPUTS = ["age", "avg_glucose_level", "heart_disease", "hypertension", "ever_married",
+          "smoking_status", "work_type", "gender"]
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS assessments (
+    id            INTEGER PRIMARY KEY,
+    user_token    TEXT NOT NULL,
+    created_at    REAL NOT NULL,
+    model_version TEXT NOT NULL,
+    age REAL, avg_glucose_level REAL,
+    {", ".join(f"{col} TEXT" for col in INPUTS[2:])},
+    probability   REAL NOT NULL,
+    shap          BLOB
+);
+CREATE INDEX IF NOT EXISTS assessments_user_time ON assessments (user_token, created_at);
+"""
+_FIELDS = ["user_token", "created_at", "model_version", *INPUTS, "probability", "shap"]
+_INSERT = f"INSERT INTO assessments ({', '.join(_FIELDS)}) VALUES ({', '.join('?' * len(_FIELDS))})"
+_ROLLUP_FIELDS = [_FIELDS.index(col) for col in ("created_at", "age", "gender", "smoking_status", "probability")]
+
+
+# ── Connections ──────────────────────────────────────────────────────────────
+def connect(path=None):
+    path = path or DB_PATH
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    conn.executescript(rollups.SCHEMA)
+    return conn
+
+
+_local = threading.local()
+
+
+def reader():
+    """One read connection per thread (page scripts run on several threads)."""
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(_local, "path", None) != DB_PATH:
+        conn = _local.conn = connect(DB_PATH)
+        _local.path = DB_PATH
+    return conn
+
+
+# ── Writer ───────────────────────────────────────────────────────────────────
+class Writer:
+    """Background thread inserting queued rows in batched transactions."""
+
+    def __init__(self, path=None):
+        self.path    = path
+        self.queue   = queue.Queue(QUEUE_MAX)
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self._pending = 0
+        self._idle   = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._thread.start()
+
+    def put(self, row):
+        with self._idle:
+            try:
+                self.queue.put_nowait(row)
+            except queue.Full:
+                self.dropped += 1
+                _LOGGER.warning("history queue full; assessment not recorded")
+                return
+            self._pending += 1
+
+    def flush(self, timeout=FLUSH_TIMEOUT):
+        """Wait until every queued row has been handled; False if that took longer than timeout."""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def close(self):
+        try:
+            self.queue.put(None, timeout=FLUSH_TIMEOUT)
+        except queue.Full:
+            _LOGGER.error("history writer did not drain its queue; %d assessment(s) not recorded", self._pending)
+        self._thread.join(timeout=10)
+
+    def _run(self):
+        conn = connect(self.path)
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + FLUSH_INTERVAL
+            while batch[-1] is not None and len(batch) < BATCH_MAX:
+                try:
+                    batch.append(self.queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            rows = [row for row in batch if row is not None]
+            try:
+                with conn:
+                    conn.executemany(_INSERT, rows)
+                    rollups.apply(conn, [[row[i] for i in _ROLLUP_FIELDS] for row in rows])
+                self.written += len(rows)
+                self.batches += 1
+            except sqlite3.Error:
+                _LOGGER.exception("history: failed to write %d assessments", len(rows))
+            with self._idle:
+                self._pending -= len(rows)
+                self._idle.notify_all()
+            if batch[-1] is None:
+                conn.close()
+                return
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = Writer()
+            atexit.register(_writer.close)
+        return _writer
+
+
+# ── API ──────────────────────────────────────────────────────────────────────
+def user_token(session_state, query_params):
+    """This visitor's history key: ?user=... if given, else a new random token kept for the session."""
+    if "user_token" not in session_state:
+        session_state.user_token = query_params.get("user") or secrets.token_urlsafe(16)
+    return session_state.user_token
+
+
+def record(token, user_data, prob, model_version, shap_values=None, created_at=None):
+    """Queue one assessment for writing; returns immediately."""
+    shap_blob = None if shap_values is None else np.asarray(shap_values, dtype=np.float32).tobytes()
+    writer().put((token, created_at or time.time(), model_version,
+                  *[user_data[col] for col in INPUTS], float(prob), shap_blob))
+
+
+def recent(token, limit=50, conn=None):
+    """The user's latest assessments, newest first, as a list of dicts."""
+    conn = conn or reader()
+    cur = conn.execute(f"SELECT created_at, model_version, {', '.join(INPUTS)}, probability, shap "
+                       "FROM assessments WHERE user_token = ? ORDER BY created_at DESC LIMIT ?", (token, limit))
+    names = [d[0] for d in cur.description]
+    out = []
+    for values in cur:
+        row = dict(zip(names, values))
+        row["shap"] = None if row["shap"] is None else np.frombuffer(row["shap"], dtype=np.float32)
+        out.append(row)
+    return out
+
+
+# ── Metrics ──────────────────────────────────────────────────────────────────
+metrics.describe("stroke_history_written_total", "counter", "Assessments written to the history store.")
+metrics.describe("stroke_history_dropped_total", "counter", "Assessments dropped because the write queue was full.")
+metrics.describe("stroke_history_queue_depth", "gauge", "Assessments waiting for the history writer.")
+metrics.describe("stroke_history_batches_total", "counter", "Write transactions committed by the history writer.")
+
+
+@metrics.provider
+def history_metrics():
+    if _writer is None:
+        return
+    yield metrics.Sample("stroke_history_written_total", _writer.written)
+    yield metrics.Sample("stroke_history_dropped_total", _writer.dropped)
+    yield metrics.Sample("stroke_history_queue_depth", _writer._pending)
+    yield metrics.Sample("stroke_history_batches_total", _writer.batches)
+
+
+# ── Benchmark ────────────────────────────────────────────────────────────────
+def _bench(rows, users):
+    global DB_PATH
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory(prefix="stroke-history-") as tmp:
+        DB_PATH = os.path.join(tmp, "history.sqlite3")
+        tokens = [secrets.token_urlsafe(16) for _ in range(users)]
+        form = {"age": 60.0, "avg_glucose_level": 120.0, "heart_disease": "No", "hypertension": "Yes",
+                "ever_married": "Yes", "smoking_status": "never smoked", "work_type": "Private", "gender": "Female"}
+        start = time.perf_counter()
+        for i in range(rows):
+            while writer().queue.qsize() >= QUEUE_MAX - 1:
+                time.sleep(0.001)     # the benchmark waits; pages never do
+            record(tokens[rng.integers(users)], form, 0.01, "bench", rng.random(11), created_at=1e9 + i)
+        queued = time.perf_counter() - start
+        writer().flush(timeout=None)
+        total = time.perf_counter() - start
+        print(f"{rows:,} assessments: queued in {queued:.2f} s ({queued / rows * 1e6:.1f} µs each), "
+              f"committed in {total:.2f} s ({rows / total:,.0f} rows/s, {writer().batches:,} transactions)")
+
+        timings = []
+        for token in tokens[:200]:
+            t = time.perf_counter()
+            recent(token)
+            timings.append(time.perf_counter() - t)
+        print(f"history read (50 newest of ~{rows // users} rows): median {np.median(timings) * 1000:.2f} ms, "
+              f"max {max(timings) * 1000:.2f} ms")
+        writer().close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time history writes and reads on a scratch database.")
+    parser.add_argument("--bench", type=int, metavar="ROWS", default=1_000_000)
+    parser.add_argument("--users", type=int, default=100_000)
+    args = parser.parse_args(argv)
+    _bench(args.bench, args.users)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,611 @@
+# jobqueue.py — resumable background jobs for batch scoring and SHAP explanation
+#
+# Jobs and their chunks live in a SQLite database (data/jobs.sqlite3, or
+# STROKE_JOBS_DB).  submit() cuts the input into line-aligned byte ranges of
+# about CHUNK_BYTES[kind] (parallel_score.split_ranges) and records one chunk
+# row per range.  Workers claim single chunks, write each chunk's output to
+# files of their own beside the job's output, and mark the chunk done: that row
+# is the checkpoint, and only a worker still holding the claim renames its
+# files into the chunk's part files, in the same transaction.  A chunk that raises goes back to the queue until it has been
+# tried MAX_ATTEMPTS times, which fails the job.  The worker that completes a
+# job's last chunk marks the job `merging` and commits, then concatenates the
+# parts into the output files outside any transaction, so other workers keep
+# claiming chunks while a large job is merged.
+#
+# A worker that dies leaves its chunk claimed.  The claim is taken over once its
+# lease (LEASE seconds) runs out, or at once by a worker on the same host that
+# finds the claiming process gone, so a restarted queue only redoes the chunks
+# that were in flight.  An interrupted merge is taken over the same way.
+#
+#   python -m jobqueue submit score patients.csv [-o scored.csv] [--no-band] [--cascade]
+#   python -m jobqueue submit explain patients.csv
+#   python -m jobqueue worker [--workers 4]
+#   python -m jobqueue status [JOB_ID]
+#   python -m jobqueue cancel JOB_ID | retry JOB_ID
+import argparse
+import atexit
+import contextlib
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import socket
+import sqlite3
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+import batch_score
+import metrics
+import parallel_score
+import stroke_model
+import uncertainty
+
+_LOGGER = logging.getLogger(__name__)
+
+DB_PATH      = os.environ.get("STROKE_JOBS_DB", os.path.join(os.path.dirname(__file__), "data", "jobs.sqlite3"))
+UPLOAD_DIR   = os.path.join(os.path.dirname(os.path.abspath(DB_PATH)), "job-files")
+KINDS        = ("score", "explain")
+CHUNK_BYTES  = {"score": 4 << 20, "explain": 256 << 10}   # SHAP is ~1,000x slower per row than scoring
+MAX_ATTEMPTS = 3
+RETRY_DELAY  = 5.0         # seconds before a failed chunk is retried, doubling per attempt
+LEASE        = 600.0       # seconds a claimed chunk is reserved for its worker
+POLL         = 1.0
+THROUGHPUT_WINDOW = 300.0
+SHAP_COLUMNS = [f"shap_{name}" for name in stroke_model.FEATURES] + ["shap_age_sq", "shap_age_glucose",
+                                                                      "shap_glucose_sq"]
+ACTIVE = ("queued", "running")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id          INTEGER PRIMARY KEY,
+    kind        TEXT NOT NULL,
+    input_path  TEXT NOT NULL,
+    output_path TEXT NOT NULL,
+    reject_path TEXT NOT NULL,
+    params      TEXT NOT NULL DEFAULT '{}',
+    state       TEXT NOT NULL,             -- queued, running, merging, done, failed, cancelled
+    error       TEXT,
+    worker      TEXT,                      -- merging: the worker joining the part files
+    lease_until REAL,
+    created_at  REAL NOT NULL,
+    started_at  REAL,
+    finished_at REAL
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    job_id      INTEGER NOT NULL REFERENCES jobs (id),
+    chunk       INTEGER NOT NULL,
+    start_byte  INTEGER NOT NULL,
+    end_byte    INTEGER NOT NULL,
+    state       TEXT NOT NULL DEFAULT 'pending',   -- pending, running, done
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    worker      TEXT,
+    lease_until REAL,
+    rows INTEGER, scored INTEGER, rejected INTEGER,
+    escalated   INTEGER,                   -- cascade jobs: rows the screener passed to the model
+    seconds     REAL,
+    finished_at REAL,
+    error       TEXT,
+    PRIMARY KEY (job_id, chunk)
+);
+CREATE INDEX IF NOT EXISTS chunks_state ON chunks (state, job_id, chunk);
+CREATE INDEX IF NOT EXISTS chunks_finished ON chunks (finished_at);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state);
+"""
+
+
+# ── Database ─────────────────────────────────────────────────────────────────
+def connect(path=None):
+    path = path or DB_PATH
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    # columns added after the first release
+    for table, name, kind in (("jobs", "worker", "TEXT"), ("jobs", "lease_until", "REAL"),
+                              ("chunks", "escalated", "INTEGER")):
+        if name not in {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {kind}")
+    return conn
+
+
+@contextlib.contextmanager
+def _transaction(conn):
+    """A write transaction that takes the database lock up front (no upgrade deadlocks)."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+@contextlib.contextmanager
+def _connection(conn=None):
+    """conn itself, or a new connection that is closed again on exit."""
+    if conn is not None:
+        yield conn
+        return
+    conn = connect()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def part_paths(job, chunk):
+    parts = job["output_path"] + ".parts"
+    return os.path.join(parts, f"{chunk:05d}.csv"), os.path.join(parts, f"{chunk:05d}.rejects")
+
+
+def staged_paths(job, chunk, worker):
+    """Where worker writes a chunk's part files before complete() publishes them."""
+    return tuple(f"{path}.{worker}.tmp" for path in part_paths(job, chunk))
+
+
+def output_columns(job, header):
+    params = json.loads(job["params"])
+    if job["kind"] == "explain":
+        return batch_score.output_columns(header, band=False) + SHAP_COLUMNS
+    return batch_score.output_columns(header, params.get("band", True), params.get("cascade", False))
+
+
+# ── Submitting and managing jobs ─────────────────────────────────────────────
+def submit(kind, input_path, output_path=None, reject_path=None, band=True, conn=None, cascade=False):
+    """Queue a job over input_path; returns its id.  cascade applies to score jobs."""
+    if kind not in KINDS:
+        raise ValueError(f"unknown job kind {kind!r}; expected one of {', '.join(KINDS)}")
+    input_path = os.path.abspath(input_path)
+    default_out, default_rej = batch_score.default_paths(input_path)
+    if kind == "explain":
+        default_out = default_out.replace(".scored.csv", ".explained.csv")
+    size    = os.path.getsize(input_path)
+    ranges  = parallel_score.split_ranges(input_path, max(1, -(-size // CHUNK_BYTES[kind])))
+    with _connection(conn) as conn, _transaction(conn):
+        job_id = conn.execute(
+            "INSERT INTO jobs (kind, input_path, output_path, reject_path, params, state, created_at) "
+            "VALUES (?, ?, ?, ?, ?, 'queued', ?)",
+            (kind, input_path, os.path.abspath(output_path or default_out),
+             os.path.abspath(reject_path or default_rej),
+             json.dumps({"band": band, "cascade": cascade and kind == "score"}), time.time())).lastrowid
+        conn.executemany("INSERT INTO chunks (job_id, chunk, start_byte, end_byte) VALUES (?, ?, ?, ?)",
+                         [(job_id, i, lo, hi) for i, (lo, hi) in enumerate(ranges)])
+    return job_id
+
+
+def cancel(job_id, conn=None):
+    with _connection(conn) as conn, _transaction(conn):
+        conn.execute("UPDATE jobs SET state = 'cancelled', finished_at = ? WHERE id = ? AND state IN (?, ?)",
+                     (time.time(), job_id, *ACTIVE))
+
+
+def retry(job_id, conn=None):
+    """Requeue a failed or cancelled job; chunks already done are kept."""
+    with _connection(conn) as conn, _transaction(conn):
+        conn.execute("UPDATE chunks SET state = 'pending', attempts = 0, worker = NULL, lease_until = NULL, error = NULL "
+                     "WHERE job_id = ? AND state != 'done'", (job_id,))
+        conn.execute("UPDATE jobs SET state = 'queued', error = NULL, finished_at = NULL "
+                     "WHERE id = ? AND state IN ('failed', 'cancelled')", (job_id,))
+
+
+def jobs(limit=100, conn=None):
+    """Recent jobs with chunk progress, newest first."""
+    with _connection(conn) as conn:
+        rows = conn.execute("""
+            SELECT j.*, COUNT(c.chunk) AS chunks,
+                   SUM(c.state = 'done') AS chunks_done,
+                   COALESCE(SUM(c.rows), 0) AS rows, COALESCE(SUM(c.scored), 0) AS scored,
+                   COALESCE(SUM(c.rejected), 0) AS rejected, SUM(c.escalated) AS escalated
+            FROM jobs j LEFT JOIN chunks c ON c.job_id = j.id
+            GROUP BY j.id ORDER BY j.id DESC LIMIT ?""", (limit,))
+        return [dict(row) for row in rows]
+
+
+def job(job_id, conn=None):
+    with _connection(conn) as conn:
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return None if row is None else dict(row)
+
+
+# ── Claiming and checkpointing chunks ────────────────────────────────────────
+def worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _process_gone(worker):
+    host, _, pid = (worker or "").rpartition(":")
+    if host != socket.gethostname() or not pid.isdigit():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        return False
+    return False
+
+
+def recover(conn):
+    """Release chunks and merges claimed by processes on this host that no longer exist."""
+    claimed = conn.execute("SELECT job_id, chunk, worker FROM chunks WHERE state = 'running'").fetchall()
+    dead = [(row["job_id"], row["chunk"], row["worker"]) for row in claimed if _process_gone(row["worker"])]
+    merging = conn.execute("SELECT id, worker FROM jobs WHERE state = 'merging'").fetchall()
+    dead_merges = [(row["id"], row["worker"]) for row in merging if _process_gone(row["worker"])]
+    if dead or dead_merges:
+        with _transaction(conn):
+            conn.executemany("UPDATE chunks SET state = 'pending', worker = NULL "
+                             "WHERE job_id = ? AND chunk = ? AND worker = ?", dead)
+            conn.executemany("UPDATE jobs SET lease_until = NULL WHERE id = ? AND worker = ? AND state = 'merging'",
+                             dead_merges)
+        _LOGGER.info("recovered %d chunk(s) and %d merge(s) from stopped workers", len(dead), len(dead_merges))
+    return len(dead) + len(dead_merges)
+
+
+def claim(conn, worker, now=None):
+    """Reserve the next runnable chunk for worker; returns (job, chunk row) or None."""
+    now = now or time.time()
+    with _transaction(conn):
+        while True:
+            row = conn.execute("""
+                SELECT c.* FROM chunks c JOIN jobs j ON j.id = c.job_id
+                WHERE j.state IN (?, ?)
+                  AND c.state IN ('pending', 'running') AND COALESCE(c.lease_until, 0) < ?
+                ORDER BY c.job_id, c.chunk LIMIT 1""", (*ACTIVE, now)).fetchone()
+            if row is None:
+                return None
+            if row["attempts"] >= MAX_ATTEMPTS:
+                conn.execute("UPDATE jobs SET state = 'failed', finished_at = ?, error = ? WHERE id = ?",
+                             (now, f"chunk {row['chunk']} failed {row['attempts']} times: {row['error']}",
+                              row["job_id"]))
+                continue
+            conn.execute("UPDATE chunks SET state = 'running', worker = ?, lease_until = ?, attempts = attempts + 1 "
+                         "WHERE job_id = ? AND chunk = ?", (worker, now + LEASE, row["job_id"], row["chunk"]))
+            conn.execute("UPDATE jobs SET state = 'running', started_at = COALESCE(started_at, ?) "
+                         "WHERE id = ? AND state = 'queued'", (now, row["job_id"]))
+            job_row = conn.execute("SELECT * FROM jobs WHERE id = ?", (row["job_id"],)).fetchone()
+            return dict(job_row), dict(row)
+
+
+def complete(conn, job, chunk, worker, stats, seconds):
+    """Checkpoint a finished chunk and publish its part files; the last one merges the job's outputs.
+
+    False if the claim was lost (its lease ran out and another worker took the
+    chunk): this worker's files are discarded and the other's are kept.
+    """
+    now = time.time()
+    staged = staged_paths(job, chunk["chunk"], worker)
+    with _transaction(conn):
+        updated = conn.execute(
+            "UPDATE chunks SET state = 'done', rows = ?, scored = ?, rejected = ?, escalated = ?, seconds = ?, "
+            "finished_at = ?, lease_until = NULL, error = NULL "
+            "WHERE job_id = ? AND chunk = ? AND worker = ? AND state = 'running'",
+            (stats["rows"], stats["scored"], stats["rejected"], stats.get("escalated"), seconds, now,
+             job["id"], chunk["chunk"], worker)).rowcount
+        if not updated:
+            for path in staged:
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(path)
+            return False
+        for path, final in zip(staged, part_paths(job, chunk["chunk"])):
+            os.replace(path, final)
+        left = conn.execute("SELECT COUNT(*) FROM chunks WHERE job_id = ? AND state != 'done'",
+                            (job["id"],)).fetchone()[0]
+        last = left == 0 and conn.execute(
+            "UPDATE jobs SET state = 'merging', worker = ?, lease_until = ? WHERE id = ? AND state = 'running'",
+            (worker, now + LEASE, job["id"])).rowcount
+    if last:
+        finalise(conn, job, worker)
+    return True
+
+
+def fail(conn, job, chunk, worker, error):
+    """Put a failed chunk back for a later retry, or fail the job after MAX_ATTEMPTS tries."""
+    tries = chunk["attempts"] + 1          # the claimed row predates the claim's increment
+    now = time.time()
+    with _transaction(conn):
+        conn.execute("UPDATE chunks SET state = 'pending', worker = NULL, lease_until = ?, error = ? "
+                     "WHERE job_id = ? AND chunk = ? AND worker = ?",
+                     (now + RETRY_DELAY * 2 ** (tries - 1), error, job["id"], chunk["chunk"], worker))
+        if tries >= MAX_ATTEMPTS:
+            conn.execute("UPDATE jobs SET state = 'failed', finished_at = ?, error = ? WHERE id = ? AND state = 'running'",
+                         (now, f"chunk {chunk['chunk']} failed {tries} times: {error}", job["id"]))
+
+
+_UNMERGED = """
+    FROM jobs j
+    WHERE (j.state IN (?, ?) OR (j.state = 'merging' AND COALESCE(j.lease_until, 0) < ?))
+      AND NOT EXISTS (SELECT 1 FROM chunks c WHERE c.job_id = j.id AND c.state != 'done')"""
+
+
+def claim_merge(conn, worker, now=None):
+    """Take over a job whose chunks are all done but whose outputs were never merged
+    (its merging worker stopped, or a failed merge was retried); returns the job or None."""
+    now = now or time.time()
+    with _transaction(conn):
+        row = conn.execute(f"SELECT j.* {_UNMERGED} ORDER BY j.id LIMIT 1", (*ACTIVE, now)).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE jobs SET state = 'merging', worker = ?, lease_until = ? WHERE id = ?",
+                     (worker, now + LEASE, row["id"]))
+    return dict(row)
+
+
+def finalise(conn, job, worker):
+    """Join a merging job's part files into its outputs, then mark it done.
+
+    Runs outside any transaction: the `merging` state is the job's lock, so
+    other workers keep claiming chunks meanwhile.  The outputs are written
+    beside their final paths and renamed into place, so a takeover after a
+    crash starts from the untouched parts.
+    """
+    try:
+        n = conn.execute("SELECT COUNT(*) FROM chunks WHERE job_id = ?", (job["id"],)).fetchone()[0]
+        header = batch_score.read_header(job["input_path"])
+        parts = [part_paths(job, i) for i in range(n)]
+        tmp = f".{os.getpid()}.tmp"
+        parallel_score.merge([p[0] for p in parts], output_columns(job, header), job["output_path"] + tmp)
+        parallel_score.merge([p[1] for p in parts], batch_score.reject_columns(header), job["reject_path"] + tmp)
+        os.replace(job["output_path"] + tmp, job["output_path"])
+        os.replace(job["reject_path"] + tmp, job["reject_path"])
+    except Exception as exc:
+        _LOGGER.exception("job %s: merging its outputs failed", job["id"])
+        with _transaction(conn):
+            conn.execute("UPDATE jobs SET state = 'failed', finished_at = ?, error = ?, worker = NULL, "
+                         "lease_until = NULL WHERE id = ? AND state = 'merging' AND worker = ?",
+                         (time.time(), f"merge failed: {type(exc).__name__}: {exc}", job["id"], worker))
+        return False
+    with _transaction(conn):
+        done = conn.execute("UPDATE jobs SET state = 'done', finished_at = ?, worker = NULL, lease_until = NULL "
+                            "WHERE id = ? AND state = 'merging' AND worker = ?",
+                            (time.time(), job["id"], worker)).rowcount
+    if done:
+        shutil.rmtree(job["output_path"] + ".parts", ignore_errors=True)
+    return bool(done)
+
+
+def outstanding(conn):
+    """Chunks of queued or running jobs that are not done yet, plus jobs waiting to be merged."""
+    chunks = conn.execute("SELECT COUNT(*) FROM chunks c JOIN jobs j ON j.id = c.job_id "
+                          "WHERE j.state IN (?, ?) AND c.state != 'done'", ACTIVE).fetchone()[0]
+    merges = conn.execute("SELECT COUNT(*) FROM jobs WHERE state = 'merging' OR (state IN (?, ?) AND NOT EXISTS "
+                          "(SELECT 1 FROM chunks c WHERE c.job_id = jobs.id AND c.state != 'done'))",
+                          ACTIVE).fetchone()[0]
+    return chunks + merges
+
+
+# ── Running chunks ───────────────────────────────────────────────────────────
+class Runner:
+    """Per-process model state, loaded on first use."""
+
+    def __init__(self):
+        self.model = stroke_model.load_model()
+        self._leaf_table = self._explainer = self._screener = None
+
+    @property
+    def leaf_table(self):
+        if self._leaf_table is None:
+            self._leaf_table = uncertainty.LeafTable(self.model)
+        return self._leaf_table
+
+    @property
+    def screener(self):
+        if self._screener is None:
+            self._screener = batch_score.load_screener()
+        return self._screener
+
+    @property
+    def explainer(self):
+        if self._explainer is None:
+            import shap
+            self._explainer = shap.TreeExplainer(self.model)
+        return self._explainer
+
+    def run(self, job, chunk, worker):
+        """Write one chunk's output to worker's staged files (see complete()); returns its counts."""
+        out_path, reject_path = staged_paths(job, chunk["chunk"], worker)
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        header = batch_score.read_header(job["input_path"])
+        blocks = batch_score.read_blocks(job["input_path"], batch_score.CHUNK_ROWS,
+                                         chunk["start_byte"], chunk["end_byte"])
+        with open(out_path, "w", newline="") as out, open(reject_path, "w", newline="") as rejects:
+            if job["kind"] == "explain":
+                stats = batch_score.score_blocks(self.model, header, blocks, out, rejects, write_header=False,
+                                                 score=self.explain_frame, columns=output_columns(job, header))
+            else:
+                params = json.loads(job["params"])
+                stats = batch_score.score_blocks(self.model, header, blocks, out, rejects,
+                                                 self.leaf_table if params.get("band", True) else None,
+                                                 write_header=False,
+                                                 screener=self.screener if params.get("cascade") else None)
+        return stats
+
+    def explain_frame(self, frame):
+        """score_frame() with one SHAP value column per model input instead of the stability band."""
+        X_raw, valid, reasons = batch_score.prepare(frame)
+        scored = frame[valid].copy()
+        if len(X_raw):
+            X_scaled = stroke_model.transform(X_raw)
+            probs = self.model.predict_proba(X_scaled)[:, 1]
+            scored["stroke_risk"] = probs
+            scored["risk_band"] = stroke_model.risk_bands(probs)
+            sv = self.explainer.shap_values(X_scaled)
+            sv = np.asarray(sv[1] if isinstance(sv, list) else sv)
+            for i, col in enumerate(SHAP_COLUMNS):
+                scored[col] = sv[:, i]
+        rejected = frame[~valid].copy()
+        rejected["reject_reason"] = reasons[~valid]
+        return scored, rejected
+
+
+def _retry_busy(fn, *args, attempts=5):
+    """fn(*args), retried while the database stays locked past its busy timeout."""
+    for attempt in range(attempts):
+        try:
+            return fn(*args)
+        except sqlite3.OperationalError:
+            if attempt == attempts - 1:
+                raise
+            _LOGGER.warning("job database busy in %s; retrying", fn.__name__)
+            time.sleep(POLL * 2 ** attempt)
+
+
+def work_once(conn, worker, runner):
+    """Run one chunk or one pending merge; False if there was nothing to do."""
+    claimed = claim(conn, worker)
+    if claimed is None:
+        merge = claim_merge(conn, worker)
+        if merge is None:
+            return False
+        finalise(conn, merge, worker)
+        return True
+    job_row, chunk = claimed
+    start = time.perf_counter()
+    try:
+        stats = runner.run(job_row, chunk, worker)
+        # the files are written: keep trying to checkpoint them rather than redo the chunk
+        _retry_busy(complete, conn, job_row, chunk, worker, stats, time.perf_counter() - start)
+    except sqlite3.OperationalError:
+        raise
+    except Exception as exc:
+        _LOGGER.exception("job %s chunk %s failed", job_row["id"], chunk["chunk"])
+        _retry_busy(fail, conn, job_row, chunk, worker, f"{type(exc).__name__}: {exc}")
+    return True
+
+
+def work(stop_when_idle=False, poll=POLL):
+    """Claim and run chunks until interrupted (or until the queue is empty)."""
+    conn, me = connect(), worker_id()
+    runner = Runner()
+    idle = True
+    while True:
+        try:
+            if idle:
+                recover(conn)
+            idle = not work_once(conn, me, runner)
+            if not idle:
+                continue
+            if stop_when_idle and not outstanding(conn):
+                return
+        except sqlite3.OperationalError:
+            # a busy or briefly unavailable database must not end the worker
+            _LOGGER.warning("job database unavailable; retrying in %.0f s", poll, exc_info=True)
+        time.sleep(poll)
+
+
+def run_pool(workers, stop_when_idle=False):
+    """Run `workers` worker processes and wait for them."""
+    if workers <= 1:
+        return work(stop_when_idle)
+    procs = [multiprocessing.Process(target=work, args=(stop_when_idle,), name=f"jobqueue-{i}")
+             for i in range(workers)]
+    for proc in procs:
+        proc.start()
+    try:
+        for proc in procs:
+            proc.join()
+    except KeyboardInterrupt:
+        for proc in procs:
+            proc.terminate()
+
+
+def spawn_workers(workers):
+    """Start `python -m jobqueue worker` as a child process (stopped when this process exits)."""
+    proc = subprocess.Popen([sys.executable, "-m", "jobqueue", "worker", "--workers", str(workers)],
+                            cwd=stroke_model.BASE_DIR)
+    atexit.register(proc.terminate)
+    return proc
+
+
+def save_upload(upload, name):
+    """Copy a file-like upload into UPLOAD_DIR, where it outlives restarts; returns its path."""
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    path = os.path.join(UPLOAD_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{os.path.basename(name)}")
+    with open(path + ".tmp", "wb") as f:
+        shutil.copyfileobj(upload, f, 1 << 20)
+    os.replace(path + ".tmp", path)
+    return path
+
+
+# ── Metrics ──────────────────────────────────────────────────────────────────
+metrics.describe("stroke_jobqueue_jobs", "gauge", "Jobs in the background queue by state.")
+metrics.describe("stroke_jobqueue_chunks", "gauge", "Chunks of queued or running jobs by state.")
+metrics.describe("stroke_jobqueue_rows_total", "counter", "Rows processed by background jobs.")
+metrics.describe("stroke_jobqueue_rows_per_second", "gauge",
+                 f"Rows processed per second by background jobs over the last {THROUGHPUT_WINDOW:.0f} s.")
+
+
+@metrics.provider
+def jobqueue_metrics():
+    if not os.path.exists(DB_PATH):
+        return
+    conn = connect()
+    try:
+        counts = dict(conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall())
+        for state in ("queued", "running", "merging", "done", "failed", "cancelled"):
+            yield metrics.Sample("stroke_jobqueue_jobs", counts.get(state, 0), {"state": state})
+        chunks = dict(conn.execute("SELECT c.state, COUNT(*) FROM chunks c JOIN jobs j ON j.id = c.job_id "
+                                   "WHERE j.state IN (?, ?) GROUP BY c.state", ACTIVE).fetchall())
+        for state in ("pending", "running", "done"):
+            yield metrics.Sample("stroke_jobqueue_chunks", chunks.get(state, 0), {"state": state})
+        total, = conn.execute("SELECT COALESCE(SUM(rows), 0) FROM chunks WHERE state = 'done'").fetchone()
+        yield metrics.Sample("stroke_jobqueue_rows_total", total)
+        recent, = conn.execute("SELECT COALESCE(SUM(rows), 0) FROM chunks WHERE finished_at >= ?",
+                               (time.time() - THROUGHPUT_WINDOW,)).fetchone()
+        yield metrics.Sample("stroke_jobqueue_rows_per_second", recent / THROUGHPUT_WINDOW)
+    finally:
+        conn.close()
+
+
+# ── CLI ──────────────────────────────────────────────────────────────────────
+def _print_jobs(rows):
+    for row in rows:
+        done = f"{row['chunks_done'] or 0}/{row['chunks']}"
+        print(f"{row['id']:5d}  {row['kind']:<8} {row['state']:<10} chunks {done:>9}  "
+              f"{row['rows']:>10,} rows  {row['rejected']:>8,} rejected  "
+              + (f"{row['escalated']:,} escalated  " if row["escalated"] is not None else "")
+              + row["input_path"]
+              + (f"\n       {row['error']}" if row["error"] else ""))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resumable background scoring and explanation jobs.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("submit", help="queue a job")
+    p.add_argument("kind", choices=KINDS)
+    p.add_argument("input")
+    p.add_argument("-o", "--output")
+    p.add_argument("--rejects")
+    p.add_argument("--no-band", action="store_true", help="score jobs: skip the risk_low/risk_high columns")
+    p.add_argument("--cascade", action="store_true", help="score jobs: use the cascade screener (see cascade.py)")
+    p = sub.add_parser("worker", help="run workers until interrupted")
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    p.add_argument("--until-idle", action="store_true", help="exit once no chunk is left to run")
+    p = sub.add_parser("status", help="list jobs")
+    p.add_argument("job_id", type=int, nargs="?")
+    for name in ("cancel", "retry"):
+        sub.add_parser(name).add_argument("job_id", type=int)
+    args = parser.parse_args(argv)
+
+    if args.command == "submit":
+        job_id = submit(args.kind, args.input, args.output, args.rejects, band=not args.no_band,
+                        cascade=args.cascade)
+        print(f"queued job {job_id}")
+    elif args.command == "worker":
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(processName)s %(message)s")
+        run_pool(args.workers, args.until_idle)
+    elif args.command == "status":
+        rows = jobs()
+        _print_jobs([r for r in rows if args.job_id in (None, r["id"])])
+    else:
+        {"cancel": cancel, "retry": retry}[args.command](args.job_id)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
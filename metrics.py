@@ -0,0 +1,66 @@
+# metrics.py — Prometheus text metrics served at /metrics on the status server
+#
+# Modules register a provider returning Sample tuples; every scrape calls all
+# providers, so a provider should only read state it already maintains.
+import logging
+from collections import namedtuple
+
+import status_server
+
+_LOGGER = logging.getLogger(__name__)
+
+Sample = namedtuple("Sample", "name value labels", defaults=(None,))
+
+PROVIDERS = []
+_META     = {}
+
+
+def describe(name, kind, help_text):
+    """Declare a metric's type ("gauge" or "counter") and help text."""
+    _META[name] = (kind, help_text)
+
+
+def provider(fn):
+    """Register `fn() -> iterable of Sample`; usable as a decorator."""
+    PROVIDERS.append(fn)
+    return fn
+
+
+def collect():
+    samples = []
+    for fn in PROVIDERS:
+        try:
+            samples.extend(fn())
+        except Exception:
+            _LOGGER.exception("metrics provider %s failed", getattr(fn, "__name__", fn))
+    return samples
+
+
+def _label_str(labels):
+    if not labels:
+        return ""
+    parts = []
+    for key, value in sorted(labels.items()):
+        value = str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def render(samples=None):
+    """Samples in the Prometheus text exposition format."""
+    samples = collect() if samples is None else samples
+    lines, seen = [], set()
+    for sample in sorted(samples, key=lambda s: s.name):
+        if sample.name not in seen:
+            seen.add(sample.name)
+            kind, help_text = _META.get(sample.name, ("gauge", ""))
+            if help_text:
+                lines.append(f"# HELP {sample.name} {help_text}")
+            lines.append(f"# TYPE {sample.name} {kind}")
+        lines.append(f"{sample.name}{_label_str(sample.labels)} {float(sample.value):.17g}")
+    return "\n".join(lines) + "\n"
+
+
+@status_server.route("/metrics")
+def metrics_endpoint():
+    return 200, "text/plain; version=0.0.4", render()
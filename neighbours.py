@@ -0,0 +1,81 @@
+# neighbours.py — observed stroke rate among the most similar reference records
+#
+# build_index() puts every record of pages/stroke_dataset.csv that the
+# assessment form can describe into a KD-tree over the model's scaled feature
+# space (stroke_model.transform), and persists the tree together with the
+# records' stroke outcomes under artifacts/neighbours/<dataset hash>/.  A query
+# is a single tree lookup, so its cost grows with log(n) rather than with the
+# size of the registry.
+#
+#   python -m neighbours            # (re)build the index for the current dataset
+import hashlib
+import os
+import time
+
+import joblib
+import numpy as np
+from sklearn.neighbors import KDTree
+
+import stroke_model
+
+K         = int(os.environ.get("STROKE_NEIGHBOURS_K", "50"))
+LEAF_SIZE = 40
+
+
+def _transform_fingerprint():
+    # the tree lives in the scaled space, so new scaler constants need a new tree
+    return hashlib.sha256(stroke_model.SCALER_MEAN.tobytes() + stroke_model.SCALER_SCALE.tobytes()).hexdigest()
+
+
+def index_path(dataset_sha=None):
+    dataset_sha = dataset_sha or stroke_model.dataset_hash()
+    key = f"{dataset_sha[:16]}-{_transform_fingerprint()[:8]}"
+    return os.path.join(stroke_model.ARTIFACTS_DIR, "neighbours", key, "kdtree.joblib")
+
+
+def build_index(df=None, dataset_sha=None):
+    """Build and persist the KD-tree; returns the file it was written to."""
+    df = stroke_model.form_answers(df if df is not None else stroke_model.load_dataset())
+    X  = stroke_model.transform(stroke_model.encode_frame(df))
+    index = {
+        "tree": KDTree(X, leaf_size=LEAF_SIZE),
+        "stroke": df["stroke"].to_numpy(dtype=np.int8),
+    }
+    out = index_path(dataset_sha)
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    tmp = out + ".tmp"
+    joblib.dump(index, tmp)
+    os.replace(tmp, out)
+    return out
+
+
+def load_index(dataset_sha=None):
+    """{"tree": KDTree, "stroke": outcomes}, building the index if it is missing."""
+    path = index_path(dataset_sha)
+    if not os.path.exists(path):
+        build_index(dataset_sha=dataset_sha)
+    return joblib.load(path)
+
+
+def neighbour_rate(index, X_raw, k=K):
+    """Stroke rate among the k nearest records to one raw feature row."""
+    k = min(k, len(index["stroke"]))
+    dist, ind = index["tree"].query(stroke_model.transform(X_raw), k=k)
+    return {
+        "k": k,
+        "strokes": int(index["stroke"][ind[0]].sum()),
+        "rate": float(index["stroke"][ind[0]].mean()),
+        "max_distance": float(dist[0, -1]),
+    }
+
+
+if __name__ == "__main__":
+    out = build_index()
+    index = load_index()
+    query = stroke_model.random_raw(1_000, seed=0)
+    start = time.perf_counter()
+    for row in query:
+        neighbour_rate(index, row)
+    per_query = (time.perf_counter() - start) / len(query)
+    print(f"neighbour index written to {out}")
+    print(f"  {len(index['stroke'])} records, k={K}, {per_query * 1e6:.0f} µs per query")
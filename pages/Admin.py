@@ -0,0 +1,93 @@
+import pandas as pd
+import streamlit as st
+
+import access
+import diagnostics
+import drift
+import profiling
+
+# Opt-in profiling (STROKE_PROFILE=1 or ?profile=<secret>); see profiling.py
+if profiling.profile_page(__file__, globals()):
+    st.stop()
+
+# ── Page config & CSS ─────────────────────────────────────────────────────────
+st.set_page_config(page_title="Stroke Risk Admin", layout="wide")
+st.markdown("""
+    <style>
+      #MainMenu, footer, header {visibility: hidden;}
+      [data-testid="stSidebar"], [data-testid="collapsedControl"] {display: none;}
+    </style>
+""", unsafe_allow_html=True)
+
+st.title("🛠️ Admin Diagnostics")
+access.require_admin()
+
+
+def mb(n):
+    return None if n is None else n / 2**20
+
+
+# ── Process memory ────────────────────────────────────────────────────────────
+report = diagnostics.memory_report()
+proc   = report["process"]
+col1, col2, col3 = st.columns(3)
+col1.metric("Process RSS", f"{mb(proc['rss']):.1f} MB" if proc["rss"] else "n/a")
+col2.metric("Peak RSS", f"{mb(proc['peak_rss']):.1f} MB" if proc["peak_rss"] else "n/a")
+col3.metric("Live sessions", len(report["sessions"]))
+
+# ── Caches ────────────────────────────────────────────────────────────────────
+st.subheader("📦 Cache entries")
+if report["caches"]:
+    caches = pd.DataFrame(report["caches"])
+    caches["MB"] = caches.pop("bytes").map(mb).round(3)
+    st.dataframe(caches, hide_index=True)
+else:
+    st.info("No st.cache_resource / st.cache_data entries yet.")
+
+# ── Sessions ──────────────────────────────────────────────────────────────────
+st.subheader("👥 Session state per session")
+if report["sessions"]:
+    sessions = pd.DataFrame(report["sessions"])
+    sessions["KB"] = (sessions.pop("bytes") / 1024).round(1)
+    sessions["largest_KB"] = (sessions.pop("largest_bytes") / 1024).round(1)
+    st.dataframe(sessions, hide_index=True)
+else:
+    st.info("No live sessions found.")
+
+# ── tracemalloc ───────────────────────────────────────────────────────────────
+st.subheader("🔬 Top allocators (tracemalloc)")
+tm = report["tracemalloc"]
+if tm["tracing"]:
+    current, peak = tm["traced"]
+    st.write(f"Traced: **{mb(current):.1f} MB** now, **{mb(peak):.1f} MB** peak.")
+    if tm["top"]:
+        top = pd.DataFrame(tm["top"])
+        top["KB"] = (top.pop("bytes") / 1024).round(1)
+        st.dataframe(top, hide_index=True)
+    if st.button("Stop tracing"):
+        diagnostics.stop_tracing()
+        st.rerun()
+else:
+    st.write("tracemalloc is off. Tracing slows allocation-heavy code; enable it only while investigating.")
+    if st.button("Start tracing"):
+        diagnostics.start_tracing()
+        st.rerun()
+
+# ── Input drift ───────────────────────────────────────────────────────────────
+st.subheader("📉 Input drift")
+clicked = st.button("Evaluate drift now")
+drift_report = drift.MONITOR.report
+if clicked or drift_report is None:
+    drift_report = drift.MONITOR.evaluate()
+st.write(f"**{drift_report['rows']:,}** submitted assessments against {drift_report['reference_rows']:,} "
+         f"reference rows; evaluated {pd.Timestamp(drift_report['at'], unit='s'):%Y-%m-%d %H:%M:%S} UTC.")
+if drift_report["features"]:
+    table = pd.DataFrame.from_dict(drift_report["features"], orient="index").rename_axis("feature").reset_index()
+    st.dataframe(table.round(3), hide_index=True)
+    st.caption(f"PSI below {drift.PSI_WARN} is stable, {drift.PSI_WARN}–{drift.PSI_ALERT} worth watching and "
+               f"above {drift.PSI_ALERT} a significant shift from stroke_dataset.csv. Mean shift is in training "
+               "standard deviations (stroke_model.SCALER_MEAN / SCALER_SCALE).")
+else:
+    st.info(f"Drift scores need at least {drift.MIN_ROWS} submitted assessments.")
+
+st.caption("The same figures are exported as Prometheus metrics at /metrics on the status port.")
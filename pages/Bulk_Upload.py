@@ -0,0 +1,109 @@
+import functools
+
+import streamlit as st
+
+import batch_score
+import bulk_upload
+import profiling
+import resources
+
+# Opt-in profiling (STROKE_PROFILE=1 or ?profile=<secret>); see profiling.py
+if profiling.profile_page(__file__, globals()):
+    st.stop()
+
+# ── Page config & CSS ─────────────────────────────────────────────────────────
+st.set_page_config(page_title="Stroke Risk Bulk Upload", layout="wide")
+st.markdown("""
+    <style>
+      #MainMenu, footer, header {visibility: hidden;}
+      [data-testid="stSidebar"], [data-testid="collapsedControl"] {display: none;}
+      .custom-nav {
+        background: #e8f5e9; padding: 15px 0; border-radius: 10px;
+        display: flex; justify-content: center; gap: 60px; margin-bottom: 30px;
+        font-size: 18px; font-weight: 600;
+      }
+      .custom-nav a { text-decoration: none; color: #4C9D70; }
+      .custom-nav a:hover { color: #388e3c; text-decoration: underline; }
+    </style>
+""", unsafe_allow_html=True)
+
+# ── Title & Navbar ─────────────────────────────────────────────────────────────
+st.title("📂 Bulk Upload")
+st.markdown("""
+  <div class="custom-nav">
+    <a href='/Home'>Home</a>
+    <a href='/Risk_Assessment'>Risk Assessment</a>
+    <a href='/Results'>Results</a>
+    <a href='/Recommendations'>Recommendations</a>
+  </div>
+""", unsafe_allow_html=True)
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def show_progress(snap):
+    st.progress(snap["progress"], text=f"{snap['state'].capitalize()} · {snap['progress']:.0%} of "
+                                        f"{snap['name']} · {snap['elapsed']:.0f} s")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Rows read", f"{snap['rows']:,}")
+    col2.metric("Scored", f"{snap['scored']:,}")
+    col3.metric("Rejected", f"{snap['rejected']:,}")
+    if snap["bands"]:
+        st.write("Risk bands so far: " + ", ".join(f"**{band}** {snap['bands'].get(band, 0):,}"
+                                                   for band in ("low", "moderate", "high")))
+    if snap["preview"] is not None and len(snap["preview"]):
+        st.caption(f"First {len(snap['preview'])} scored rows")
+        st.dataframe(snap["preview"], hide_index=True, height=300)
+
+
+@st.fragment(run_every=1.0)
+def poll(job):
+    snap = job.snapshot()
+    show_progress(snap)
+    if snap["state"] not in ("queued", "running"):
+        st.rerun()              # leave the polling fragment once the job has ended
+    if st.button("Cancel"):
+        job.cancel()
+
+
+# ── Current job ───────────────────────────────────────────────────────────────
+job = bulk_upload.get(st.session_state.get("bulk_job", ""))
+if job is not None:
+    snap = job.snapshot()
+    if snap["state"] in ("queued", "running"):
+        poll(job)
+    else:
+        show_progress(snap)
+        if snap["state"] == "failed":
+            st.error(f"Scoring failed: {snap['error']}")
+        elif snap["state"] == "cancelled":
+            st.warning("Scoring was cancelled; the download holds the rows scored before that.")
+        stem = snap["name"].rsplit(".", 1)[0]
+        col1, col2 = st.columns(2)
+        col1.download_button("⬇️ Download scored file", functools.partial(_read, job.out_path),
+                             file_name=f"{stem}.scored.csv", mime="text/csv", on_click="ignore")
+        if snap["rejected"]:
+            col2.download_button("⬇️ Download rejected rows", functools.partial(_read, job.reject_path),
+                                 file_name=f"{stem}.rejects.csv", mime="text/csv", on_click="ignore")
+        if st.button("Score another file"):
+            del st.session_state["bulk_job"]
+            st.rerun()
+    st.stop()
+
+# ── Upload ────────────────────────────────────────────────────────────────────
+st.write("Upload a CSV with the columns of our reference dataset (`stroke_dataset.csv`). "
+         "The columns the model needs are: " + ", ".join(f"`{c}`" for c in batch_score.REQUIRED) + ". "
+         "Every row is scored with its risk band and stability band; rows that cannot be scored "
+         "are listed in a separate file with the reason.")
+
+uploader_key = f"bulk_file_{st.session_state.get('bulk_uploads', 0)}"
+uploaded = st.file_uploader("Patient CSV", type="csv", key=uploader_key)
+if uploaded is not None and st.button("Score file", type="primary"):
+    job = bulk_upload.submit(uploaded, uploaded.name, resources.load_model(), resources.load_leaf_table())
+    st.session_state.bulk_job = job.id
+    # a fresh uploader key lets Streamlit drop its in-memory copy of the upload
+    st.session_state.bulk_uploads = st.session_state.get("bulk_uploads", 0) + 1
+    st.rerun()
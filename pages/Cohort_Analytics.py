@@ -0,0 +1,96 @@
+import datetime
+
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+import access
+import history
+import profiling
+import rollups
+
+# Opt-in profiling (STROKE_PROFILE=1 or ?profile=<secret>); see profiling.py
+if profiling.profile_page(__file__, globals()):
+    st.stop()
+
+# ── Page config & CSS ─────────────────────────────────────────────────────────
+st.set_page_config(page_title="Stroke Risk Cohort Analytics", layout="wide")
+st.markdown("""
+    <style>
+      #MainMenu, footer, header {visibility: hidden;}
+      [data-testid="stSidebar"], [data-testid="collapsedControl"] {display: none;}
+    </style>
+""", unsafe_allow_html=True)
+
+st.title("📈 Cohort Analytics")
+access.require_admin()
+
+# Every figure below is read from the cohort_daily rollups (rollups.py), never
+# from the raw assessment rows.
+conn = history.reader()
+first, last = rollups.bounds(conn)
+if first is None:
+    st.info("No assessments have been stored yet.")
+    st.stop()
+
+# ── Filters ───────────────────────────────────────────────────────────────────
+first, last = datetime.date.fromisoformat(first), datetime.date.fromisoformat(last)
+col1, col2 = st.columns([1, 3])
+with col1:
+    days = st.date_input("Days (UTC)", (max(first, last - datetime.timedelta(days=89)), last),
+                         min_value=first, max_value=last)
+    start_day, end_day = (days[0], days[-1]) if isinstance(days, (tuple, list)) and days else (first, last)
+    slice_by = st.radio("Slice by", list(rollups.DIMENSIONS), format_func=rollups.DIMENSIONS.get)
+    filters = {}
+    for dim, label in rollups.DIMENSIONS.items():
+        options = rollups.values(conn, dim)
+        chosen = st.multiselect(label, options, default=options)
+        if chosen != options:
+            filters[dim] = chosen or [""]
+
+columns = ["key", "assessments", "mean_risk", "low", "moderate", "high"]
+daily = pd.DataFrame(rollups.query(conn, start_day.isoformat(), end_day.isoformat(), filters), columns=columns)
+sliced = pd.DataFrame(rollups.query(conn, start_day.isoformat(), end_day.isoformat(), filters, by=slice_by),
+                      columns=columns)
+
+with col2:
+    if daily.empty:
+        st.info("No assessments match these filters.")
+        st.stop()
+    total = int(daily["assessments"].sum())
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Assessments", f"{total:,}")
+    m2.metric("Mean risk", f"{(daily['mean_risk'] * daily['assessments']).sum() / total * 100:.2f}%")
+    m3.metric("Moderate band", f"{(daily['moderate'] * daily['assessments']).sum() / total:.1%}")
+    m4.metric("High band", f"{(daily['high'] * daily['assessments']).sum() / total:.1%}")
+
+    # ── Daily counts and mean risk ──
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=daily["key"], y=daily["assessments"], name="Assessments", marker_color="#A5D6A7"))
+    fig.add_trace(go.Scatter(x=daily["key"], y=daily["mean_risk"] * 100, name="Mean risk (%)", yaxis="y2",
+                             mode="lines+markers", line=dict(color="#388E3C")))
+    fig.update_layout(template="plotly_white", title="Daily assessments and mean predicted risk",
+                      yaxis=dict(title="Assessments"),
+                      yaxis2=dict(title="Mean risk (%)", overlaying="y", side="right", ticksuffix="%"),
+                      legend=dict(orientation="h"), margin=dict(t=60, b=40))
+    st.plotly_chart(fig, use_container_width=True)
+
+    # ── Band shares per slice ──
+    fig = go.Figure()
+    for band, color in zip(rollups.BANDS, ("#66BB6A", "#FFCA28", "#EF5350")):
+        fig.add_trace(go.Bar(x=sliced["key"], y=sliced[band] * 100, name=band.capitalize(), marker_color=color))
+    fig.update_layout(barmode="stack", template="plotly_white",
+                      title=f"Risk band shares by {rollups.DIMENSIONS[slice_by].lower()}",
+                      yaxis=dict(title="Share of assessments (%)", ticksuffix="%", range=[0, 100]),
+                      margin=dict(t=60, b=40))
+    st.plotly_chart(fig, use_container_width=True)
+
+    table = sliced.rename(columns={"key": rollups.DIMENSIONS[slice_by]})
+    table["mean_risk"] = (table["mean_risk"] * 100).round(3)
+    for band in rollups.BANDS:
+        table[band] = (table[band] * 100).round(1)
+    st.dataframe(table.rename(columns={"assessments": "Assessments", "mean_risk": "Mean risk (%)", "low": "Low (%)",
+                                       "moderate": "Moderate (%)", "high": "High (%)"}),
+                 hide_index=True)
+    st.caption("Bands use the thresholds of the Recommendations page: low below 30%, high from 70%. "
+               "Risk is the probability recorded at assessment time.")
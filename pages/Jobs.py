@@ -0,0 +1,80 @@
+import functools
+import os
+
+import pandas as pd
+import streamlit as st
+
+import access
+import jobqueue
+import profiling
+
+# Opt-in profiling (STROKE_PROFILE=1 or ?profile=<secret>); see profiling.py
+if profiling.profile_page(__file__, globals()):
+    st.stop()
+
+# ── Page config & CSS ─────────────────────────────────────────────────────────
+st.set_page_config(page_title="Stroke Risk Jobs", layout="wide")
+st.markdown("""
+    <style>
+      #MainMenu, footer, header {visibility: hidden;}
+      [data-testid="stSidebar"], [data-testid="collapsedControl"] {display: none;}
+    </style>
+""", unsafe_allow_html=True)
+
+st.title("🗂️ Background Jobs")
+access.require_admin()
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+# ── Submit ────────────────────────────────────────────────────────────────────
+with st.form("submit_job", clear_on_submit=True):
+    st.write("Queue a CSV in the `stroke_dataset.csv` schema. **Score** adds the risk, risk band and "
+             "stability band; **Explain** adds the risk and one SHAP value per model input.")
+    uploaded = st.file_uploader("Patient CSV", type="csv")
+    kind = st.radio("Job", jobqueue.KINDS, horizontal=True, format_func=str.capitalize)
+    if st.form_submit_button("Queue job", type="primary") and uploaded is not None:
+        job_id = jobqueue.submit(kind, jobqueue.save_upload(uploaded, uploaded.name))
+        st.success(f"Queued job {job_id}.")
+
+st.caption("Jobs are run by `python -m jobqueue worker` processes (or STROKE_JOB_WORKERS with serve.py), "
+           "never by this page. Stopped workers resume from the last completed chunk.")
+
+
+# ── Queue ─────────────────────────────────────────────────────────────────────
+@st.fragment(run_every=2.0)
+def queue_table():
+    rows = jobqueue.jobs()
+    if not rows:
+        st.info("No jobs yet.")
+        return
+    table = pd.DataFrame(rows)
+    table["progress"] = (table["chunks_done"].fillna(0) / table["chunks"].clip(lower=1)).round(3)
+    table["input"] = table["input_path"].map(os.path.basename)
+    st.dataframe(table[["id", "kind", "state", "progress", "rows", "scored", "rejected", "input", "error"]],
+                 hide_index=True, column_config={"progress": st.column_config.ProgressColumn(min_value=0, max_value=1)})
+
+
+queue_table()
+
+# ── Actions ───────────────────────────────────────────────────────────────────
+rows = {row["id"]: row for row in jobqueue.jobs()}
+if rows:
+    job_id = st.selectbox("Job", list(rows), format_func=lambda i: f"{i} · {rows[i]['kind']} · {rows[i]['state']}")
+    row = rows[job_id]
+    col1, col2, col3 = st.columns(3)
+    if row["state"] == "done":
+        stem = os.path.splitext(os.path.basename(row["output_path"]))[0]
+        col1.download_button("⬇️ Output", functools.partial(_read, row["output_path"]),
+                             file_name=f"{stem}.csv", mime="text/csv", on_click="ignore")
+        col2.download_button("⬇️ Rejected rows", functools.partial(_read, row["reject_path"]),
+                             file_name=os.path.basename(row["reject_path"]), mime="text/csv", on_click="ignore")
+    if row["state"] in jobqueue.ACTIVE and col3.button("Cancel job"):
+        jobqueue.cancel(job_id)
+        st.rerun()
+    if row["state"] in ("failed", "cancelled") and col3.button("Retry job"):
+        jobqueue.retry(job_id)
+        st.rerun()
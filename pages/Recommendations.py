@@ -1,5 +1,14 @@
 import streamlit as st
 
+import counterfactuals
+import profiling
+import resources
+import stroke_model
+
+# Opt-in profiling (STROKE_PROFILE=1 or ?profile=<secret>); see profiling.py
+if profiling.profile_page(__file__, globals()):
+    st.stop()
+
 # ── Page configuration & styling ─────────────────────────────────────────────
 st.set_page_config(page_title="Stroke Risk Recommendations", layout="wide")
 st.markdown("""
@@ -67,7 +76,7 @@ if risk_score == 0:
     - Keep up routine health checkups to stay on track.
     """)
 
-elif risk_score < 30:
+elif stroke_model.risk_band(risk_prob) == "low":
     st.success("✅ You have a low risk. Keep up the good work!")
     st.markdown("""
     - Keep up with regular health checkups.
@@ -75,7 +84,7 @@ elif risk_score < 30:
     - Avoid smoking and manage stress effectively.
     """)
 
-elif risk_score < 70:
+elif stroke_model.risk_band(risk_prob) == "moderate":
     st.warning("⚠️ You are at moderate risk. Take proactive steps to lower it.")
     st.markdown("""
     - Monitor and manage blood pressure and glucose levels.
@@ -92,6 +101,22 @@ else:
     - Completely avoid tobacco products and excessive alcohol.
     """)
 
+# ── Changes with the largest predicted effect (counterfactual search) ────────
+if "user_data" in st.session_state:
+    st.subheader("🔄 Changes That Would Lower Your Risk the Most")
+    plan = counterfactuals.recommend(resources.load_model(), stroke_model.encode(st.session_state.user_data))
+    if plan["options"]:
+        for option in plan["options"]:
+            relative = option["reduction"] / plan["baseline"] * 100 if plan["baseline"] else 0.0
+            st.markdown(f"- **{' + '.join(option['changes'])}** → estimated risk "
+                        f"**{option['prob'] * 100:.2f}%** ({relative:.0f}% lower than now)")
+        st.caption(f"Compared {plan['candidates']} combinations of quitting smoking, controlling "
+                   "blood pressure and lowering glucose; options that need more change for no "
+                   "extra benefit are not shown.")
+    else:
+        st.info("None of the changes we can model (smoking, blood pressure, glucose) lowers your "
+                "estimated risk further.")
+
 # ── General tips ──────────────────────────────────────────────────────────────
 st.subheader("📌 General Stroke Prevention Tips")
 st.markdown("""
@@ -1,57 +1,27 @@
-import os
-import joblib
+import time
+
 import streamlit as st
 import numpy as np
-import shap
 import plotly.graph_objects as go
 
-# ── Page config must be first ─────────────────────────────────────────────────
-
-
-
-# ── Polynomial feature helper ─────────────────────────────────────────────────
-def add_poly(X):
-    # X shape: (n_samples, 8) raw features
-    age    = X[:, 0]
-    glu    = X[:, 1]
-    age_sq = age ** 2
-    inter  = age * glu
-    glu_sq = glu ** 2
-    return np.c_[X, age_sq, inter, glu_sq]
-
-# ── Scaler parameters from training ────────────────────────────────────────────
-SCALER_MEAN = np.array([
-    47.4572, 106.1478,  # age, glucose
-    0.0482, 0.0513,     # heart_disease, hypertension
-    0.5527, 0.5431,     # ever_married, smoking_status
-    2.1356, 0.5064,     # work_type, gender
-    1850.37, 5067.84, 11645.2  # age_sq, inter, glu_sq
-])
-SCALER_SCALE = np.array([
-    15.6753, 26.8145,
-    0.2141, 0.2206,
-    0.4974, 0.4983,
-    0.9082, 0.4999,
-    2978.41, 6144.78, 10795.6
-])
-
-# ── Load bare model for prediction and SHAP ───────────────────────────────────
-@st.cache_resource
-# Cache the model loading; no hashing of large objects
-def load_model():
-    base = os.path.dirname(os.path.abspath(__file__))
-    path = os.path.join(base, "best_gb_model.pkl")
-    return joblib.load(path)
-
-model = load_model()
-
-# ── SHAP explainer ─────────────────────────────────────────────────────────────
-@st.cache_resource
-# Use underscore to prevent hashing the model object
-def load_explainer(_model):
-    return shap.TreeExplainer(_model)
-
-explainer = load_explainer(model)
+import heatmap
+import history
+import neighbours
+import population
+import profiling
+import resources
+import stroke_model
+import trajectory
+import uncertainty
+import whatif
+
+# Opt-in profiling (STROKE_PROFILE=1 or ?profile=<secret>); see profiling.py
+if profiling.profile_page(__file__, globals()):
+    st.stop()
+
+# ── Model and SHAP explainer (process-wide cache, pre-warmed at startup) ──────
+model     = resources.load_model()
+explainer = resources.load_explainer()
 
 # ── Page config & CSS ─────────────────────────────────────────────────────────
 st.set_page_config(page_title="Stroke Risk Results", layout="wide")
@@ -99,34 +69,37 @@ if "user_data" in st.session_state and "prediction_prob" in st.session_state:
     pct  = prob * 100
 
     st.markdown(f"### 🧠 Your Stroke Percentage Risk: **{pct:.2f}%**")
-    st.write("---")
 
     UD = st.session_state.user_data
+
+    # Percentile among the reference population (precomputed sorted scores)
+    place = population.placement(resources.load_population_index(), prob, UD["age"], UD["gender"])
+    place_text = (f"Your predicted risk is higher than **{place['overall']:.0f}%** of the "
+                  f"{place['overall_n']:,} people in our reference dataset")
+    if place["group_pct"] is not None:
+        place_text += (f", and higher than **{place['group_pct']:.0f}%** of "
+                       f"{place['group']} ({place['group_n']:,} people)")
+    st.markdown(place_text + ".")
+
     # Rebuild raw feature vector in training order
-    raw = [
-        UD["age"],
-        UD["avg_glucose_level"],
-        1 if UD["heart_disease"] == "Yes" else 0,
-        1 if UD["hypertension"] == "Yes" else 0,
-        1 if UD["ever_married"] == "Yes" else 0,
-        {"never smoked":0, "formerly smoked":1, "smokes":2}[UD["smoking_status"]],
-        {"Private":0, "Self-employed":1, "Govt_job":2, "Never_worked":4}[UD["work_type"]],
-        {"Male":0, "Female":1}[UD["gender"]]
-    ]
-    X_raw    = np.array(raw).reshape(1, -1)
-    X_poly   = add_poly(X_raw)
-    X_scaled = (X_poly - SCALER_MEAN) / SCALER_SCALE
-
-    # SHAP values
-    sv        = explainer.shap_values(X_scaled)
-    shap_vals = sv[1][0] if isinstance(sv, list) else sv[0]
+    X_raw    = np.array(stroke_model.encode(UD)).reshape(1, -1)
+    X_scaled = stroke_model.transform(X_raw)
+
+    # Observed outcomes among the most similar real records (KD-tree lookup)
+    near = neighbours.neighbour_rate(resources.load_neighbour_index(), X_raw)
+    st.markdown(f"Among the **{near['k']}** people in our reference dataset most similar to you, "
+                f"**{near['strokes']}** had a stroke (**{near['rate'] * 100:.1f}%**).")
+    st.write("---")
+
+    # SHAP values, computed on submit by the assessment page
+    shap_vals = st.session_state.get("shap_values")
+    if shap_vals is None:
+        sv        = explainer.shap_values(X_scaled)
+        shap_vals = sv[1][0] if isinstance(sv, list) else sv[0]
     vals      = np.abs(shap_vals[:8])
     contrib   = vals / vals.sum() * prob
 
-    feature_names = [
-      "Age", "Avg Glucose", "Heart Disease", "Hypertension",
-      "Ever Married", "Smoking Status", "Work Type", "Gender"
-    ]
+    feature_names = stroke_model.FEATURE_LABELS
     palette = ["brown","gold","steelblue","purple"]
     colors  = [palette[i % len(palette)] for i in range(len(feature_names))]
 
@@ -147,7 +120,9 @@ if "user_data" in st.session_state and "prediction_prob" in st.session_state:
     )
     st.plotly_chart(bar_fig, use_container_width=True)
 
-    # Gauge chart
+    # Gauge chart, with the model's stability band shaded (see uncertainty.py)
+    stab = uncertainty.band(resources.load_leaf_table(), X_raw)
+    low, high = float(stab["low"][0]) * 100, float(stab["high"][0]) * 100
     r = int(255 * prob)
     g = int(255 * (1 - prob))
     bar_color = f"rgb({r},{g},0)"
@@ -160,12 +135,99 @@ if "user_data" in st.session_state and "prediction_prob" in st.session_state:
             gauge={
                 'axis': {'range': [0,100], 'ticksuffix': '%'},
                 'bar': {'color': bar_color},
-                'steps': [{'range': [0,50], 'color': 'green'}, {'range': [50,100], 'color': 'red'}]
+                'steps': [{'range': [0,50], 'color': 'green'}, {'range': [50,100], 'color': 'red'},
+                          {'range': [low, high], 'color': 'rgba(255,255,255,0.6)'}]
             }
         )
     )
     gauge_fig.update_layout(template="plotly_white", margin=dict(t=40, b=0, l=0, r=0))
     st.plotly_chart(gauge_fig, use_container_width=True)
+    st.caption(f"Shaded band: {low:.2f}% – {high:.2f}%, how much the estimate moves across the "
+               "model's last boosting stages and resampled sets of its trees.")
+
+    # Age × glucose risk map for the user's categorical answers (prebuilt grid)
+    risk_grid = heatmap.profile_grid(resources.load_heatmap_grids(), X_raw[0])
+    map_fig = go.Figure(go.Heatmap(
+        x=heatmap.GLUCOSE, y=heatmap.AGES, z=np.asarray(risk_grid) * 100,
+        colorscale="RdYlGn_r", colorbar=dict(title="Risk (%)", ticksuffix="%"),
+        hovertemplate="Age %{y}<br>Glucose %{x} mg/dL<br>Risk %{z:.2f}%<extra></extra>",
+    ))
+    map_fig.add_trace(go.Scatter(x=[UD["avg_glucose_level"]], y=[UD["age"]], mode="markers",
+                                 marker=dict(symbol="x", size=12, color="black"), name="You"))
+    map_fig.update_layout(template="plotly_white", title="Your Risk Across Ages and Glucose Levels",
+                          xaxis_title="Average Glucose Level (mg/dL)", yaxis_title="Age",
+                          showlegend=False, margin=dict(t=60, b=40))
+    st.plotly_chart(map_fig, use_container_width=True)
+
+    # What-if explorer: a fragment, so moving a slider reruns only this panel
+    @st.fragment
+    def whatif_panel(UD):
+        st.markdown("#### 🔬 What if…")
+        c1, c2 = st.columns(2)
+        with c1:
+            w_age = st.slider("Age", *stroke_model.AGE_RANGE, value=int(UD["age"]), key="whatif_age")
+            w_smoke = st.selectbox("Smoking Status", list(stroke_model.SMOKE_MAP),
+                                   index=list(stroke_model.SMOKE_MAP).index(UD["smoking_status"]),
+                                   key="whatif_smoking_status")
+        with c2:
+            w_glu = st.slider("Average Glucose Level (mg/dL)", *stroke_model.GLUCOSE_RANGE,
+                              value=float(UD["avg_glucose_level"]), step=0.1, key="whatif_glucose")
+            w_htn = st.toggle("Hypertension", value=UD["hypertension"] == "Yes", key="whatif_hypertension")
+
+        what_if = dict(UD, age=w_age, avg_glucose_level=w_glu, smoking_status=w_smoke,
+                       hypertension="Yes" if w_htn else "No")
+        w_raw  = stroke_model.encode(what_if)
+        w_prob = float(stroke_model.predict_proba(model, [w_raw])[0])
+        st.metric("What-if risk", f"{w_prob * 100:.2f}%", delta=f"{(w_prob - prob) * 100:+.2f} pts",
+                  delta_color="inverse")
+
+        sha = resources.model_sha()
+        curves = st.columns(2)
+        for col, feature, x_now, label in (
+            (curves[0], "age", w_age, "Age"),
+            (curves[1], "avg_glucose_level", w_glu, "Average Glucose Level (mg/dL)"),
+        ):
+            xs, ys = whatif.cached_sweep(model, sha, w_raw, feature)
+            fig = go.Figure(go.Scatter(x=xs, y=ys * 100, mode="lines", line=dict(color="#4C9D70")))
+            fig.add_vline(x=x_now, line_dash="dot", line_color="gray")
+            fig.update_layout(template="plotly_white", height=300, margin=dict(t=40, b=40),
+                              title=f"Risk vs {label}", xaxis_title=label,
+                              yaxis=dict(title="Risk (%)", ticksuffix="%"))
+            col.plotly_chart(fig, use_container_width=True)
+
+    whatif_panel(UD)
+
+    # Projected risk over the next years (one batch, kept with this session's result)
+    @st.fragment
+    def trajectory_panel(X_raw):
+        st.markdown("#### 📈 Your Risk Over the Next 20 Years")
+        drift = st.slider("Assumed change in average glucose per year (mg/dL)", -10.0, 10.0, 0.0, 0.5,
+                          key="trajectory_glucose_drift")
+        offsets, ages, glucose, probs = trajectory.cached_projection(st.session_state, model, X_raw[0], drift)
+        if not len(offsets):
+            st.info("Projections are only available up to age 100.")
+            return
+        fig = go.Figure(go.Scatter(x=ages, y=probs * 100, mode="lines+markers", line=dict(color="#4C9D70"),
+                                   customdata=np.c_[offsets, glucose],
+                                   hovertemplate="In %{customdata[0]} years (age %{x:.0f})<br>"
+                                                 "Glucose %{customdata[1]:.0f} mg/dL<br>Risk %{y:.2f}%<extra></extra>"))
+        fig.update_layout(template="plotly_white", height=320, margin=dict(t=30, b=40),
+                          xaxis_title="Age", yaxis=dict(title="Risk (%)", ticksuffix="%"))
+        st.plotly_chart(fig, use_container_width=True)
+
+    trajectory_panel(X_raw)
+
+    # Earlier assessments from this visitor (history.py, indexed by token and time)
+    if "user_token" in st.session_state:
+        with st.expander("🕘 Your assessment history"):
+            past = history.recent(st.session_state.user_token)
+            st.dataframe([{"When": time.strftime("%Y-%m-%d %H:%M", time.localtime(row["created_at"])),
+                           "Risk (%)": round(row["probability"] * 100, 2),
+                           "Age": row["age"], "Glucose": row["avg_glucose_level"],
+                           "Smoking": row["smoking_status"], "Model": row["model_version"][:8]}
+                          for row in past], hide_index=True)
+            st.caption(f"Open the assessment page with `?user={st.session_state.user_token}` "
+                       "to keep adding to this history in a later visit.")
 
     # Navigation buttons
     col1, col2 = st.columns(2)
@@ -175,6 +237,7 @@ if "user_data" in st.session_state and "prediction_prob" in st.session_state:
     with col2:
         if st.button("📘 Recommendations"):
             st.switch_page("pages/Recommendations.py")
+    st.page_link("pages/Risk_Factor_Analysis.py", label="🔎 How each risk factor affects predictions")
 else:
     st.warning("No input data found. Please complete the Risk Assessment first.")
 
@@ -1,30 +1,22 @@
-import os
-import joblib
 import streamlit as st
 import numpy as np
 
-# ── Polynomial feature helper ─────────────────────────────────────────────────
-def add_poly(X):
-    age       = X[:, 0]
-    glu       = X[:, 1]
-    age_sq    = age ** 2
-    inter     = age * glu
-    glu_sq    = glu ** 2
-    return np.c_[X, age_sq, inter, glu_sq]
-
-# ── Scaler parameters from training ────────────────────────────────────────────
-SCALER_MEAN  = np.array([47.4572, 106.1478, 0.0482, 0.0513, 0.5527,
-                         0.5431,   2.1356,   0.5064, 1850.37, 5067.84, 11645.2])
-SCALER_SCALE = np.array([15.6753,  26.8145, 0.2141, 0.2206, 0.4974,
-                         0.4983,   0.9082,   0.4999, 2978.41, 6144.78, 10795.6])
-
-# ── Load bare model ────────────────────────────────────────────────────────────
-@st.cache_resource
-def load_model():
-    base = os.path.dirname(os.path.abspath(__file__))
-    return joblib.load(os.path.join(base, "best_gb_model.pkl"))
-
-model = load_model()
+import audit
+import drift
+import history
+import profiling
+import resources
+import stroke_model
+
+# Opt-in profiling (STROKE_PROFILE=1 or ?profile=<secret>); see profiling.py
+if profiling.profile_page(__file__, globals()):
+    st.stop()
+
+# ── Load bare model (process-wide cache, pre-warmed at startup) ───────────────
+model = resources.load_model()
+
+# ── History key: ?user=... from a bookmark, else a fresh token for this session
+token = history.user_token(st.session_state, st.query_params)
 
 # ── Page config & CSS ─────────────────────────────────────────────────────────
 st.set_page_config(page_title="Stroke Risk Assessment", layout="wide")
@@ -84,31 +76,7 @@ if st.button("Calculate Stroke Risk 📈"):
     elif any(val == "Select option" for val in [gender, ever_married, work_type, hypertension, heart_disease, smoking_status]):
         st.error("Please complete all fields with valid values before submitting.")
     else:
-        # build raw feature vector in training order
-        heart_map = {"Yes":1, "No":0}
-        htn_map   = {"Yes":1, "No":0}
-        married_map = {"Yes":1, "No":0}
-        smoke_map = {"never smoked":0, "formerly smoked":1, "smokes":2}
-        work_map  = {"Private":0, "Self-employed":1, "Govt_job":2, "Never_worked":3}
-        gender_map= {"Male":0, "Female":1}
-
-        raw = [
-            age,
-            avg_glucose_level,
-            heart_map[heart_disease],
-            htn_map[hypertension],
-            married_map[ever_married],
-            smoke_map[smoking_status],
-            work_map[work_type],
-            gender_map[gender]
-        ]
-        X_raw = np.array(raw).reshape(1, -1)
-        X_poly= add_poly(X_raw)
-        X_scaled = (X_poly - SCALER_MEAN) / SCALER_SCALE
-        prob = model.predict_proba(X_scaled)[0, 1]
-
-        # save session
-        st.session_state.user_data = {
+        user_data = {
             "age": age,
             "avg_glucose_level": avg_glucose_level,
             "heart_disease": heart_disease,
@@ -118,7 +86,22 @@ if st.button("Calculate Stroke Risk 📈"):
             "work_type": work_type,
             "gender": gender
         }
+        # build raw feature vector in training order
+        X_raw = np.array(stroke_model.encode(user_data)).reshape(1, -1)
+        X_scaled = stroke_model.transform(X_raw)
+        prob = model.predict_proba(X_scaled)[0, 1]
+
+        # keep the assessment and its audit record (both queued; written by background threads)
+        audit.record(user_data, X_raw[0], resources.model_sha(), prob)
+        drift.observe(X_raw)
+        sv = resources.load_explainer().shap_values(X_scaled)
+        shap_vals = sv[1][0] if isinstance(sv, list) else sv[0]
+        history.record(token, user_data, prob, resources.model_sha()[:16], shap_vals)
+
+        # save session (Results reuses these SHAP values instead of recomputing them)
+        st.session_state.user_data = user_data
         st.session_state.prediction_prob = prob
+        st.session_state.shap_values = shap_vals
         st.switch_page("pages/Results.py")
 
 # ── Footer ────────────────────────────────────────────────────────────────────
@@ -0,0 +1,91 @@
+import numpy as np
+import plotly.graph_objects as go
+import streamlit as st
+
+import pdp
+import profiling
+import resources
+import stroke_model
+
+# Opt-in profiling (STROKE_PROFILE=1 or ?profile=<secret>); see profiling.py
+if profiling.profile_page(__file__, globals()):
+    st.stop()
+
+# ── Page config & CSS ─────────────────────────────────────────────────────────
+st.set_page_config(page_title="Stroke Risk Factor Analysis", layout="wide")
+st.markdown("""
+    <style>
+      #MainMenu, footer, header {visibility: hidden;}
+      [data-testid="stSidebar"], [data-testid="collapsedControl"] {display: none;}
+      .custom-nav {
+        background: #e8f5e9; padding: 15px 0; border-radius: 10px;
+        display: flex; justify-content: center; gap: 60px; margin-bottom: 30px;
+        font-size: 18px; font-weight: 600;
+      }
+      .custom-nav a { text-decoration: none; color: #4C9D70; }
+      .custom-nav a:hover { color: #388e3c; text-decoration: underline; }
+    </style>
+""", unsafe_allow_html=True)
+
+# ── Title & Navbar ─────────────────────────────────────────────────────────────
+st.title("🔎 Risk Factor Analysis")
+st.markdown("""
+  <div class="custom-nav">
+    <a href='/Home'>Home</a>
+    <a href='/Risk_Assessment'>Risk Assessment</a>
+    <a href='/Results'>Results</a>
+    <a href='/Recommendations'>Recommendations</a>
+  </div>
+""", unsafe_allow_html=True)
+
+model = resources.load_model()
+sha   = resources.model_sha()
+user_raw = (stroke_model.encode(st.session_state.user_data)
+            if "user_data" in st.session_state else None)
+
+# ── Age and glucose: partial dependence with ICE curves (brute force) ─────────
+st.subheader("📈 How Age and Glucose Move the Predicted Risk")
+st.write("The bold line is the average predicted risk over our reference dataset when everyone's "
+         "value is set to the one on the x-axis (partial dependence). Thin lines follow individual "
+         "people (ICE curves)" + ("; the red line is you." if user_raw is not None else "."))
+
+cols = st.columns(2)
+for col, feature, label in ((cols[0], "age", "Age"),
+                            (cols[1], "avg_glucose_level", "Average Glucose Level (mg/dL)")):
+    grid, pd_curve, ice = pdp.cached_brute_force(model, sha, feature)
+    fig = go.Figure()
+    for curve in ice:
+        fig.add_trace(go.Scatter(x=grid, y=curve * 100, mode="lines", hoverinfo="skip",
+                                 line=dict(color="rgba(120,120,120,0.25)", width=1)))
+    fig.add_trace(go.Scatter(x=grid, y=pd_curve * 100, mode="lines", name="Average",
+                             line=dict(color="#4C9D70", width=4)))
+    if user_raw is not None:
+        _, mine, _ = pdp.brute_force(model, [user_raw], feature, grid)
+        fig.add_trace(go.Scatter(x=grid, y=mine[0] * 100, mode="lines", name="You",
+                                 line=dict(color="crimson", width=3)))
+    fig.update_layout(template="plotly_white", showlegend=False, height=360, margin=dict(t=40, b=40),
+                      title=f"Risk vs {label}", xaxis_title=label,
+                      yaxis=dict(title="Risk (%)", ticksuffix="%"))
+    col.plotly_chart(fig, use_container_width=True)
+
+# ── Categorical answers: partial dependence via the tree recursion ────────────
+st.subheader("📊 Effect of Each Answer")
+st.write("Odds of a positive prediction for each answer relative to the first one, averaged over "
+         "the population the model was trained on.")
+
+names = dict(zip(stroke_model.FEATURES, stroke_model.FEATURE_LABELS))
+cat_cols = st.columns(3)
+for i, feature in enumerate(pdp.CATEGORY_MAPS):
+    codes, log_odds = pdp.cached_recursion(model, sha, feature)
+    labels = {code: answer for answer, code in pdp.CATEGORY_MAPS[feature].items()}
+    ratios = np.exp(log_odds - log_odds[0])
+    fig = go.Figure(go.Bar(x=[labels[int(c)] for c in codes], y=ratios, marker_color="#4C9D70",
+                           text=[f"{r:.2f}×" for r in ratios], textposition="outside"))
+    fig.update_layout(template="plotly_white", height=300, margin=dict(t=40, b=40),
+                      title=names[feature], yaxis=dict(title="Odds ratio", type="log"))
+    cat_cols[i % 3].plotly_chart(fig, use_container_width=True)
+
+st.caption("Age and glucose curves score every reference record at each grid value. The answer "
+           "effects use the tree recursion method, which reads the training-set weights stored in "
+           "the model and so reflect the training population rather than our reference dataset. "
+           "Results are cached per model version.")
@@ -0,0 +1,129 @@
+# parallel_score.py — batch_score.py across all cores, one byte-range shard per task
+#
+# The input is cut into byte ranges whose edges are moved forward to the next
+# line start, so every shard holds whole records.  Each worker process streams
+# its shards through batch_score.score_blocks into per-shard temporary files,
+# and the parent concatenates those in shard order: the merged output lists
+# rows in input order, exactly as the single-process scorer would.
+#
+# Workers get the model once, at pool start.  Where the platform can fork, the
+# parent loads it before the pool is created and the workers share its pages
+# copy-on-write; otherwise every worker loads it from disk once.
+#
+#   python -m parallel_score patients.csv [-o scored.csv] [--workers 8] [--cascade]
+import argparse
+import csv
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+import batch_score
+import stroke_model
+import uncertainty
+
+SHARDS_PER_WORKER = 4     # more shards than workers evens out slow shards
+
+_WORKER = {}
+
+
+def split_ranges(path, n_shards):
+    """[(start, end)] byte ranges covering the data lines of path, split at line starts."""
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        f.readline()
+        data_start = f.tell()
+        edges = [data_start]
+        for i in range(1, n_shards):
+            target = data_start + (size - data_start) * i // n_shards
+            if target <= edges[-1]:
+                continue
+            f.seek(target - 1)
+            f.readline()          # move to the start of the next line
+            if edges[-1] < f.tell() < size:
+                edges.append(f.tell())
+        edges.append(size)
+    return list(zip(edges[:-1], edges[1:]))
+
+
+def _init_worker(band, screener=None):
+    model = _WORKER.get("model") or stroke_model.load_model()
+    _WORKER.update(model=model, leaf_table=uncertainty.LeafTable(model) if band else None, screener=screener)
+
+
+def _score_shard(task):
+    in_path, header, start, end, chunk_rows, out_path, reject_path = task
+    with open(out_path, "w", newline="") as out, open(reject_path, "w", newline="") as rejects:
+        blocks = batch_score.read_blocks(in_path, chunk_rows, start, end)
+        return batch_score.score_blocks(_WORKER["model"], header, blocks, out, rejects,
+                                        _WORKER["leaf_table"], write_header=False, screener=_WORKER["screener"])
+
+
+def merge(parts, columns, path):
+    """Write columns as a header line to path, then append the part files in order."""
+    with open(path, "w", newline="") as out:
+        csv.writer(out, lineterminator="\n").writerow(columns)
+    with open(path, "ab") as out:
+        for part in parts:
+            with open(part, "rb") as f:
+                shutil.copyfileobj(f, out, 1 << 20)
+
+
+def score_file(in_path, out_path, reject_path, workers=None, chunk_rows=batch_score.CHUNK_ROWS,
+               band=True, shards=None, cascade=False):
+    """Score in_path with a pool of worker processes; returns the summed stats."""
+    workers = workers or os.cpu_count() or 1
+    screener = batch_score.load_screener() if cascade else None
+    header  = batch_score.read_header(in_path)
+    ranges  = split_ranges(in_path, shards or workers * SHARDS_PER_WORKER)
+    start   = time.perf_counter()
+
+    if "fork" in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context("fork")
+        _WORKER["model"] = stroke_model.load_model()   # inherited by the forked workers
+    else:
+        ctx = multiprocessing.get_context("spawn")
+
+    work_dir = tempfile.mkdtemp(prefix="stroke-shards-", dir=os.path.dirname(os.path.abspath(out_path)))
+    try:
+        tasks = [(in_path, header, lo, hi, chunk_rows,
+                  os.path.join(work_dir, f"{i:05d}.scored"), os.path.join(work_dir, f"{i:05d}.rejects"))
+                 for i, (lo, hi) in enumerate(ranges)]
+        with ctx.Pool(workers, initializer=_init_worker, initargs=(band, screener)) as pool:
+            results = pool.map(_score_shard, tasks, chunksize=1)
+
+        merge([t[5] for t in tasks], batch_score.output_columns(header, band, cascade), out_path)
+        merge([t[6] for t in tasks], batch_score.reject_columns(header), reject_path)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        _WORKER.pop("model", None)
+
+    stats = {key: sum(r[key] for r in results) for key in results[0]}
+    stats.update(seconds=time.perf_counter() - start, workers=workers, shards=len(ranges))
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a patient CSV with one worker process per core.")
+    parser.add_argument("input")
+    parser.add_argument("-o", "--output", help="scored rows (default: <input>.scored.csv)")
+    parser.add_argument("--rejects", help="rows that could not be scored (default: <input>.rejects.csv)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--chunk-rows", type=int, default=batch_score.CHUNK_ROWS)
+    parser.add_argument("--no-band", action="store_true", help="skip the risk_low/risk_high columns")
+    parser.add_argument("--cascade", action="store_true",
+                        help="score with the cascade screener, escalating only rows near a band threshold")
+    args = parser.parse_args(argv)
+
+    out_path, reject_path = batch_score.default_paths(args.input)
+    stats = score_file(args.input, args.output or out_path, args.rejects or reject_path,
+                       args.workers, args.chunk_rows, band=not args.no_band, cascade=args.cascade)
+    print(f"{stats['rows']:,} rows in {stats['shards']} shards on {stats['workers']} workers: "
+          f"{stats['scored']:,} scored{batch_score.summary(stats)}, {stats['rejected']:,} rejected "
+          f"({stats['rows'] / stats['seconds']:,.0f} rows/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,100 @@
+# pdp.py — partial dependence (PD) and individual conditional expectation (ICE)
+#
+# Two ways to compute a PD curve:
+#   * recursion — sklearn's tree recursion for gradient boosting walks each tree
+#     once per grid value, weighting branches by their training sample counts,
+#     and never predicts over the dataset.  It varies a single model column, so
+#     it only applies to features that do not enter add_poly (everything but
+#     age and glucose).  It works on the log-odds scale.
+#   * brute force — replace the feature in every reference row with each grid
+#     value and score all of them in batched predict_proba calls.  Age and
+#     glucose need this, because changing them also moves age², age×glucose
+#     and glucose².  The per-row curves are the ICE curves.
+# Pages cache the results with st.cache_data keyed on the model hash.
+import warnings
+
+import numpy as np
+import streamlit as st
+from sklearn.inspection import partial_dependence
+
+import stroke_model
+
+GRID_POINTS = 50
+ICE_SAMPLE  = 60        # reference rows drawn as ICE curves on the page
+CHUNK_ROWS  = 100_000   # rows per predict_proba call in brute force
+NUMERIC     = ("age", "avg_glucose_level")
+CATEGORY_MAPS = {
+    "heart_disease": stroke_model.HEART_MAP,
+    "hypertension": stroke_model.HTN_MAP,
+    "ever_married": stroke_model.MARRIED_MAP,
+    "smoking_status": stroke_model.SMOKE_MAP,
+    "work_type": stroke_model.WORK_MAP,
+    "gender": stroke_model.GENDER_MAP,
+}
+
+
+def supports_recursion(feature):
+    return feature not in NUMERIC
+
+
+def grid_for(feature, points=GRID_POINTS):
+    """Raw grid values: an even grid over the form range, or every category code."""
+    if feature == "age":
+        return np.linspace(*stroke_model.AGE_RANGE, points)
+    if feature == "avg_glucose_level":
+        return np.linspace(*stroke_model.GLUCOSE_RANGE, points)
+    return np.array(sorted(CATEGORY_MAPS[feature].values()), dtype=float)
+
+
+def brute_force(model, X_raw, feature, grid=None):
+    """ICE curves (rows, grid points) of predicted probability, and their mean (the PD)."""
+    grid  = grid_for(feature) if grid is None else np.asarray(grid, dtype=float)
+    X_raw = np.asarray(X_raw, dtype=float)
+    col   = stroke_model.FEATURES.index(feature)
+    ice   = np.empty((len(X_raw), len(grid)))
+    rows_per_chunk = max(1, CHUNK_ROWS // len(grid))
+    for start in range(0, len(X_raw), rows_per_chunk):
+        block = X_raw[start:start + rows_per_chunk]
+        X = np.repeat(block, len(grid), axis=0)
+        X[:, col] = np.tile(grid, len(block))
+        ice[start:start + len(block)] = stroke_model.predict_proba(model, X).reshape(len(block), len(grid))
+    return grid, ice, ice.mean(axis=0)
+
+
+def recursion(model, X_raw, feature):
+    """PD on the log-odds scale via the tree recursion method (no poly features only).
+
+    X_raw only supplies the grid (the distinct values of the feature); the
+    averaging itself uses the training sample counts stored in the trees.
+    """
+    if not supports_recursion(feature):
+        raise ValueError(f"{feature} enters add_poly; use brute_force")
+    col = stroke_model.FEATURES.index(feature)
+    X_scaled = stroke_model.transform(X_raw)
+    with warnings.catch_warnings():
+        # the init estimator is a constant prior, which the recursion leaves out;
+        # it is added back below
+        warnings.simplefilter("ignore", UserWarning)
+        result = partial_dependence(model, X_scaled, [col], method="recursion", kind="average",
+                                    grid_resolution=GRID_POINTS)
+    init  = model._raw_predict_init(X_scaled[:1])[0, 0]
+    grid  = result["grid_values"][0] * stroke_model.SCALER_SCALE[col] + stroke_model.SCALER_MEAN[col]
+    return np.round(grid, 6), result["average"][0] + init
+
+
+def reference_rows():
+    """Raw rows of the reference dataset the form can describe."""
+    return stroke_model.encode_frame(stroke_model.form_answers(stroke_model.load_dataset()))
+
+
+@st.cache_data(show_spinner="Computing partial dependence…", max_entries=64)
+def cached_brute_force(_model, model_sha, feature, ice_sample=ICE_SAMPLE):
+    """(grid, PD, a fixed sample of ICE curves) over the reference dataset."""
+    grid, ice, pd_curve = brute_force(_model, reference_rows(), feature)
+    sample = np.random.default_rng(0).choice(len(ice), size=min(ice_sample, len(ice)), replace=False)
+    return grid, pd_curve, ice[sample]
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def cached_recursion(_model, model_sha, feature):
+    return recursion(_model, reference_rows(), feature)
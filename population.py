@@ -0,0 +1,106 @@
+# population.py — where a predicted risk sits among the reference population
+#
+# build_index() scores every record of pages/stroke_dataset.csv that the
+# assessment form can describe with the production model, and stores the
+# sorted probabilities — overall and per age band × sex — as .npy files under
+# artifacts/population/<model hash>/.  Pages memory-map those arrays and place
+# a user's risk with a binary search, so no request touches the dataset.
+#
+#   python -m population            # (re)build the index for the current model
+import json
+import os
+import shutil
+
+import numpy as np
+
+import stroke_model
+
+# [lo, hi) in years; covers the form's AGE_RANGE
+AGE_BANDS = [(18, 40), (40, 60), (60, 80), (80, 101)]
+SEXES     = list(stroke_model.GENDER_MAP)
+
+
+def band_label(age):
+    for lo, hi in AGE_BANDS:
+        if lo <= age < hi:
+            return f"{lo}-{hi - 1}"
+    return None
+
+
+def _group_name(age_band, sex):
+    return f"{age_band}_{sex.lower()}"
+
+
+def index_dir(model_sha=None):
+    model_sha = model_sha or stroke_model.model_hash()
+    return os.path.join(stroke_model.ARTIFACTS_DIR, "population", model_sha[:16])
+
+
+def build_index(model=None, df=None, model_sha=None):
+    """Score the dataset and write the sorted score arrays; returns the index dir."""
+    model = model if model is not None else stroke_model.load_model()
+    df    = stroke_model.form_answers(df if df is not None else stroke_model.load_dataset())
+    probs = stroke_model.predict_proba(model, stroke_model.encode_frame(df))
+    bands = np.array([band_label(a) for a in df["age"]], dtype=object)
+    sexes = df["gender"].to_numpy()
+
+    groups = {"all": probs}
+    for lo, hi in AGE_BANDS:
+        label = f"{lo}-{hi - 1}"
+        for sex in SEXES:
+            groups[_group_name(label, sex)] = probs[(bands == label) & (sexes == sex)]
+
+    out = index_dir(model_sha)
+    tmp = out + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    for name, scores in groups.items():
+        np.save(os.path.join(tmp, f"{name}.npy"), np.sort(scores).astype(np.float64))
+    with open(os.path.join(tmp, "manifest.json"), "w") as f:
+        json.dump({"model_sha256": model_sha or stroke_model.model_hash(),
+                   "dataset": os.path.relpath(stroke_model.DATASET_PATH, stroke_model.BASE_DIR),
+                   "groups": {name: int(len(scores)) for name, scores in groups.items()}}, f, indent=2)
+    # swap in the finished directory so readers never see a half-written index
+    shutil.rmtree(out, ignore_errors=True)
+    os.replace(tmp, out)
+    return out
+
+
+def load_index(model_sha=None):
+    """{group name: memory-mapped sorted scores}, building the index if it is missing."""
+    path = index_dir(model_sha)
+    if not os.path.exists(os.path.join(path, "manifest.json")):
+        build_index(model_sha=model_sha)
+    with open(os.path.join(path, "manifest.json")) as f:
+        names = json.load(f)["groups"]
+    return {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in names}
+
+
+def percentile(scores, prob):
+    """Percent of scores strictly below prob (None for an empty group)."""
+    if len(scores) == 0:
+        return None
+    return 100.0 * np.searchsorted(scores, prob, side="left") / len(scores)
+
+
+def placement(index, prob, age, sex):
+    """Overall and same age band × sex percentiles for one prediction."""
+    label = band_label(age)
+    group = _group_name(label, sex) if label and sex in SEXES else None
+    peers = index.get(group, np.empty(0))
+    return {
+        "overall": percentile(index["all"], prob),
+        "overall_n": len(index["all"]),
+        "group": f"{sex.lower()}s aged {label}" if group else None,
+        "group_pct": percentile(peers, prob),
+        "group_n": len(peers),
+    }
+
+
+if __name__ == "__main__":
+    out = build_index()
+    with open(os.path.join(out, "manifest.json")) as f:
+        manifest = json.load(f)
+    print(f"population index written to {out}")
+    for name, n in manifest["groups"].items():
+        print(f"  {name:<14} {n:6d} records")
@@ -0,0 +1,153 @@
+# profiling.py — opt-in profiler for a single page script run
+#
+# Enable for every run with STROKE_PROFILE=1, or for one request by opening a
+# page with ?profile=<STROKE_PROFILE_SECRET>.  Each profiled run writes three
+# files to STROKE_PROFILE_DIR (default ./profiles):
+#   <stem>.collapsed  sampled stacks in collapsed format (flamegraph.pl, speedscope)
+#   <stem>.txt        top-N functions by cumulative time (cProfile)
+#   <stem>.prof       raw pstats dump for snakeviz / pstats
+# Only the newest STROKE_PROFILE_KEEP profiles are kept on disk.
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+import streamlit as st
+
+PROFILE_DIR      = os.environ.get("STROKE_PROFILE_DIR", "profiles")
+PROFILE_KEEP     = int(os.environ.get("STROKE_PROFILE_KEEP", "20"))
+PROFILE_TOP      = int(os.environ.get("STROKE_PROFILE_TOP", "40"))
+SAMPLE_INTERVAL  = float(os.environ.get("STROKE_PROFILE_INTERVAL", "0.005"))
+
+_ACTIVE_FLAG = "__stroke_profiling_active__"
+_SUFFIXES    = (".collapsed", ".txt", ".prof")
+
+
+def profiling_requested():
+    """True if this run should be profiled (env switch or secret query param)."""
+    if os.environ.get("STROKE_PROFILE", "").lower() in ("1", "true", "yes"):
+        return True
+    secret = os.environ.get("STROKE_PROFILE_SECRET")
+    if not secret:
+        return False
+    try:
+        given = st.query_params.get("profile") or ""
+        return hmac.compare_digest(given.encode(), secret.encode())
+    except Exception:
+        return False
+
+
+class StackSampler(threading.Thread):
+    """Samples one thread's Python stack every `interval` seconds."""
+
+    def __init__(self, target_ident, root_file, interval=SAMPLE_INTERVAL):
+        super().__init__(name="stroke-profile-sampler", daemon=True)
+        self.target_ident = target_ident
+        self.root_file    = os.path.abspath(root_file)
+        self.interval     = interval
+        self.stacks       = Counter()
+        self._stop_event  = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.target_ident)
+            if frame is not None:
+                self.stacks[self._collapse(frame)] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def _collapse(self, frame):
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            # stop at the page module frame so Streamlit's runner is not included
+            if code.co_name == "<module>" and os.path.abspath(code.co_filename) == self.root_file:
+                break
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+
+def rotate_profiles(directory=PROFILE_DIR, keep=PROFILE_KEEP):
+    """Delete all but the newest `keep` profiles (a profile = files sharing a stem)."""
+    if not os.path.isdir(directory):
+        return
+    stems = {}
+    for name in os.listdir(directory):
+        stem, ext = os.path.splitext(name)
+        if ext in _SUFFIXES:
+            mtime = os.path.getmtime(os.path.join(directory, name))
+            stems[stem] = max(stems.get(stem, 0), mtime)
+    for stem in sorted(stems, key=stems.get, reverse=True)[keep:]:
+        for ext in _SUFFIXES:
+            try:
+                os.remove(os.path.join(directory, stem + ext))
+            except FileNotFoundError:
+                pass
+
+
+def write_profile(page, profiler, sampler, elapsed, directory=PROFILE_DIR, top=PROFILE_TOP):
+    """Write collapsed stacks, top-N table and raw stats; returns the file stem."""
+    os.makedirs(directory, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    stem  = f"{stamp}-{int(time.time() * 1000) % 1000:03d}-{page}-{os.getpid()}"
+    base  = os.path.join(directory, stem)
+
+    with open(base + ".collapsed", "w") as f:
+        for stack, count in sampler.stacks.most_common():
+            f.write(f"{stack} {count}\n")
+
+    buf = io.StringIO()
+    stats = pstats.Stats(profiler, stream=buf)
+    stats.sort_stats("cumulative").print_stats(top)
+    with open(base + ".txt", "w") as f:
+        f.write(f"page: {page}\nwall time: {elapsed:.3f}s\n")
+        f.write(f"samples: {sum(sampler.stacks.values())} @ {sampler.interval * 1000:.1f} ms\n\n")
+        f.write(buf.getvalue())
+    stats.dump_stats(base + ".prof")
+
+    rotate_profiles(directory)
+    return stem
+
+
+def profile_page(script_path, script_globals):
+    """Re-run the calling page script under the profilers if profiling is requested.
+
+    Call near the top of a page and stop the outer run when it returns True:
+
+        if profiling.profile_page(__file__, globals()):
+            st.stop()
+
+    The page body is executed once, inside the profilers, in the page's own
+    globals.  Streamlit control-flow exceptions (st.stop, st.switch_page, reruns)
+    propagate unchanged after the profile has been written.
+    """
+    if script_globals.get(_ACTIVE_FLAG) or not profiling_requested():
+        return False
+
+    script_path = os.path.abspath(script_path)
+    with open(script_path, encoding="utf-8") as f:
+        code = compile(f.read(), script_path, "exec")
+
+    page     = os.path.splitext(os.path.basename(script_path))[0]
+    profiler = cProfile.Profile()
+    sampler  = StackSampler(threading.get_ident(), script_path)
+    script_globals[_ACTIVE_FLAG] = True
+    start = time.perf_counter()
+    sampler.start()
+    profiler.enable()
+    try:
+        exec(code, script_globals)
+    finally:
+        profiler.disable()
+        sampler.stop()
+        script_globals[_ACTIVE_FLAG] = False
+        write_profile(page, profiler, sampler, time.perf_counter() - start)
+    return True
@@ -0,0 +1,181 @@
+# rescore.py — re-score the stored assessment history after a model upgrade
+#
+# Streams history.py's assessments in id order, RESCORE_BATCH rows at a time,
+# through the current model file and records old and new probabilities in the
+# `rescores` table, keyed by (assessment, model hash).  Rows already scored by
+# this model (recorded with it, or re-scored earlier) are skipped, and rows
+# with identical encoded inputs within a batch are scored once.  Each batch
+# commits in one transaction together with the last assessment id it read
+# (`rescore_progress`), so an interrupted run loses at most one batch and the
+# next run resumes after the last committed batch, even one that inserted
+# nothing because every row in it was current or unscorable.
+#
+# The summary compares old and new risk bands at the thresholds used by
+# pages/Recommendations.py (stroke_model.LOW_RISK_MAX / MODERATE_RISK_MAX):
+#
+#   python -m rescore [--model pages/best_gb_model.pkl] [--out summary.json]
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import history
+import stroke_model
+
+RESCORE_BATCH = 50_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rescores (
+    assessment_id     INTEGER NOT NULL REFERENCES assessments (id),
+    model_version     TEXT NOT NULL,
+    old_model_version TEXT NOT NULL,
+    old_probability   REAL NOT NULL,
+    new_probability   REAL NOT NULL,
+    rescored_at       REAL NOT NULL,
+    PRIMARY KEY (model_version, assessment_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rescore_progress (
+    model_version TEXT PRIMARY KEY,
+    last_id       INTEGER NOT NULL,
+    updated_at    REAL NOT NULL
+);
+"""
+_BAND_SQL = ("CASE WHEN {p} < {low} THEN 'low' WHEN {p} < {mod} THEN 'moderate' ELSE 'high' END"
+             .replace("{low}", repr(stroke_model.LOW_RISK_MAX))
+             .replace("{mod}", repr(stroke_model.MODERATE_RISK_MAX)))
+
+
+def connect(path=None):
+    conn = history.connect(path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def resume_point(conn, model_version):
+    """Last assessment id read by a committed batch for model_version (batches commit in id order)."""
+    # databases re-scored before rescore_progress existed resume after their last insert
+    return conn.execute("SELECT COALESCE((SELECT last_id FROM rescore_progress WHERE model_version = :m), "
+                        "(SELECT MAX(assessment_id) FROM rescores WHERE model_version = :m), 0)",
+                        {"m": model_version}).fetchone()[0]
+
+
+def batches(conn, after, size=RESCORE_BATCH):
+    """Frames of stored assessments with id > after, in id order."""
+    columns = ["id", "model_version", "probability", *history.INPUTS]
+    while True:
+        rows = conn.execute(f"SELECT {', '.join(columns)} FROM assessments WHERE id > ? ORDER BY id LIMIT ?",
+                            (after, size)).fetchall()
+        if not rows:
+            return
+        frame = pd.DataFrame(rows, columns=columns)
+        after = int(frame["id"].iat[-1])
+        yield frame
+
+
+def score_batch(model, frame):
+    """New probabilities for a frame of stored assessments; identical inputs are scored once."""
+    X_raw = stroke_model.encode_frame(frame)
+    ok = ~np.isnan(X_raw).any(axis=1)
+    unique, inverse = np.unique(X_raw[ok], axis=0, return_inverse=True)
+    probs = np.full(len(frame), np.nan)
+    if len(unique):
+        probs[ok] = stroke_model.predict_proba(model, unique)[inverse.ravel()]
+    return probs, len(unique)
+
+
+def rescore(conn, model, model_version, batch_size=RESCORE_BATCH, limit=None, log=print):
+    """Re-score every assessment not yet scored by model_version; returns this run's counts."""
+    stats = {"read": 0, "skipped": 0, "unscorable": 0, "rescored": 0, "unique_inputs": 0}
+    start = time.perf_counter()
+    for frame in batches(conn, resume_point(conn, model_version), batch_size):
+        stats["read"] += len(frame)
+        last_id = int(frame["id"].iat[-1])
+        current = frame["model_version"].to_numpy() == model_version
+        stats["skipped"] += int(current.sum())
+        frame = frame[~current]
+        probs, n_unique = score_batch(model, frame)
+        ok = ~np.isnan(probs)
+        stats["unscorable"] += int((~ok).sum())
+        stats["unique_inputs"] += n_unique
+        now = time.time()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO rescores VALUES (?, ?, ?, ?, ?, ?)",
+                zip(frame["id"].to_numpy()[ok].tolist(), [model_version] * int(ok.sum()),
+                    frame["model_version"].to_numpy()[ok].tolist(), frame["probability"].to_numpy()[ok].tolist(),
+                    probs[ok].tolist(), [now] * int(ok.sum())))
+            conn.execute("INSERT INTO rescore_progress VALUES (?, ?, ?) ON CONFLICT (model_version) "
+                         "DO UPDATE SET last_id = excluded.last_id, updated_at = excluded.updated_at",
+                         (model_version, last_id, now))
+        stats["rescored"] += int(ok.sum())
+        log(f"  {stats['read']:>12,} read  {stats['rescored']:>12,} re-scored  "
+            f"({stats['read'] / (time.perf_counter() - start):,.0f} rows/s)")
+        if limit is not None and stats["read"] >= limit:
+            break
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+def summary(conn, model_version):
+    """Band transitions and threshold crossings over everything re-scored by model_version."""
+    old_band = _BAND_SQL.replace("{p}", "r.old_probability")
+    new_band = _BAND_SQL.replace("{p}", "r.new_probability")
+    rows = conn.execute(f"""
+        SELECT {old_band} AS old_band, {new_band} AS new_band,
+               COUNT(*) AS assessments, COUNT(DISTINCT a.user_token) AS patients
+        FROM rescores r JOIN assessments a ON a.id = r.assessment_id
+        WHERE r.model_version = ? GROUP BY 1, 2""", (model_version,)).fetchall()
+    transitions = [{"old_band": o, "new_band": n, "assessments": a, "patients": p} for o, n, a, p in rows]
+
+    crossings = {}
+    for name, threshold in (("30%", stroke_model.LOW_RISK_MAX), ("70%", stroke_model.MODERATE_RISK_MAX)):
+        up, up_patients, down, down_patients = conn.execute("""
+            SELECT SUM(r.old_probability < :t AND r.new_probability >= :t),
+                   COUNT(DISTINCT CASE WHEN r.old_probability < :t AND r.new_probability >= :t THEN a.user_token END),
+                   SUM(r.old_probability >= :t AND r.new_probability < :t),
+                   COUNT(DISTINCT CASE WHEN r.old_probability >= :t AND r.new_probability < :t THEN a.user_token END)
+            FROM rescores r JOIN assessments a ON a.id = r.assessment_id
+            WHERE r.model_version = :m""", {"t": threshold, "m": model_version}).fetchone()
+        crossings[name] = {"up": {"assessments": up or 0, "patients": up_patients},
+                           "down": {"assessments": down or 0, "patients": down_patients}}
+
+    total, mean_abs, max_abs = conn.execute(
+        "SELECT COUNT(*), AVG(ABS(new_probability - old_probability)), MAX(ABS(new_probability - old_probability)) "
+        "FROM rescores WHERE model_version = ?", (model_version,)).fetchone()
+    return {"model_version": model_version, "rescored": total, "mean_abs_change": mean_abs or 0.0,
+            "max_abs_change": max_abs or 0.0, "crossings": crossings, "transitions": transitions}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-score stored assessments with the current model file.")
+    parser.add_argument("--model", default=stroke_model.MODEL_PATH, help="model file (default: the app's model)")
+    parser.add_argument("--db", help=f"history database (default: {history.DB_PATH})")
+    parser.add_argument("--batch", type=int, default=RESCORE_BATCH)
+    parser.add_argument("--limit", type=int, help="stop after about this many rows (resume with another run)")
+    parser.add_argument("--out", help="write the summary as JSON here")
+    args = parser.parse_args(argv)
+
+    model = stroke_model.load_model(args.model)
+    model_version = stroke_model.model_hash(args.model)[:16]    # as recorded by history.record()
+    conn = connect(args.db)
+    print(f"re-scoring with model {model_version}, resuming after assessment {resume_point(conn, model_version)}")
+    stats = rescore(conn, model, model_version, args.batch, args.limit)
+    print(f"{stats['rescored']:,} re-scored ({stats['unique_inputs']:,} distinct inputs), "
+          f"{stats['skipped']:,} already current, {stats['unscorable']:,} unscorable in {stats['seconds']:.1f} s")
+
+    report = summary(conn, model_version)
+    for name, crossing in report["crossings"].items():
+        print(f"crossed {name}: {crossing['up']['patients']:,} patients up "
+              f"({crossing['up']['assessments']:,} assessments), {crossing['down']['patients']:,} down "
+              f"({crossing['down']['assessments']:,} assessments)")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
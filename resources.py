@@ -0,0 +1,49 @@
+# resources.py — process-wide cached model objects shared by every page
+#
+# These live in a module (not in the page scripts) so that the cache keys are
+# the same for every page and for the startup warm-up in warmup.py.
+import shap
+import streamlit as st
+
+import heatmap
+import neighbours
+import population
+import stroke_model
+import uncertainty
+
+
+@st.cache_resource(show_spinner=False)
+def load_model():
+    return stroke_model.load_model()
+
+
+@st.cache_resource(show_spinner=False)
+def model_sha():
+    """Hash of the loaded model file; part of the key of every model-derived cache."""
+    return stroke_model.model_hash()
+
+
+@st.cache_resource(show_spinner=False)
+def load_explainer():
+    return shap.TreeExplainer(load_model())
+
+
+@st.cache_resource(show_spinner=False)
+def load_leaf_table():
+    return uncertainty.LeafTable(load_model())
+
+
+@st.cache_resource(show_spinner=False)
+def load_population_index():
+    return population.load_index(model_sha())
+
+
+@st.cache_resource(show_spinner=False)
+def load_neighbour_index():
+    return neighbours.load_index()
+
+
+@st.cache_resource(show_spinner="Preparing the risk map…")
+def load_heatmap_grids():
+    # a missing artifact takes ~10 s to build; serve.py builds it during warm-up
+    return heatmap.load_grids(model_sha())
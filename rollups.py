@@ -0,0 +1,129 @@
+# rollups.py — daily cohort aggregates of stored assessments, kept up to date on insert
+#
+# `cohort_daily` holds, per UTC day × age band × sex × smoking status, the
+# number of assessments, the sum of their predicted risk and the count in each
+# risk band (stroke_model.risk_bands: the thresholds of pages/Recommendations.py).
+# history.py's writer calls apply() on every micro-batch it inserts, in the
+# same transaction, so the rollups never disagree with the raw rows and are
+# never recomputed from them.  pages/Cohort_Analytics.py reads only this table.
+#
+#   python -m rollups rebuild     # recompute from the raw rows (e.g. a pre-existing database)
+import argparse
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+
+import population
+import stroke_model
+
+BANDS = ["low", "moderate", "high"]
+DIMENSIONS = {"age_band": "Age band", "gender": "Sex", "smoking_status": "Smoking status"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cohort_daily (
+    day            TEXT NOT NULL,
+    age_band       TEXT NOT NULL,
+    gender         TEXT NOT NULL,
+    smoking_status TEXT NOT NULL,
+    assessments    INTEGER NOT NULL,
+    risk_sum       REAL NOT NULL,
+    low            INTEGER NOT NULL,
+    moderate       INTEGER NOT NULL,
+    high           INTEGER NOT NULL,
+    PRIMARY KEY (day, age_band, gender, smoking_status)
+) WITHOUT ROWID;
+"""
+_UPSERT = """
+INSERT INTO cohort_daily VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (day, age_band, gender, smoking_status) DO UPDATE SET
+    assessments = assessments + excluded.assessments,
+    risk_sum    = risk_sum + excluded.risk_sum,
+    low         = low + excluded.low,
+    moderate    = moderate + excluded.moderate,
+    high        = high + excluded.high
+"""
+
+
+def aggregate(rows):
+    """{(day, age band, sex, smoking): [n, risk sum, low, moderate, high]} for
+    (created_at, age, gender, smoking_status, probability) tuples."""
+    out = defaultdict(lambda: [0, 0.0, 0, 0, 0])
+    for created_at, age, gender, smoking, prob in rows:
+        key = (time.strftime("%Y-%m-%d", time.gmtime(created_at)), population.band_label(age) or "other",
+               gender, smoking)
+        acc = out[key]
+        acc[0] += 1
+        acc[1] += prob
+        acc[2 + BANDS.index(stroke_model.risk_band(prob))] += 1
+    return out
+
+
+def apply(conn, rows):
+    """Fold a micro-batch of new assessments into the rollups (call inside the insert's transaction)."""
+    conn.executemany(_UPSERT, [(*key, *acc) for key, acc in aggregate(rows).items()])
+
+
+def rebuild(conn, batch=100_000):
+    """Recompute the rollups from every stored assessment, in one transaction."""
+    with conn:
+        conn.execute("DELETE FROM cohort_daily")
+        cur = conn.execute("SELECT created_at, age, gender, smoking_status, probability FROM assessments")
+        while rows := cur.fetchmany(batch):
+            apply(conn, rows)
+
+
+# ── Queries (rollups only) ───────────────────────────────────────────────────
+def query(conn, start_day, end_day, filters=None, by="day"):
+    """Totals per `by` value (day or a DIMENSIONS key) between two ISO days, inclusive.
+
+    filters maps a dimension to the values to keep; returns rows of
+    (key, assessments, mean risk, low share, moderate share, high share).
+    """
+    if by != "day" and by not in DIMENSIONS:
+        raise ValueError(f"cannot group by {by!r}")
+    where, params = ["day BETWEEN ? AND ?"], [start_day, end_day]
+    for dim, values in (filters or {}).items():
+        if dim not in DIMENSIONS:
+            raise ValueError(f"cannot filter on {dim!r}")
+        where.append(f"{dim} IN ({', '.join('?' * len(values))})")
+        params.extend(values)
+    cur = conn.execute(f"""
+        SELECT {by}, SUM(assessments), SUM(risk_sum), SUM(low), SUM(moderate), SUM(high)
+        FROM cohort_daily WHERE {' AND '.join(where)} GROUP BY {by} ORDER BY {by}""", params)
+    out = []
+    for key, n, risk, low, moderate, high in cur:
+        out.append((key, n, risk / n, low / n, moderate / n, high / n))
+    return out
+
+
+def bounds(conn):
+    """(first day, last day) present in the rollups, or (None, None)."""
+    return conn.execute("SELECT MIN(day), MAX(day) FROM cohort_daily").fetchone()
+
+
+def values(conn, dimension):
+    return [v for v, in conn.execute(f"SELECT DISTINCT {dimension} FROM cohort_daily ORDER BY 1")]
+
+
+def main(argv=None):
+    import history
+
+    parser = argparse.ArgumentParser(description="Maintain the cohort rollups of the assessment history.")
+    parser.add_argument("command", choices=["rebuild", "check"])
+    args = parser.parse_args(argv)
+    conn = history.connect()
+    start = time.perf_counter()
+    if args.command == "rebuild":
+        rebuild(conn)
+        print(f"rebuilt cohort_daily in {time.perf_counter() - start:.1f} s")
+    raw = conn.execute("SELECT COUNT(*), COALESCE(SUM(probability), 0) FROM assessments").fetchone()
+    rolled = conn.execute("SELECT COALESCE(SUM(assessments), 0), COALESCE(SUM(risk_sum), 0) FROM cohort_daily").fetchone()
+    match = raw[0] == rolled[0] and np.isclose(raw[1], rolled[1])
+    print(f"{raw[0]:,} assessments stored, {rolled[0]:,} in the rollups: {'consistent' if match else 'MISMATCH'}")
+    return 0 if match else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
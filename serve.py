@@ -0,0 +1,36 @@
+# serve.py — production entry point: warm-up + readiness endpoint + Streamlit
+#
+#   python serve.py [streamlit run options...]
+#   e.g. python serve.py --server.port 8501 --server.headless true
+#
+# Starts the status server (/live, /ready, /metrics on STROKE_STATUS_PORT), kicks off the
+# warm-up in this process, then runs `streamlit run app.py` in the same
+# interpreter so the warmed caches are the ones the pages use.  With
+# STROKE_JOB_WORKERS=N it also starts N background job workers (jobqueue.py).
+# The input-drift monitor (drift.py) is scheduled from start-up.
+import os
+import sys
+
+from streamlit.web import cli as stcli
+
+import diagnostics  # noqa: F401  registers memory metrics on /metrics
+import drift
+import jobqueue
+import status_server
+import stroke_model
+import warmup
+
+
+def main():
+    status_server.start()
+    warmup.start_background()
+    drift.MONITOR.start()
+    job_workers = int(os.environ.get("STROKE_JOB_WORKERS", "0"))
+    if job_workers:
+        jobqueue.spawn_workers(job_workers)
+    sys.argv = ["streamlit", "run", os.path.join(stroke_model.BASE_DIR, "app.py"), *sys.argv[1:]]
+    return stcli.main()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
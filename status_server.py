@@ -0,0 +1,75 @@
+# status_server.py — small side-port HTTP server for readiness and ops endpoints
+#
+# Streamlit only exposes /_stcore/health (process is up), so readiness and
+# other operational endpoints are served from a separate port
+# (STROKE_STATUS_PORT, default 8502) by a daemon thread in the server process.
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STATUS_HOST = os.environ.get("STROKE_STATUS_HOST", "0.0.0.0")
+STATUS_PORT = int(os.environ.get("STROKE_STATUS_PORT", "8502"))
+
+ROUTES  = {}
+CHECKS  = []
+_server = None
+_lock   = threading.Lock()
+
+
+def route(path):
+    """Register `fn() -> (status, content_type, body)` for GET `path`."""
+    def register(fn):
+        ROUTES[path] = fn
+        return fn
+    return register
+
+
+def check(fn):
+    """Register `fn() -> problem string or None`; /ready answers 503 while any reports a problem."""
+    CHECKS.append(fn)
+    return fn
+
+
+def problems():
+    return [problem for problem in (fn() for fn in CHECKS) if problem]
+
+
+def json_response(payload, status=200):
+    return status, "application/json", json.dumps(payload, indent=2, default=str)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        handler = ROUTES.get(self.path.split("?", 1)[0])
+        if handler is None:
+            status, ctype, body = json_response({"error": "not found", "routes": sorted(ROUTES)}, 404)
+        else:
+            try:
+                status, ctype, body = handler()
+            except Exception as exc:  # an ops endpoint must never take the thread down
+                status, ctype, body = json_response({"error": repr(exc)}, 500)
+        data = body.encode() if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start(host=STATUS_HOST, port=STATUS_PORT):
+    """Start the server once per process; returns the ThreadingHTTPServer."""
+    global _server
+    with _lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _Handler)
+            threading.Thread(target=_server.serve_forever, name="stroke-status-server", daemon=True).start()
+    return _server
+
+
+@route("/live")
+def live():
+    return json_response({"status": "alive"})
@@ -0,0 +1,183 @@
+# stroke_model.py — shared feature transform and model loading
+#
+# Every page, CLI tool and benchmark encodes inputs through this module so the
+# feature order, category maps and scaling stay identical to what
+# pages/Risk_Assessment.py feeds the model.
+import hashlib
+import os
+
+import joblib
+import numpy as np
+
+BASE_DIR      = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH    = os.path.join(BASE_DIR, "pages", "best_gb_model.pkl")
+DATASET_PATH  = os.path.join(BASE_DIR, "pages", "stroke_dataset.csv")
+# derived indexes and lookup tables (rebuildable; see population.py)
+ARTIFACTS_DIR = os.environ.get("STROKE_ARTIFACTS_DIR", os.path.join(BASE_DIR, "artifacts"))
+
+# raw feature order fed to add_poly (training order used by the pages)
+FEATURES = [
+    "age", "avg_glucose_level", "heart_disease", "hypertension",
+    "ever_married", "smoking_status", "work_type", "gender",
+]
+FEATURE_LABELS = [
+    "Age", "Avg Glucose", "Heart Disease", "Hypertension",
+    "Ever Married", "Smoking Status", "Work Type", "Gender",
+]
+
+# ── Category maps (same as the assessment form) ──────────────────────────────
+HEART_MAP   = {"Yes": 1, "No": 0}
+HTN_MAP     = {"Yes": 1, "No": 0}
+MARRIED_MAP = {"Yes": 1, "No": 0}
+SMOKE_MAP   = {"never smoked": 0, "formerly smoked": 1, "smokes": 2}
+WORK_MAP    = {"Private": 0, "Self-employed": 1, "Govt_job": 2, "Never_worked": 3}
+GENDER_MAP  = {"Male": 0, "Female": 1}
+
+AGE_RANGE     = (18, 100)
+GLUCOSE_RANGE = (55.0, 300.0)
+
+# ── Risk bands (probabilities) shared by pages and batch tools ────────────────
+LOW_RISK_MAX      = 0.30   # below: low risk; at or above: flagged in screening
+MODERATE_RISK_MAX = 0.70   # at or above: high risk
+
+
+def risk_band(prob):
+    if prob < LOW_RISK_MAX:
+        return "low"
+    if prob < MODERATE_RISK_MAX:
+        return "moderate"
+    return "high"
+
+
+def risk_bands(probs):
+    """risk_band() for an array of probabilities."""
+    probs = np.asarray(probs)
+    return np.select([probs < LOW_RISK_MAX, probs < MODERATE_RISK_MAX], ["low", "moderate"], "high")
+
+
+# ── Polynomial features ──────────────────────────────────────────────────────
+def add_poly(X):
+    age    = X[:, 0]
+    glu    = X[:, 1]
+    age_sq = age ** 2
+    inter  = age * glu
+    glu_sq = glu ** 2
+    return np.c_[X, age_sq, inter, glu_sq]
+
+
+# ── Hard-coded scaler parameters (from training) ─────────────────────────────
+SCALER_MEAN = np.array([
+    47.4572, 106.1478,  # age, glucose
+    0.0482, 0.0513,     # heart_disease, hypertension
+    0.5527, 0.5431,     # ever_married, smoking_status
+    2.1356, 0.5064,     # work_type, gender
+    1850.37, 5067.84, 11645.2  # age_sq, inter, glu_sq
+])
+SCALER_SCALE = np.array([
+    15.6753, 26.8145,
+    0.2141, 0.2206,
+    0.4974, 0.4983,
+    0.9082, 0.4999,
+    2978.41, 6144.78, 10795.6
+])
+
+
+def encode(user_data):
+    """Raw feature row (training order) from the form answers in user_data."""
+    return [
+        user_data["age"],
+        user_data["avg_glucose_level"],
+        HEART_MAP[user_data["heart_disease"]],
+        HTN_MAP[user_data["hypertension"]],
+        MARRIED_MAP[user_data["ever_married"]],
+        SMOKE_MAP[user_data["smoking_status"]],
+        WORK_MAP[user_data["work_type"]],
+        GENDER_MAP[user_data["gender"]],
+    ]
+
+
+def form_answers(df):
+    """Rows of a stroke_dataset.csv-style frame the assessment form can express,
+    with flags mapped to the form's Yes/No answers."""
+    out = df.copy()
+    for col in ("hypertension", "heart_disease"):
+        out[col] = out[col].map({1: "Yes", 0: "No", "1": "Yes", "0": "No"})
+    ok = (
+        out["gender"].isin(list(GENDER_MAP))
+        & out["ever_married"].isin(list(MARRIED_MAP))
+        & out["work_type"].isin(list(WORK_MAP))
+        & out["smoking_status"].isin(list(SMOKE_MAP))
+        & out["hypertension"].isin(list(HTN_MAP))
+        & out["heart_disease"].isin(list(HEART_MAP))
+        & out["age"].between(*AGE_RANGE)
+        & out["avg_glucose_level"].between(*GLUCOSE_RANGE)
+    )
+    return out[ok]
+
+
+def encode_frame(df):
+    """(n, 8) raw matrix from a frame of form answers (see form_answers)."""
+    return np.c_[
+        df["age"].to_numpy(dtype=float),
+        df["avg_glucose_level"].to_numpy(dtype=float),
+        df["heart_disease"].map(HEART_MAP).to_numpy(dtype=float),
+        df["hypertension"].map(HTN_MAP).to_numpy(dtype=float),
+        df["ever_married"].map(MARRIED_MAP).to_numpy(dtype=float),
+        df["smoking_status"].map(SMOKE_MAP).to_numpy(dtype=float),
+        df["work_type"].map(WORK_MAP).to_numpy(dtype=float),
+        df["gender"].map(GENDER_MAP).to_numpy(dtype=float),
+    ]
+
+
+def transform(X_raw):
+    """Polynomial features + scaling for a (n, 8) raw matrix."""
+    X_raw = np.asarray(X_raw, dtype=float).reshape(-1, len(FEATURES))
+    return (add_poly(X_raw) - SCALER_MEAN) / SCALER_SCALE
+
+
+def predict_proba(model, X_raw):
+    """Stroke probability for each raw row, in one batched model call."""
+    return model.predict_proba(transform(X_raw))[:, 1]
+
+
+def random_raw(n, seed=0):
+    """n raw rows drawn uniformly from the assessment form's input domain."""
+    rng = np.random.default_rng(seed)
+    return np.c_[
+        rng.integers(AGE_RANGE[0], AGE_RANGE[1] + 1, n),
+        rng.uniform(GLUCOSE_RANGE[0], GLUCOSE_RANGE[1], n).round(1),
+        rng.integers(0, 2, n),
+        rng.integers(0, 2, n),
+        rng.integers(0, 2, n),
+        rng.integers(0, len(SMOKE_MAP), n),
+        rng.integers(0, len(WORK_MAP), n),
+        rng.integers(0, 2, n),
+    ].astype(float)
+
+
+def load_dataset(path=DATASET_PATH):
+    """Typed frame of a stroke_dataset.csv-style file, via the columnar cache in dataset.py."""
+    import dataset
+
+    return dataset.load(path)
+
+
+def load_model(path=MODEL_PATH):
+    return joblib.load(path)
+
+
+def file_hash(path):
+    """sha256 of a file, used to key artifacts derived from it."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def model_hash(path=MODEL_PATH):
+    return file_hash(path)
+
+
+def dataset_hash(path=DATASET_PATH):
+    return file_hash(path)
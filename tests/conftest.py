@@ -0,0 +1,35 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import history  # noqa: E402
+import stroke_model  # noqa: E402
+
+HEADER = "id,gender,age,hypertension,heart_disease,ever_married,work_type,avg_glucose_level,smoking_status"
+GOOD = b"1,Male,67,0,1,Yes,Private,228.69,formerly smoked\n"
+
+
+def random_user(rng):
+    """A random set of assessment form answers."""
+    return {"age": int(rng.integers(*stroke_model.AGE_RANGE)), "avg_glucose_level": 100.0,
+            "heart_disease": "No", "hypertension": "No", "ever_married": "Yes", "work_type": "Private",
+            "smoking_status": str(rng.choice(list(stroke_model.SMOKE_MAP))),
+            "gender": str(rng.choice(list(stroke_model.GENDER_MAP)))}
+
+
+@pytest.fixture(scope="session")
+def model():
+    return stroke_model.load_model()
+
+
+@pytest.fixture
+def history_db(tmp_path, monkeypatch):
+    """A scratch history database, with a writer of its own for history.record()."""
+    monkeypatch.setattr(history, "DB_PATH", str(tmp_path / "history.sqlite3"))
+    monkeypatch.setattr(history, "_writer", None)
+    yield history.DB_PATH
+    if history._writer is not None:
+        history._writer.close()
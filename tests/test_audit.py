@@ -0,0 +1,120 @@
+import json
+import os
+import time
+
+import pytest
+
+import audit
+
+FORM = {"age": 67, "avg_glucose_level": 228.69, "heart_disease": "Yes", "hypertension": "No",
+        "ever_married": "Yes", "smoking_status": "formerly smoked", "work_type": "Private", "gender": "Male"}
+
+
+def _record(i):
+    return {"ts": 1e9 + i, "inputs": FORM, "encoded": [67.0, 228.69, 1, 0, 1, 1, 0, 0],
+            "model_sha": "0" * 64, "probability": 0.01}
+
+
+def _write(directory, n):
+    w = audit.Writer(str(directory))
+    for i in range(n):
+        w.put(_record(i))
+    assert w.flush(timeout=10)
+    w.close()
+    return w
+
+
+def test_chain_verifies(tmp_path):
+    _write(tmp_path, 100)
+    ok, head, records, _, problem = audit.verify(str(tmp_path))
+    assert ok and records == 100 and problem is None
+
+
+@pytest.mark.parametrize("change", ["edit", "delete", "swap"])
+def test_tampering_breaks_the_chain(tmp_path, change):
+    _write(tmp_path, 50)
+    path, = audit.segment_paths(str(tmp_path))
+    lines = open(path, "rb").read().splitlines(keepends=True)
+    if change == "edit":
+        prefix, body = lines[20][:65], json.loads(lines[20][65:])
+        body["probability"] = 0.99
+        lines[20] = prefix + json.dumps(body, separators=(",", ":"), sort_keys=True).encode() + b"\n"
+    elif change == "delete":
+        del lines[20]
+    else:
+        lines[20], lines[21] = lines[21], lines[20]
+    open(path, "wb").writelines(lines)
+    ok, _, records, _, problem = audit.verify(str(tmp_path))
+    assert not ok
+    # an edited line still links to its predecessor: the break shows on the line after it
+    assert problem == f"audit-000001.log:{22 if change == 'edit' else 21} does not chain"
+
+
+def test_writer_survives_write_errors(tmp_path, monkeypatch):
+    w = audit.Writer(str(tmp_path))
+    w.put(_record(0))
+    assert w.flush(timeout=10)
+
+    def full_disk(fd):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(os, "fsync", full_disk)
+    w.put(_record(1))
+    assert w.flush(timeout=10)
+    # written but not synced: on disk and chained on, so not failed
+    assert (w.written, w.unsynced, w.failed) == (2, 1, 0) and "No space" in w.problem()
+
+    monkeypatch.undo()
+    w.put({"ts": 1e9, "bad": object()})       # not serialisable: only this record is lost
+    w.put(_record(2))
+    assert w.flush(timeout=10)
+    assert w.problem() is None and (w.written, w.unsynced, w.failed) == (3, 1, 1)
+    w.close()
+    ok, _, records, _, _ = audit.verify(str(tmp_path))
+    assert ok and records == w.written
+
+
+class _TornFile:
+    """A segment file whose writes stop after the first line, as on a disk that fills up."""
+
+    def __init__(self, f):
+        self._f = f
+
+    def write(self, data):
+        self._f.write(data[:data.index(b"\n") + 1])
+        self._f.flush()
+        raise OSError(28, "No space left on device")
+
+    def __getattr__(self, name):
+        return getattr(self._f, name)
+
+
+def test_failed_write_counts_only_the_lost_records(tmp_path, monkeypatch):
+    _write(tmp_path, 1)
+    monkeypatch.setattr(audit, "open", lambda path, mode: _TornFile(open(path, mode)) if mode == "ab"
+                        else open(path, mode), raising=False)
+    w = audit.Writer(str(tmp_path))
+    for i in range(1, 4):                     # one group: the first line lands, two do not
+        w.put(_record(i))
+    assert w.flush(timeout=10)
+    monkeypatch.undo()
+    assert (w.written, w.failed) == (1, 2) and "No space" in w.problem()
+
+    w.put(_record(4))
+    assert w.flush(timeout=10)
+    assert w.problem() is None
+    w.close()
+    ok, _, records, _, _ = audit.verify(str(tmp_path))
+    assert ok and records == 1 + w.written == 3
+
+
+def test_flush_times_out_instead_of_hanging(tmp_path, monkeypatch):
+    monkeypatch.setattr(audit, "QUEUE_MAX", 2)
+    w = audit.Writer(str(tmp_path))
+    monkeypatch.setattr(w, "_append", lambda f, prev, seq, records: time.sleep(1) or (prev, seq))
+    for i in range(5):
+        w.put(_record(i))
+    assert w.dropped >= 1
+    assert w.flush(timeout=0.1) is False
+    assert w.flush(timeout=10)
+    w.close()
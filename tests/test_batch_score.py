@@ -0,0 +1,57 @@
+import csv
+import io
+
+import pytest
+
+import batch_score
+import cascade
+from conftest import GOOD, HEADER
+
+
+def _score(model, lines):
+    out, rejects = io.StringIO(), io.StringIO()
+    stats = batch_score.score_blocks(model, HEADER, [lines], out, rejects)
+    scored = list(csv.DictReader(io.StringIO(out.getvalue())))
+    rejected = list(csv.DictReader(io.StringIO(rejects.getvalue())))
+    return stats, scored, rejected
+
+
+@pytest.mark.parametrize("bad", [
+    b"2,M\xffle,67,0,1,Yes,Private,228.69,formerly smoked\n",      # not UTF-8
+    b'2,Male,"67,0,1,Yes,Private,228.69,formerly smoked\n',        # stray quote
+    b"2,Male,67,0\n",                                              # short row
+    b"2,Male,67,0,1,Yes,Private,228.69,formerly smoked,x,y\n",     # long row
+], ids=["bad-byte", "stray-quote", "short-row", "long-row"])
+def test_bad_line_only_rejects_itself(model, bad):
+    lines = [GOOD, GOOD, bad, GOOD, GOOD, GOOD]
+    stats, scored, rejected = _score(model, lines)
+    assert stats == {"rows": 6, "scored": 5, "rejected": 1}
+    assert len(scored) == 5 and len(rejected) == 1
+    assert all(row["risk_band"] for row in scored)
+
+
+def test_quoted_fields_parse(model):
+    stats, scored, _ = _score(model, [GOOD, b'3,"Male",67,0,1,Yes,Private,228.69,"formerly smoked"\r\n'])
+    assert stats["scored"] == 2
+    assert scored[1]["smoking_status"] == "formerly smoked"
+
+
+def test_parse_block_accounts_for_every_line():
+    lines = [GOOD, b'2,Male,"67\n', GOOD, b"\xff\xfe\n", GOOD]
+    frame, malformed = batch_score.parse_block(HEADER, lines)
+    assert len(frame) == 3 and len(malformed) == 2
+    assert sum(line.startswith("not UTF-8") for line in malformed) == 1
+
+
+@pytest.mark.parametrize("half_width, escalated", [(0.0, 0), (1e9, 3)])
+def test_cascade_reports_escalations(model, half_width, escalated):
+    screener = cascade.Screener(**{**batch_score.load_screener().to_dict(), "half_width": half_width})
+    out, rejects = io.StringIO(), io.StringIO()
+    stats = batch_score.score_blocks(model, HEADER, [[GOOD] * 3 + [b"9,Male,12,0,1,Yes,Private,90,smokes\n"]],
+                                     out, rejects, screener=screener)
+    assert stats == {"rows": 4, "scored": 3, "rejected": 1, "escalated": escalated}
+    scored = list(csv.DictReader(io.StringIO(out.getvalue())))
+    assert [row["scored_by"] for row in scored] == ["model" if escalated else "screener"] * 3
+    if escalated:
+        _, plain, _ = _score(model, [GOOD])
+        assert scored[0]["stroke_risk"] == plain[0]["stroke_risk"]
@@ -0,0 +1,40 @@
+import io
+import time
+
+import pytest
+
+import bulk_upload
+import uncertainty
+from conftest import GOOD, HEADER
+
+
+@pytest.fixture(autouse=True)
+def spool(tmp_path, monkeypatch):
+    monkeypatch.setattr(bulk_upload, "SPOOL_DIR", str(tmp_path))
+
+
+def _wait(job, timeout=30):
+    deadline = time.monotonic() + timeout
+    while job.snapshot()["state"] in ("queued", "running"):
+        assert time.monotonic() < deadline, "job did not finish"
+        time.sleep(0.02)
+    return job.snapshot()
+
+
+@pytest.mark.parametrize("body", [
+    HEADER.encode() + b"\n" + b"1,Male,12,0,1,Yes,Private,228.69,formerly smoked\n" * 3,   # all under 18
+    b"id,name\n1,a\n2,b\n",                                                           # no required columns
+], ids=["under-18", "missing-columns"])
+def test_upload_without_valid_rows_reports_rejects(model, body):
+    snap = _wait(bulk_upload.submit(io.BytesIO(body), "empty.csv", model, uncertainty.LeafTable(model)))
+    assert snap["state"] == "done", snap["error"]
+    assert snap["scored"] == 0 and snap["rejected"] == snap["rows"] > 0
+    assert snap["bands"] == {}
+
+
+def test_upload_scores_rows(model):
+    body = HEADER.encode() + b"\n" + GOOD * 10
+    snap = _wait(bulk_upload.submit(io.BytesIO(body), "ok.csv", model))
+    assert snap["state"] == "done", snap["error"]
+    assert snap["scored"] == 10 and sum(snap["bands"].values()) == 10
+    assert len(snap["preview"]) == 10
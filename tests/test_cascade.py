@@ -0,0 +1,45 @@
+import numpy as np
+
+import cascade
+import stroke_model
+
+
+class _CurvedModel:
+    """A model whose log-odds are not linear in the features and span all three risk bands."""
+
+    def decision_function(self, Z):
+        return Z[:, 0] + 0.8 * Z[:, 1] + 0.6 * np.sin(3 * Z[:, 0]) - 0.3
+
+    def predict_proba(self, Z):
+        p = 1.0 / (1.0 + np.exp(-self.decision_function(Z)))
+        return np.c_[1 - p, p]
+
+
+def test_band_agreement_holds_across_both_thresholds():
+    model = _CurvedModel()
+    screener = cascade.Screener.fit(model, stroke_model.random_raw(20_000, seed=1),
+                                    stroke_model.random_raw(20_000, seed=2), tolerance=0.01)
+    result = cascade.report(model, screener, stroke_model.random_raw(20_000, seed=3))
+    assert all(result["full_model_bands"].values())
+    assert 0 < result["escalation_rate"] < 1
+    assert result["agreement_rate"] >= 1 - 2 * screener.tolerance
+
+
+def test_half_width_covers_the_union_of_thresholds():
+    cut_low, cut_high = cascade._logit(np.array(cascade.BAND_THRESHOLDS))
+    # each row crosses one threshold, at a distance of 1 from it: every row needs the band
+    z = np.r_[np.full(50, cut_low - 1.0), np.full(50, cut_high + 1.0)]
+    f = np.r_[np.full(50, cut_low + 0.5), np.full(50, cut_high - 0.5)]
+    assert cascade.band_half_width(z, f, tolerance=0.01) == 1.0
+    assert cascade.band_half_width(z, z, tolerance=0.01) == 0.0
+
+
+def test_stale_single_threshold_screener_is_refitted(tmp_path, monkeypatch):
+    monkeypatch.setattr(stroke_model, "ARTIFACTS_DIR", str(tmp_path))
+    path = cascade.screener_path("0" * 64)
+    fitted = cascade.Screener(np.zeros(11), 0.0, 0.5, cascade.DEFAULT_TOLERANCE)
+    monkeypatch.setattr(cascade, "build_screener", lambda **kwargs: fitted)
+    (tmp_path / "cascade" / ("0" * 16)).mkdir(parents=True)
+    with open(path, "w") as f:
+        f.write('{"coef": [0], "intercept": 0, "half_width": 2.8, "tolerance": 0.001}')
+    assert cascade.load_screener("0" * 64) is fitted
@@ -0,0 +1,23 @@
+import os
+
+import pandas as pd
+
+import dataset
+import stroke_model
+
+
+def test_cache_matches_the_csv_and_replaces_stale_versions(tmp_path, monkeypatch):
+    monkeypatch.setattr(stroke_model, "ARTIFACTS_DIR", str(tmp_path))
+    csv = tmp_path / "stroke_dataset.csv"
+    raw = pd.read_csv(stroke_model.DATASET_PATH)
+    raw.head(100).to_csv(csv, index=False)
+    first = dataset.build(str(csv))
+    other = tmp_path / "dataset" / "other-0000000000000000.arrow"
+    other.write_bytes(b"")
+
+    raw.head(200).to_csv(csv, index=False)                 # the CSV changes: a new cache file
+    frame = dataset.load(str(csv))
+    pd.testing.assert_frame_equal(frame, dataset.typed(raw.head(200)))
+    assert not os.path.exists(first)
+    assert sorted(os.listdir(tmp_path / "dataset")) == sorted(
+        [os.path.basename(dataset.cache_path(str(csv))), other.name])
@@ -0,0 +1,57 @@
+import time
+
+import numpy as np
+
+import history
+import rollups
+from conftest import random_user
+
+
+class _Session(dict):
+    """st.session_state's mix of item and attribute access."""
+
+    __getattr__ = dict.__getitem__
+    __setattr__ = dict.__setitem__
+
+
+def test_flush_waits_for_every_queued_row(history_db):
+    rng = np.random.default_rng(0)
+    for i in range(1200):                       # more than one BATCH_MAX transaction
+        history.record("user", random_user(rng), 0.01, "v1", created_at=1e9 + i)
+    assert history.writer().flush(timeout=10)
+    assert history.writer().written == 1200 and history.writer().batches >= 3
+    assert history.reader().execute("SELECT COUNT(*) FROM assessments").fetchone()[0] == 1200
+
+
+def test_flush_times_out_instead_of_hanging(history_db, monkeypatch):
+    apply = rollups.apply
+    monkeypatch.setattr(rollups, "apply", lambda conn, rows: time.sleep(1) or apply(conn, rows))
+    history.record("user", random_user(np.random.default_rng(0)), 0.01, "v1")
+    assert history.writer().flush(timeout=0.1) is False
+    assert history.writer().flush(timeout=10)
+
+
+def test_recent_is_newest_first_per_user_with_shap(history_db):
+    rng = np.random.default_rng(0)
+    shap = rng.normal(size=11)
+    for i in range(10):
+        history.record("alice", random_user(rng), i / 100, "v1", shap if i == 9 else None, created_at=1e9 + i)
+        history.record("bob", random_user(rng), 0.5, "v1", created_at=1e9 + i + 0.5)
+    assert history.writer().flush(timeout=10)
+
+    rows = history.recent("alice", limit=3)
+    assert [row["created_at"] for row in rows] == [1e9 + 9, 1e9 + 8, 1e9 + 7]
+    assert [row["probability"] for row in rows] == [0.09, 0.08, 0.07]
+    np.testing.assert_array_equal(rows[0]["shap"], shap.astype(np.float32))
+    assert rows[1]["shap"] is None
+    assert len(history.recent("alice")) == 10 and history.recent("carol") == []
+
+
+def test_user_token_prefers_the_query_param_and_sticks():
+    session = _Session()
+    assert history.user_token(session, {"user": "abc"}) == "abc"
+    assert history.user_token(session, {}) == "abc"
+
+    fresh = _Session()
+    token = history.user_token(fresh, {})
+    assert len(token) >= 16 and history.user_token(fresh, {"user": "other"}) == token
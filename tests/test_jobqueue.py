@@ -0,0 +1,121 @@
+import os
+import socket
+import sqlite3
+import time
+
+import pytest
+
+import batch_score
+import jobqueue
+import parallel_score
+from conftest import GOOD, HEADER
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobqueue, "DB_PATH", str(tmp_path / "jobs.sqlite3"))
+    monkeypatch.setitem(jobqueue.CHUNK_BYTES, "score", 2000)
+    monkeypatch.setitem(jobqueue.CHUNK_BYTES, "explain", 2000)
+    path = tmp_path / "in.csv"
+    rows = [GOOD.replace(b"1,", f"{i},".encode(), 1) for i in range(200)]
+    rows[50] = b'50,Male,"67,0\n'
+    path.write_bytes(HEADER.encode() + b"\n" + b"".join(rows))
+    return jobqueue.connect(), path
+
+
+@pytest.mark.parametrize("kind", ["score", "explain"])
+def test_job_matches_single_pass(queue, tmp_path, kind):
+    conn, path = queue
+    job_id = jobqueue.submit(kind, path, conn=conn)
+    assert conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0] > 1
+    jobqueue.work(stop_when_idle=True, poll=0.01)
+    job = jobqueue.job(job_id, conn)
+    assert job["state"] == "done", job["error"]
+    if kind == "score":
+        batch_score.score_file(str(path), str(tmp_path / "ref.csv"), str(tmp_path / "ref.rej"))
+        assert open(job["output_path"]).read() == open(tmp_path / "ref.csv").read()
+        assert open(job["reject_path"]).read() == open(tmp_path / "ref.rej").read()
+    else:
+        lines = open(job["output_path"]).read().splitlines()
+        assert lines[0].split(",")[-len(jobqueue.SHAP_COLUMNS):] == jobqueue.SHAP_COLUMNS
+        assert len(lines) == 200
+
+
+def test_merge_holds_no_database_lock(queue, monkeypatch):
+    conn, path = queue
+    job_id = jobqueue.submit("score", path, conn=conn)
+    merge = parallel_score.merge
+
+    def merge_while_writing(parts, columns, out):
+        other = sqlite3.connect(jobqueue.DB_PATH, timeout=0)
+        other.execute("BEGIN IMMEDIATE")          # a claim() elsewhere must not wait on the merge
+        other.execute("ROLLBACK")
+        other.close()
+        merge(parts, columns, out)
+
+    monkeypatch.setattr(parallel_score, "merge", merge_while_writing)
+    jobqueue.work(stop_when_idle=True, poll=0.01)
+    assert jobqueue.job(job_id, conn)["state"] == "done"
+
+
+def test_interrupted_merge_is_taken_over(queue, monkeypatch):
+    conn, path = queue
+    job_id = jobqueue.submit("score", path, conn=conn)
+    runner = jobqueue.Runner()
+    with monkeypatch.context() as m:
+        m.setattr(jobqueue, "finalise", lambda *args: False)
+        while (claimed := jobqueue.claim(conn, "me")) is not None:
+            job, chunk = claimed
+            assert jobqueue.complete(conn, job, chunk, "me", runner.run(job, chunk, "me"), 0.0)
+    # the merging worker was killed: its process no longer exists
+    conn.execute("UPDATE jobs SET state = 'merging', worker = ?, lease_until = 1e12 WHERE id = ?",
+                 (f"{socket.gethostname()}:999999999", job_id))
+    jobqueue.work(stop_when_idle=True, poll=0.01)
+    job = jobqueue.job(job_id, conn)
+    assert job["state"] == "done", job["error"]
+    assert len(open(job["output_path"]).read().splitlines()) == 200
+
+
+def test_expired_claim_keeps_the_new_workers_parts(queue):
+    conn, path = queue
+    jobqueue.submit("score", path, conn=conn)
+    runner = jobqueue.Runner()
+    job, chunk = jobqueue.claim(conn, "slow")
+    # slow's lease runs out while it is still scoring: fast takes the chunk over
+    _, taken = jobqueue.claim(conn, "fast", now=time.time() + jobqueue.LEASE + 1)
+    assert taken["chunk"] == chunk["chunk"]
+    slow_stats = runner.run(job, chunk, "slow")
+    fast_stats = runner.run(job, chunk, "fast")
+    with open(jobqueue.staged_paths(job, chunk["chunk"], "slow")[0], "a") as f:
+        f.write("written by slow\n")
+    assert not jobqueue.complete(conn, job, chunk, "slow", slow_stats, 0.0)
+    assert jobqueue.complete(conn, job, chunk, "fast", fast_stats, 0.0)
+    part, _ = jobqueue.part_paths(job, chunk["chunk"])
+    assert "written by slow" not in open(part).read()
+    assert sorted(os.listdir(os.path.dirname(part))) == sorted(
+        os.path.basename(p) for p in jobqueue.part_paths(job, chunk["chunk"]))
+
+
+def test_worker_survives_a_busy_database(queue, monkeypatch):
+    conn, path = queue
+    job_id = jobqueue.submit("score", path, conn=conn)
+    claim, calls = jobqueue.claim, []
+
+    def flaky_claim(*args):
+        calls.append(1)
+        if len(calls) <= 2:
+            raise sqlite3.OperationalError("database is locked")
+        return claim(*args)
+
+    monkeypatch.setattr(jobqueue, "claim", flaky_claim)
+    jobqueue.work(stop_when_idle=True, poll=0.01)
+    assert jobqueue.job(job_id, conn)["state"] == "done"
+
+
+def test_cascade_job_counts_escalations(queue):
+    conn, path = queue
+    job_id = jobqueue.submit("score", path, conn=conn, cascade=True)
+    jobqueue.work(stop_when_idle=True, poll=0.01)
+    row, = [r for r in jobqueue.jobs(conn=conn) if r["id"] == job_id]
+    assert row["state"] == "done" and row["escalated"] is not None
+    assert open(row["output_path"]).readline().rstrip().endswith(",scored_by")
@@ -0,0 +1,33 @@
+import numpy as np
+
+import history
+import rescore
+from conftest import random_user
+
+
+def _store(n_current, n_old, n_unscorable):
+    rng = np.random.default_rng(0)
+    versions = ["new"] * n_current + ["old"] * n_old + ["old"] * n_unscorable
+    for i, version in enumerate(versions):
+        user = random_user(rng)
+        if i >= n_current + n_old:
+            user["work_type"] = "Astronaut"     # not a form answer: cannot be encoded
+        history.record("user", user, 0.01, version, created_at=1.7e9 + i)
+    assert history.writer().flush(timeout=10)
+    return rescore.connect()
+
+
+def test_interrupted_run_resumes_after_the_last_batch_read(history_db, model):
+    # the first batch is all current-version rows: it inserts nothing, but still counts as read
+    conn = _store(n_current=10, n_old=25, n_unscorable=5)
+    first = rescore.rescore(conn, model, "new", batch_size=10, limit=10, log=lambda *_: None)
+    assert (first["read"], first["skipped"], first["rescored"]) == (10, 10, 0)
+    assert rescore.resume_point(conn, "new") == 10
+
+    second = rescore.rescore(conn, model, "new", batch_size=10, log=lambda *_: None)
+    assert (second["read"], second["skipped"], second["rescored"], second["unscorable"]) == (30, 0, 25, 5)
+    assert rescore.resume_point(conn, "new") == 40
+
+    third = rescore.rescore(conn, model, "new", batch_size=10, log=lambda *_: None)
+    assert third["read"] == 0
+    assert conn.execute("SELECT COUNT(*) FROM rescores WHERE model_version = 'new'").fetchone()[0] == 25
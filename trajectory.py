@@ -0,0 +1,39 @@
+# trajectory.py — projected risk over the coming years for one profile
+#
+# Every future row (age + 1 … age + YEARS, optional yearly glucose drift) is
+# built at once and scored in a single predict_proba call through the shared
+# stroke_model transform.  Pages keep the result in st.session_state next to
+# the prediction it was made for (see cached_projection).
+import numpy as np
+
+import stroke_model
+
+YEARS = 20
+
+_AGE = stroke_model.FEATURES.index("age")
+_GLU = stroke_model.FEATURES.index("avg_glucose_level")
+
+
+def project(model, raw, years=YEARS, glucose_drift=0.0):
+    """(offsets, ages, glucose, probs) for the next `years` years of one raw row.
+
+    Ages past the form's maximum are left out; glucose is kept inside its range.
+    """
+    raw     = np.asarray(raw, dtype=float)
+    offsets = np.arange(1, years + 1)
+    offsets = offsets[raw[_AGE] + offsets <= stroke_model.AGE_RANGE[1]]
+    X = np.tile(raw, (len(offsets), 1))
+    X[:, _AGE] = raw[_AGE] + offsets
+    X[:, _GLU] = np.clip(raw[_GLU] + glucose_drift * offsets, *stroke_model.GLUCOSE_RANGE)
+    probs = stroke_model.predict_proba(model, X) if len(X) else np.empty(0)
+    return offsets, X[:, _AGE], X[:, _GLU], probs
+
+
+def cached_projection(session_state, model, raw, glucose_drift=0.0, years=YEARS):
+    """project(), memoized in a session for the current answers and drift."""
+    key = (tuple(float(v) for v in raw), float(glucose_drift), years)
+    cached = session_state.get("trajectory")
+    if cached is None or cached["key"] != key:
+        cached = {"key": key, "result": project(model, raw, years, glucose_drift)}
+        session_state["trajectory"] = cached
+    return cached["result"]
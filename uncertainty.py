@@ -0,0 +1,79 @@
+# uncertainty.py — a cheap stability band around the gradient boosting estimate
+#
+# One model.apply() call gives, for every input row, the leaf it reaches in
+# each of the model's trees.  Looking those leaves up in a flat table of leaf
+# values yields every tree's contribution to the log-odds, from which both
+# signals are derived without predicting again:
+#   * staged   — the spread of the estimate over the last STAGES boosting stages
+#                (what staged_predict_proba would give, from a cumulative sum)
+#   * bootstrap — the BOOTSTRAP_LEVEL interval over BOOTSTRAP_SAMPLES ensembles
+#                of trees resampled with replacement (one matrix product)
+# The reported band spans both.  It describes how settled the model's own
+# estimate is, not a clinical confidence interval.
+import numpy as np
+
+import stroke_model
+
+STAGES            = 50
+BOOTSTRAP_SAMPLES = 200
+BOOTSTRAP_LEVEL   = 0.90
+SEED              = 0
+EXPORT_ROWS_PER_PASS = 4096
+
+
+class LeafTable:
+    """Leaf values of every tree of a fitted binary GradientBoostingClassifier."""
+
+    def __init__(self, model):
+        trees = [est.tree_ for est in model.estimators_[:, 0]]
+        self.model   = model
+        self.offsets = np.cumsum([0] + [t.node_count for t in trees[:-1]])
+        self.values  = np.concatenate([t.value[:, 0, 0] for t in trees]) * model.learning_rate
+        n = len(trees)
+        rng = np.random.default_rng(SEED)
+        self.resamples = rng.multinomial(n, np.full(n, 1.0 / n), size=BOOTSTRAP_SAMPLES).astype(float)
+
+    def contributions(self, X_scaled):
+        """(rows, trees) log-odds contribution of each tree, from one apply() pass."""
+        leaves = self.model.apply(X_scaled)[:, :, 0].astype(np.intp)
+        return self.values[leaves + self.offsets]
+
+
+def _sigmoid(z):
+    return 1.0 / (1.0 + np.exp(-z))
+
+
+def band(table, X_raw, stages=STAGES):
+    """Point estimate and stability band for each raw row, as arrays of probabilities."""
+    X_scaled = stroke_model.transform(X_raw)
+    init     = table.model._raw_predict_init(X_scaled)[:, 0]
+    contrib  = table.contributions(X_scaled)
+
+    staged  = _sigmoid(init[:, None] + np.cumsum(contrib, axis=1)[:, -stages:])
+    boot    = _sigmoid(init[:, None] + contrib @ table.resamples.T)
+    tail    = (1.0 - BOOTSTRAP_LEVEL) / 2
+    boot_lo, boot_hi = np.quantile(boot, [tail, 1.0 - tail], axis=1)
+
+    return {
+        "prob": staged[:, -1],
+        "staged_low": staged.min(axis=1),
+        "staged_high": staged.max(axis=1),
+        "bootstrap_low": boot_lo,
+        "bootstrap_high": boot_hi,
+        "low": np.minimum(staged.min(axis=1), boot_lo),
+        "high": np.maximum(staged.max(axis=1), boot_hi),
+    }
+
+
+def export_columns(table, X_raw, rows_per_pass=EXPORT_ROWS_PER_PASS):
+    """Columns added to batch exports: risk_low / risk_high for every row.
+
+    Rows are banded rows_per_pass at a time; band() holds a few (rows, trees)
+    matrices, which would dominate the memory of a large batch.
+    """
+    X_raw = np.asarray(X_raw, dtype=float).reshape(-1, len(stroke_model.FEATURES))
+    low, high = np.empty(len(X_raw)), np.empty(len(X_raw))
+    for start in range(0, len(X_raw), rows_per_pass):
+        b = band(table, X_raw[start:start + rows_per_pass])
+        low[start:start + rows_per_pass], high[start:start + rows_per_pass] = b["low"], b["high"]
+    return {"risk_low": low, "risk_high": high}
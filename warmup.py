@@ -0,0 +1,147 @@
+# warmup.py — pay model/explainer initialization at server start, not in a user's run
+#
+# run_warmup() loads the model, builds the SHAP explainer, runs a few dummy
+# predictions and explanations, loads (building if missing) the population,
+# neighbour and heatmap artifacts, and renders the home page's images and
+# narration, all through the same st.cache_* functions the pages call.
+# /ready on the status server answers 503 until it has finished.
+#
+#   python -m warmup      # run the warm-up once and print step timings
+import logging
+import socket
+import threading
+import time
+
+import resources
+import status_server
+import stroke_model
+
+_LOGGER = logging.getLogger(__name__)
+
+STATE = {
+    "status": "starting",   # starting → warming → [waiting-for-server →] ready | failed
+    "started_at": None,
+    "finished_at": None,
+    "steps": {},            # step name → seconds
+    "warnings": [],
+}
+
+
+def _warm_predictions():
+    model = resources.load_model()
+    for n in (1, 16, 256):
+        stroke_model.predict_proba(model, stroke_model.random_raw(n, seed=n))
+
+
+def _warm_explanations():
+    explainer = resources.load_explainer()
+    for n in (1, 8):
+        explainer.shap_values(stroke_model.transform(stroke_model.random_raw(n, seed=n)))
+
+
+def _warm_images():
+    import assets  # imported late: its st.cache_data decorators want the runtime
+
+    for name in assets.HERO_IMAGES:
+        assets.image_data_uri(name)
+
+
+def _warm_narration():
+    import assets
+
+    try:
+        assets.narration_audio(assets.HOME_NARRATION)
+    except Exception as exc:
+        # gTTS needs network; the home page retries on its first run
+        STATE["warnings"].append(f"narration not pre-rendered: {exc!r}")
+        _LOGGER.warning("narration not pre-rendered: %r", exc)
+
+
+STEPS = [
+    ("model", resources.load_model),
+    ("explainer", resources.load_explainer),
+    ("leaf-table", resources.load_leaf_table),
+    ("predictions", _warm_predictions),
+    ("explanations", _warm_explanations),
+    ("population", resources.load_population_index),
+    ("neighbours", resources.load_neighbour_index),
+    ("heatmap", resources.load_heatmap_grids),
+    ("images", _warm_images),
+    ("narration", _warm_narration),
+]
+
+
+def _server_listening():
+    from streamlit import config
+
+    try:
+        socket.create_connection(("127.0.0.1", config.get_option("server.port")), timeout=0.2).close()
+        return True
+    except OSError:
+        return False
+
+
+def run_warmup(wait_for_server=False):
+    """Run every warm-up step in order; returns True once the process is ready.
+
+    With wait_for_server, readiness is also held back until the Streamlit
+    server in this process accepts connections.
+    """
+    STATE.update(status="warming", started_at=time.time())
+    try:
+        for name, step in STEPS:
+            start = time.perf_counter()
+            step()
+            STATE["steps"][name] = round(time.perf_counter() - start, 4)
+    except Exception:
+        STATE["status"] = "failed"
+        _LOGGER.exception("warm-up failed")
+        return False
+    finally:
+        STATE["finished_at"] = time.time()
+    if wait_for_server:
+        STATE["status"] = "waiting-for-server"
+        while not _server_listening():
+            time.sleep(0.1)
+    STATE["status"] = "ready"
+    _LOGGER.info("warm-up finished: %s", STATE["steps"])
+    return True
+
+
+def _wait_for_runtime(timeout=120.0):
+    # cache_data needs the server's cache storage manager, which exists once the
+    # Streamlit runtime has been created by `streamlit run`
+    from streamlit import runtime
+
+    deadline = time.monotonic() + timeout
+    while not runtime.exists() and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+
+def start_background(wait_for_runtime=True):
+    """Run the warm-up on a daemon thread (used by serve.py)."""
+    def target():
+        if wait_for_runtime:
+            _wait_for_runtime()
+        run_warmup(wait_for_server=wait_for_runtime)
+
+    thread = threading.Thread(target=target, name="stroke-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+@status_server.route("/ready")
+def ready():
+    problems = status_server.problems()
+    return status_server.json_response({**STATE, "problems": problems},
+                                       200 if STATE["status"] == "ready" and not problems else 503)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    ok = run_warmup()
+    for name, seconds in STATE["steps"].items():
+        print(f"{name:<14} {seconds * 1000:9.1f} ms")
+    for warning in STATE["warnings"]:
+        print("warning:", warning)
+    raise SystemExit(0 if ok else 1)
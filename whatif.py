@@ -0,0 +1,38 @@
+# whatif.py — 1-D risk sweeps for the what-if panel on pages/Results.py
+#
+# A sweep varies one numeric feature across the form's whole range with every
+# other answer held fixed, and scores all points in one batched predict_proba
+# call.  Sweeps are memoized per (model, fixed answers, feature): the swept
+# feature's own value is not part of the key, so dragging the age slider
+# re-uses the age curve and only the glucose curve is recomputed.
+import numpy as np
+import streamlit as st
+
+import stroke_model
+
+SWEEP_POINTS = 200
+SWEEP_RANGES = {
+    "age": stroke_model.AGE_RANGE,
+    "avg_glucose_level": stroke_model.GLUCOSE_RANGE,
+}
+
+
+def sweep(model, raw, feature, points=SWEEP_POINTS):
+    """(xs, probs) for `feature` swept over its form range, other raw values fixed."""
+    col = stroke_model.FEATURES.index(feature)
+    xs  = np.linspace(*SWEEP_RANGES[feature], points)
+    X   = np.tile(np.asarray(raw, dtype=float), (points, 1))
+    X[:, col] = xs
+    return xs, stroke_model.predict_proba(model, X)
+
+
+@st.cache_data(show_spinner=False, max_entries=2048)
+def _cached_sweep(_model, model_sha, base, feature, points):
+    return sweep(_model, base, feature, points)
+
+
+def cached_sweep(model, model_sha, raw, feature, points=SWEEP_POINTS):
+    """sweep() memoized per model hash and the answers that are held fixed."""
+    base = [float(v) for v in raw]
+    base[stroke_model.FEATURES.index(feature)] = 0.0  # overwritten by the sweep
+    return _cached_sweep(model, model_sha, tuple(base), feature, points)